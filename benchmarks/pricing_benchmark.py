@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# benchmarks/pricing_benchmark.py - Fiyat Hesaplayıcı hesaplarının satır bazlı ve vektörel sürümlerini karşılaştırır
+#
+#   python benchmarks/pricing_benchmark.py --skus 100000
+#
+# Sentetik bir katalog üzerinde sayfanın eski (apply + apply_rounding) hesabı ile
+# operations/pricing_engine.calculate_prices aynı parametrelerle çalıştırılır; süreler raporlanır
+# ve sonuçların bit düzeyinde aynı olduğu doğrulanır. İkinci bölümde senaryo ızgarasının tek seferde
+# (evaluate_scenarios) hesabı, senaryoları sayfadaki gibi tek tek hesaplamakla karşılaştırılır.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+
+from operations.pricing_engine import (ROUND_UP, ROUND_DOWN, MARKUP_PERCENT, MARKUP_MULTIPLIER,
+                                       apply_rounding, calculate_prices, scenario_grid, evaluate_scenarios)
+
+OUTPUT_COLUMNS = ['SATIS_FIYATI_KDVSIZ', 'SATIS_FIYATI_KDVLI', 'NIHAI_SATIS_FIYATI', 'KÂR', 'KÂR ORANI (%)']
+
+# (kâr marjı tipi, değer, KDV dahil mi, yuvarlama)
+CASES = [
+    (MARKUP_PERCENT, 100.0, True, ROUND_UP),
+    (MARKUP_MULTIPLIER, 2.5, True, ROUND_DOWN),
+    (MARKUP_PERCENT, 35.5, False, ROUND_UP),
+    (MARKUP_MULTIPLIER, 1.0, False, "Yok"),
+]
+
+
+def build_catalog(sku_count, seed=42):
+    """Rastgele alış fiyatları ve yuvarlama sınırlarına denk gelen uç değerler içeren sentetik katalog."""
+    rng = np.random.default_rng(seed)
+    prices = np.round(rng.uniform(1, 5000, sku_count), 2)
+    edges = np.array([0.0, 9.0, 9.99, 10.0, 19.0, 19.99, 20.0, 99.99, 100.0, 0.01, 1009.0, 4.5])
+    prices[:len(edges)] = edges[:sku_count]
+    return pd.DataFrame({
+        'MODEL KODU': [f"SKU{i:06d}" for i in range(sku_count)],
+        'ÜRÜN ADI': [f"Ürün {i}" for i in range(sku_count)],
+        'ALIŞ FİYATI': prices,
+    })
+
+
+def legacy_calculate(df, markup_type, markup_value, add_vat, vat_rate, rounding_method):
+    """Sayfanın vektörel motordan önceki hesabı (satır başına apply_rounding çağrısı)."""
+    df = df.copy()
+    df['SATIS_FIYATI_KDVSIZ'] = df['ALIŞ FİYATI'] * (1 + markup_value / 100) if markup_type == MARKUP_PERCENT else df['ALIŞ FİYATI'] * markup_value
+    df['SATIS_FIYATI_KDVLI'] = df['SATIS_FIYATI_KDVSIZ'] * (1 + vat_rate / 100) if add_vat else df['SATIS_FIYATI_KDVSIZ']
+    df['NIHAI_SATIS_FIYATI'] = df['SATIS_FIYATI_KDVLI'].apply(lambda p: apply_rounding(p, rounding_method))
+    revenue = df['NIHAI_SATIS_FIYATI'] / (1 + vat_rate / 100) if add_vat else df['NIHAI_SATIS_FIYATI']
+    df['KÂR'] = revenue - df['ALIŞ FİYATI']
+    df['KÂR ORANI (%)'] = np.divide(df['KÂR'], df['ALIŞ FİYATI'], out=np.zeros_like(df['KÂR']), where=df['ALIŞ FİYATI'] != 0) * 100
+    return df
+
+
+def _bit_identical(left, right):
+    return np.array_equal(left.to_numpy(dtype=np.float64).view(np.int64), right.to_numpy(dtype=np.float64).view(np.int64))
+
+
+def _timed(func, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def legacy_scenarios(catalog, grid):
+    """Senaryoları sayfadaki gibi tek tek (her biri için DataFrame kopyalarıyla) hesaplar."""
+    results = []
+    for scenario in grid.itertuples(index=False):
+        markup_type, markup_value, vat_rate, rounding, discount, multiplier = scenario
+        df = legacy_calculate(catalog, markup_type, markup_value, vat_rate != 0, vat_rate, rounding)
+        retail_df = df.copy()
+        retail_df['İNDİRİMLİ SATIŞ FİYATI'] = retail_df['NIHAI_SATIS_FIYATI'] * (1 - discount / 100)
+        retail_df['İNDİRİM SONRASI KÂR'] = retail_df['İNDİRİMLİ SATIŞ FİYATI'] / (1 + vat_rate / 100) - retail_df['ALIŞ FİYATI']
+        wholesale_df = df.copy()
+        wholesale_df["TOPTAN FİYAT (KDV'siz)"] = wholesale_df["ALIŞ FİYATI"] * multiplier
+        wholesale_df['TOPTAN KÂR'] = wholesale_df["TOPTAN FİYAT (KDV'siz)"] - wholesale_df["ALIŞ FİYATI"]
+        results.append((df, retail_df, wholesale_df))
+    return results
+
+
+def run_scenarios(args, catalog):
+    grid = scenario_grid(markup_types=(MARKUP_PERCENT,), markup_values=(80.0, 100.0, 120.0), vat_rates=(args.vat_rate,),
+                         rounding_methods=(ROUND_UP, ROUND_DOWN), discounts=(0, 10, 20), wholesale_multipliers=(1.6, 1.8))
+    legacy_seconds, legacy = _timed(lambda: legacy_scenarios(catalog, grid), 1)
+    vector_seconds, _ = _timed(lambda: evaluate_scenarios(catalog['ALIŞ FİYATI'], grid, tidy=False), args.repeat)
+
+    mismatched = []
+    for i, (df, retail_df, wholesale_df) in enumerate(legacy):
+        rows, _ = evaluate_scenarios(catalog['ALIŞ FİYATI'], grid.iloc[[i]])
+        for column, expected in (('NIHAI_SATIS_FIYATI', df), ('KÂR', df), ('KÂR ORANI (%)', df),
+                                 ('İNDİRİMLİ SATIŞ FİYATI', retail_df), ("TOPTAN FİYAT (KDV'siz)", wholesale_df), ('TOPTAN KÂR', wholesale_df)):
+            if not _bit_identical(expected[column], rows[column]):
+                mismatched.append(f"{i}:{column}")
+    return {
+        'case': f"{len(grid)} senaryo (tek tek vs ızgara)",
+        'legacy_seconds': round(legacy_seconds, 4),
+        'vector_seconds': round(vector_seconds, 4),
+        'speedup': round(legacy_seconds / vector_seconds, 1) if vector_seconds > 0 else None,
+        'bit_identical': not mismatched,
+        'mismatched_columns': mismatched[:20],
+    }
+
+
+def run(args):
+    catalog = build_catalog(args.skus)
+    results = []
+    for markup_type, markup_value, add_vat, rounding in CASES:
+        params = (markup_type, markup_value, add_vat, args.vat_rate, rounding)
+        legacy_seconds, legacy = _timed(lambda: legacy_calculate(catalog, *params), args.repeat)
+        vector_seconds, vector = _timed(lambda: calculate_prices(catalog, *params), args.repeat)
+        mismatched = [c for c in OUTPUT_COLUMNS if not _bit_identical(legacy[c], vector[c])]
+        results.append({
+            'case': f"{markup_type} {markup_value} | KDV {'dahil' if add_vat else 'hariç'} | {rounding}",
+            'legacy_seconds': round(legacy_seconds, 4),
+            'vector_seconds': round(vector_seconds, 4),
+            'speedup': round(legacy_seconds / vector_seconds, 1) if vector_seconds > 0 else None,
+            'bit_identical': not mismatched,
+            'mismatched_columns': mismatched,
+        })
+    results.append(run_scenarios(args, catalog))
+    return results
+
+
+def print_report(skus, results):
+    print(f"{skus} SKU")
+    header = f"{'Senaryo':<50} {'Eski(s)':>9} {'Vektörel(s)':>12} {'Hızlanma':>9} {'Birebir':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['case']:<50} {r['legacy_seconds']:>9.4f} {r['vector_seconds']:>12.4f} {r['speedup']:>8}x {'evet' if r['bit_identical'] else 'HAYIR':>8}")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fiyat hesaplama motoru benchmark'ı (satır bazlı vs vektörel)")
+    parser.add_argument("--skus", type=int, default=100_000, help="Sentetik katalogdaki SKU sayısı")
+    parser.add_argument("--vat-rate", type=float, default=10, help="KDV oranı (%%)")
+    parser.add_argument("--repeat", type=int, default=3, help="Her ölçümün tekrar sayısı (en iyisi raporlanır)")
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    results = run(args)
+    print_report(args.skus, results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'arguments': vars(args), 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"\nSonuçlar '{args.output}' dosyasına yazıldı.")
+    if not all(r['bit_identical'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# benchmarks/sync_benchmark.py - Yerel sahte sunuculara karşı senkronizasyon hız ölçümü
+#
+#   python benchmarks/sync_benchmark.py --products 200 --latency-ms 50 --scenarios sync,price,media
+#
+# Her senaryo kendi taze sahte sunucularıyla çalışır (bir senaryonun yaptığı değişiklikler
+# diğerini etkilemez). Ürün/saniye, ürün başına API çağrısı ve bekleme (sleep) süreleri raporlanır.
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_path)
+
+import sync_metrics
+from standin.servers import start_standin_servers
+
+FULL_SYNC_MODE = "Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)"
+
+
+def _scenario_result(name, products, seconds, servers, summary, extra=None):
+    stats = servers.stats()
+    shopify_calls = stats['shopify']['total_calls']
+    sentos_calls = stats['sentos']['total_calls']
+    result = {
+        'scenario': name,
+        'products': products,
+        'seconds': round(seconds, 2),
+        'products_per_second': round(products / seconds, 3) if seconds > 0 else 0,
+        'shopify_calls': shopify_calls,
+        'sentos_calls': sentos_calls,
+        'shopify_calls_per_product': round(shopify_calls / products, 2) if products else 0,
+        'sentos_calls_per_product': round(sentos_calls / products, 2) if products else 0,
+        'server_throttled': stats['shopify']['total_throttled'],
+        'sleep_seconds': summary.get('total_sleep_seconds', 0),
+        'sleeps': summary.get('sleeps', {}),
+        'client_counters': summary.get('counters', {}),
+        'server_calls': stats,
+    }
+    result.update(extra or {})
+    return result
+
+
+def bench_sync(args):
+    """sync_runner'ın tam akışını (önbellek, Sentos çekimi, ürün işleme) ölçer."""
+    from sync_runner import sync_products_from_sentos_api
+
+    with _servers(args) as servers:
+        outcome = {}
+
+        def progress_callback(update):
+            if update.get('status') in ['done', 'error']:
+                outcome.update(update)
+
+        start = time.monotonic()
+        sync_products_from_sentos_api(
+            store_url=servers.shopify_store_url, access_token="standin-token",
+            sentos_api_url=servers.sentos_api_url, sentos_api_key="standin", sentos_api_secret="standin",
+            sentos_cookie=servers.sentos_cookie, test_mode=False, progress_callback=progress_callback,
+            stop_event=threading.Event(), max_workers=args.workers, sync_mode=args.sync_mode)
+        seconds = time.monotonic() - start
+
+        if outcome.get('status') != 'done':
+            logging.error(f"Senkronizasyon benchmark'ı hata ile bitti: {outcome.get('message')}")
+        results = outcome.get('results', {})
+        summary = results.get('timings') or sync_metrics.metrics.summary()
+        return _scenario_result('sync', results.get('stats', {}).get('total', 0), seconds, servers, summary,
+                                {'sync_mode': args.sync_mode, 'workers': args.workers, 'stats': results.get('stats', {})})
+
+
+# --- Eski REST fiyat gönderim yolu: 'price' senaryosunun karşılaştırma tabanı (uygulamada kullanılmaz) ---
+
+class RateLimiter:
+    """Eski REST fiyat işçilerinin paylaştığı, adaptif aralıklı istek sınırlayıcı."""
+    def __init__(self, requests_per_second: float):
+        self.min_interval = 1.0 / requests_per_second
+        self.lock = threading.Lock()
+        self.last_request_time = 0
+        self.success_count = 0
+        self.adaptive_factor = 1.0
+
+    def wait(self):
+        with self.lock:
+            current_interval = self.min_interval * self.adaptive_factor
+            elapsed = time.time() - self.last_request_time
+            if elapsed < current_interval:
+                sync_metrics.sleep(current_interval - elapsed, 'price_rate_limiter_wait')
+            self.last_request_time = time.time()
+
+    def on_success(self):
+        """Başarılı istek sonrası hızlan"""
+        self.success_count += 1
+        if self.success_count > 10:  # 10 başarılı istekten sonra
+            self.adaptive_factor = max(0.5, self.adaptive_factor * 0.95)
+            
+    def on_throttle(self):
+        """Throttle durumunda yavaşla"""
+        self.adaptive_factor = min(3.0, self.adaptive_factor * 1.3)
+        self.success_count = 0
+
+
+def update_prices_for_single_product(shopify_api, product_id, variants_to_update, rate_limiter):
+    """
+    Tek bir ürüne ait varyantların fiyatlarını REST API ile tek tek günceller.
+    Paylaşılan bir rate_limiter objesi kullanarak hız limitlerini aşmaz.
+    """
+    if not variants_to_update:
+        return {"status": "skipped", "reason": "Güncellenecek varyant yok."}
+
+    success_count = 0
+    errors = []
+    max_retries = 3
+
+    for variant_payload in variants_to_update:
+        variant_gid = variant_payload.get("id")
+        variant_id_numeric = variant_gid.split("/")[-1]
+        
+        for attempt in range(max_retries):
+            try:
+                # İstek göndermeden önce hız limitini bekle
+                rate_limiter.wait()
+
+                endpoint = f"variants/{variant_id_numeric}.json"
+                
+                # REST API için doğru payload formatı
+                data_to_send = {"variant": {"id": int(variant_id_numeric), "price": variant_payload["price"]}}
+                if "compareAtPrice" in variant_payload:
+                    data_to_send["variant"]["compare_at_price"] = variant_payload["compareAtPrice"]
+
+                # _make_request'e dictionary olarak gönderiyoruz, o JSON'a çeviriyor
+                shopify_api._make_request("PUT", endpoint, data=data_to_send)
+                
+                success_count += 1
+                logging.info(f"✅ Varyant {variant_id_numeric} başarıyla güncellendi: {variant_payload['price']}")
+                break # Başarılı oldu, bir sonraki varyanta geç
+
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code == 429 and attempt < max_retries - 1:
+                    wait_time = (2 ** attempt) + random.uniform(0, 1)
+                    logging.warning(f"Rate limit! {variant_id_numeric} için {wait_time:.1f}s bekleniyor...")
+                    sync_metrics.increment('shopify.http_429')
+                    sync_metrics.sleep(wait_time, 'price_retry_backoff')
+                else:
+                    error_msg = f"Varyant {variant_id_numeric} güncellenemedi: {e}"
+                    logging.error(error_msg)
+                    errors.append(error_msg)
+                    break # Hata kalıcı, bir sonraki varyanta geç
+            except Exception as e:
+                if attempt < max_retries - 1:
+                    sync_metrics.increment('price.retries')
+                    sync_metrics.sleep(1, 'price_retry_backoff')
+                else:
+                    error_msg = f"Varyant {variant_id_numeric} güncellenemedi (Genel Hata): {e}"
+                    logging.error(error_msg)
+                    errors.append(error_msg)
+                    break
+
+    if errors:
+        return {"status": "failed", "reason": "; ".join(errors)}
+    else:
+        logging.info(f"✅ Ürün {product_id.split('/')[-1]} için {success_count} varyant başarıyla güncellendi.")
+        return {"status": "success", "updated_count": success_count}
+
+
+def _process_one_product_for_price_sync(shopify_api, product_base_sku, price_index, rate_limiter):
+    """
+    Tek bir ürünü baştan sona işleyen worker fonksiyonu.
+    Varyant SKU'ları ve fiyat, build_price_index ile bir kez hazırlanan indeksten okunur.
+    """
+    try:
+        # 1. Bu ürüne ait tüm varyant SKU'ları
+        entry = price_index.get(product_base_sku)
+        if not entry or not entry['variant_skus']:
+            return {"status": "failed", "reason": f"Varyant listesinde ürün bulunamadı: {product_base_sku}"}
+        
+        variant_skus = entry['variant_skus']
+        logging.info(f"Ürün {product_base_sku} için {len(variant_skus)} varyant bulundu: {variant_skus}")
+        
+        # 2. Bu varyant SKU'ları için Shopify'dan ID'leri alalım
+        variant_map = shopify_api.get_variant_ids_by_skus(variant_skus, search_by_product_sku=False)
+        if not variant_map:
+            return {"status": "failed", "reason": f"Shopify'da varyantlar bulunamadı: {variant_skus}"}
+
+        # 3. Ana ürünün hesaplanmış fiyatı
+        if entry['price'] is None:
+            return {"status": "skipped", "reason": f"Hesaplanmış fiyat listesinde ürün bulunamadı: {product_base_sku}"}
+        
+        price_to_set = entry['price']
+        compare_price_to_set = entry['compare_price']
+
+        # 4. Her varyant için güncelleme verisini hazırla
+        updates = []
+        for variant_sku in variant_skus:
+            if variant_sku in variant_map:
+                variant_info = variant_map[variant_sku]
+                payload = {
+                    "id": variant_info['variant_id'], 
+                    "price": f"{price_to_set:.2f}",
+                    "sku": variant_sku  # Debug için ekliyoruz
+                }
+                if compare_price_to_set is not None and pd.notna(compare_price_to_set):
+                    payload["compareAtPrice"] = f"{compare_price_to_set:.2f}"
+                updates.append(payload)
+                logging.info(f"Varyant {variant_sku} için fiyat güncelleme hazırlandı: {price_to_set:.2f}")
+            else:
+                logging.warning(f"Varyant SKU {variant_sku} Shopify'da bulunamadı")
+
+        if not updates:
+            return {"status": "skipped", "reason": "Shopify'da eşleşen varyant bulunamadı."}
+
+        # 5. Product ID'yi ilk varyanttan alalım
+        first_variant_info = list(variant_map.values())[0]
+        product_id = first_variant_info['product_id']
+
+        # 6. REST tabanlı güncelleme fonksiyonunu çağır
+        result = update_prices_for_single_product(shopify_api, product_id, updates, rate_limiter)
+        
+        # Sonucu detaylandır
+        if result.get('status') == 'success':
+            rate_limiter.on_success()  # Başarı durumunda hızlan
+        elif "throttled" in result.get('reason', '').lower():
+            rate_limiter.on_throttle()  # Throttle durumunda yavaşla
+            
+        return result
+    except Exception as e:
+        if "throttled" in str(e).lower():
+            rate_limiter.on_throttle()
+        return {"status": "failed", "reason": str(e)}
+
+
+def bench_price(args):
+    """Eski REST tabanlı (varyant başına PUT) fiyat gönderim akışını ölçer; price_graphql ile karşılaştırma içindir."""
+    from connectors.shopify_api import ShopifyAPI
+    from operations.price_sync import build_price_index
+
+    with _servers(args) as servers:
+        products = servers.catalog.sentos_products[:args.price_products]
+        variants_df = pd.DataFrame([{'MODEL KODU': v['sku'], 'base_sku': p['sku']} for p in products for v in p['variants']])
+        calculated_df = pd.DataFrame([{'MODEL KODU': p['sku'], 'NIHAI_SATIS_FIYATI': round(p['purchase_price'] * 2.5, 2)} for p in products])
+
+        sync_metrics.metrics.reset()
+        shopify_api = ShopifyAPI(servers.shopify_store_url, "standin-token")
+        rate_limiter = RateLimiter(requests_per_second=args.price_rps)
+        outcomes = {'success': 0, 'failed': 0, 'skipped': 0}
+
+        start = time.monotonic()
+        price_index = build_price_index(variants_df, calculated_df, 'NIHAI_SATIS_FIYATI')
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(_process_one_product_for_price_sync, shopify_api, p['sku'], price_index,
+                                       rate_limiter) for p in products]
+            for future in as_completed(futures):
+                status = future.result().get('status', 'failed')
+                outcomes[status] = outcomes.get(status, 0) + 1
+        seconds = time.monotonic() - start
+
+        return _scenario_result('price', len(products), seconds, servers, sync_metrics.metrics.summary(),
+                                {'workers': args.workers, 'requests_per_second': args.price_rps, 'stats': outcomes})
+
+
+def bench_price_graphql(args):
+    """Fiyat Hesaplayıcı sayfasının productVariantsBulkUpdate tabanlı fiyat gönderimini ölçer."""
+    from connectors.shopify_api import ShopifyAPI
+    from operations.price_sync import send_prices_to_shopify
+
+    with _servers(args) as servers:
+        products = servers.catalog.sentos_products[:args.price_products]
+        variants_df = pd.DataFrame([{'MODEL KODU': v['sku'], 'base_sku': p['sku']} for p in products for v in p['variants']])
+        calculated_df = pd.DataFrame([{'MODEL KODU': p['sku'], 'NIHAI_SATIS_FIYATI': round(p['purchase_price'] * 2.5, 2)} for p in products])
+
+        sync_metrics.metrics.reset()
+        shopify_api = ShopifyAPI(servers.shopify_store_url, "standin-token")
+        start = time.monotonic()
+        result = send_prices_to_shopify(shopify_api, calculated_df, variants_df, 'NIHAI_SATIS_FIYATI', worker_count=min(args.workers, 4),
+                                        bulk_threshold=args.price_bulk_threshold)
+        seconds = time.monotonic() - start
+
+        return _scenario_result('price_gql', len(products), seconds, servers, sync_metrics.metrics.summary(),
+                                {'workers': args.workers, 'bulk_threshold': args.price_bulk_threshold,
+                                 'stats': {key: result.get(key, 0) for key in ('success', 'failed', 'unchanged', 'unmatched')}})
+
+
+def bench_media(args):
+    """run_safe_media_sync.py'nin ürün ürün medya senkronizasyonunu ölçer."""
+    import run_safe_media_sync
+
+    with _servers(args) as servers:
+        env = {
+            'SHOPIFY_STORE': servers.shopify_store_url, 'SHOPIFY_TOKEN': 'standin-token',
+            'SENTOS_API_URL': servers.sentos_api_url, 'SENTOS_API_KEY': 'standin', 'SENTOS_API_SECRET': 'standin',
+            'SENTOS_COOKIE': servers.sentos_cookie, 'MAX_PRODUCTS': str(args.media_products), 'SYNC_MODE': 'benchmark',
+            'BULK_MEDIA': 'true' if args.bulk_media else 'false', 'MEDIA_WORKERS': str(args.workers),
+        }
+        previous_env = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        start = time.monotonic()
+        try:
+            run_safe_media_sync.main()
+        except SystemExit as e:
+            logging.warning(f"Medya senkronizasyonu çıkış kodu ile bitti: {e.code}")
+        finally:
+            for key, value in previous_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        seconds = time.monotonic() - start
+
+        products = min(args.media_products, len(servers.catalog.sentos_products))
+        return _scenario_result('media', products, seconds, servers, sync_metrics.metrics.summary(), {'bulk_media': args.bulk_media})
+
+
+SCENARIOS = {'sync': bench_sync, 'price': bench_price, 'price_graphql': bench_price_graphql, 'media': bench_media}
+
+
+def _servers(args):
+    return start_standin_servers(product_count=args.products, latency_ms=args.latency_ms,
+                                 variants_per_product=args.variants, images_per_product=args.images,
+                                 media_processing_seconds=args.media_processing_seconds)
+
+
+def print_report(results):
+    header = f"{'Senaryo':<9} {'Ürün':>6} {'Süre(s)':>9} {'Ürün/s':>8} {'Shopify/ürün':>13} {'Sentos/ürün':>12} {'Throttle':>9} {'Bekleme(s)':>11}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<9} {r['products']:>6} {r['seconds']:>9.2f} {r['products_per_second']:>8.3f} "
+              f"{r['shopify_calls_per_product']:>13.2f} {r['sentos_calls_per_product']:>12.2f} {r['server_throttled']:>9} {r['sleep_seconds']:>11.2f}")
+    for r in results:
+        if r['sleeps']:
+            top = sorted(r['sleeps'].items(), key=lambda item: item[1]['seconds'], reverse=True)[:5]
+            print(f"\n{r['scenario']} - en çok bekleme: " + ", ".join(f"{reason} {entry['seconds']:.1f}s ({entry['count']}x)" for reason, entry in top))
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sahte Shopify/Sentos sunucularına karşı senkronizasyon benchmark'ı")
+    parser.add_argument("--scenarios", default="sync,price,media", help="Virgülle ayrılmış: sync, price, price_graphql, media")
+    parser.add_argument("--products", type=int, default=100, help="Sahte Sentos kataloğundaki ürün sayısı")
+    parser.add_argument("--variants", type=int, default=4, help="Ürün başına varyant sayısı")
+    parser.add_argument("--images", type=int, default=3, help="Ürün başına görsel sayısı")
+    parser.add_argument("--latency-ms", type=int, default=50, help="Sahte sunucuların her isteğe eklediği gecikme")
+    parser.add_argument("--media-processing-seconds", type=float, default=2.0, help="Yeni medyanın READY olma süresi")
+    parser.add_argument("--workers", type=int, default=5, help="Senkronizasyon ve fiyat işçisi sayısı")
+    parser.add_argument("--sync-mode", default=FULL_SYNC_MODE, help="sync_runner senkronizasyon modu")
+    parser.add_argument("--price-products", type=int, default=50, help="Fiyatı gönderilecek ürün sayısı")
+    parser.add_argument("--price-rps", type=float, default=2.0, help="Fiyat RateLimiter saniyelik istek sınırı")
+    parser.add_argument("--price-bulk-threshold", type=int, default=None,
+                        help="price_graphql senaryosunda toplu mutasyona geçilecek varyant sayısı (0: kapalı, varsayılan PRICE_BULK_THRESHOLD)")
+    parser.add_argument("--media-products", type=int, default=20, help="Medya senkronizasyonu yapılacak ürün sayısı (MAX_PRODUCTS)")
+    parser.add_argument("--bulk-media", action="store_true", help="Medya senaryosunu toplu (BULK_MEDIA=true) modda çalıştır")
+    parser.add_argument("--metrics-dir", default=os.path.join("metrics", "benchmarks"), help="Senaryoların metrik dosyalarının yazılacağı klasör")
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Benchmark çalışmalarının metrikleri gerçek senkronizasyon metriklerinin üzerine yazılmasın
+    sync_metrics.METRICS_DIR = args.metrics_dir
+
+    results = []
+    for name in [s.strip() for s in args.scenarios.split(',') if s.strip()]:
+        if name not in SCENARIOS:
+            print(f"Bilinmeyen senaryo atlandı: {name}")
+            continue
+        print(f"'{name}' senaryosu çalışıyor...")
+        results.append(SCENARIOS[name](args))
+
+    print()
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'arguments': vars(args), 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"\nSonuçlar '{args.output}' dosyasına yazıldı.")
+
+
+if __name__ == "__main__":
+    main()
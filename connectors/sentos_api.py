@@ -8,6 +8,8 @@ import json
 from urllib.parse import urljoin, urlparse
 from requests.auth import HTTPBasicAuth
 
+import sync_metrics
+
 class SentosAPI:
     """Sentos API ile iletişimi yöneten sınıf."""
     def __init__(self, api_url, api_key, api_secret, api_cookie=None):
@@ -40,7 +42,8 @@ class SentosAPI:
 
         for attempt in range(self.max_retries):
             try:
-                response = requests.request(method, url, headers=headers, auth=auth, data=data, params=params, timeout=30)
+                with sync_metrics.span('sentos.request'):
+                    response = requests.request(method, url, headers=headers, auth=auth, data=data, params=params, timeout=30)
                 response.raise_for_status()
                 return response
             except requests.exceptions.HTTPError as e:
@@ -48,7 +51,9 @@ class SentosAPI:
                 if e.response.status_code in [500, 429] and attempt < self.max_retries - 1:
                     wait_time = self.base_delay * (2 ** attempt)  # Üstel geri çekilme
                     logging.warning(f"Sentos API'den 500 veya 429 hatası alındı. {wait_time} saniye beklenip tekrar denenecek... (Deneme {attempt + 1}/{self.max_retries})")
-                    time.sleep(wait_time)
+                    sync_metrics.increment('sentos.throttled' if e.response.status_code == 429 else 'sentos.server_errors')
+                    sync_metrics.increment('sentos.retries')
+                    sync_metrics.sleep(wait_time, 'sentos_retry_backoff')
                 else:
                     # Diğer hatalarda veya son denemede istisnayı yükselt
                     logging.error(f"Sentos API Hatası ({url}): {e}")
@@ -83,7 +88,7 @@ class SentosAPI:
                 
                 if len(products_on_page) < page_size: break
                 page += 1
-                time.sleep(0.5)
+                sync_metrics.sleep(0.5, 'sentos_page_delay')
             except Exception as e:
                 logging.error(f"Sayfa {page} çekilirken hata: {e}")
                 # Hata durumunda işlemi sonlandır. _make_request zaten tekrar denemeyi yönetiyor.
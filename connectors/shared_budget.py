@@ -0,0 +1,128 @@
+# connectors/shared_budget.py (Süreçler arası ortak Shopify istek ve GraphQL maliyet bütçesi)
+
+import json
+import logging
+import os
+import time
+
+import sync_metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SharedRequestBudget:
+    """
+    Aynı makinedeki birden fazla senkronizasyon sürecinin (shard) tek bir Shopify
+    bütçesini paylaşmasını sağlar. Durum, kilitlenen küçük bir JSON dosyasında tutulur;
+    böylece tüm shard'lar birlikte mağaza limitini aşmaz.
+    İki sınır birlikte uygulanır: dakikalık istek sayısı ve GraphQL maliyet kovası. Shopify GraphQL'i
+    istek sayısıyla değil maliyet puanıyla kısıtladığı için kova, herhangi bir shard'ın son gördüğü
+    throttleStatus'tan (record_throttle_status) geri dolum hızıyla tahmin edilir; her GraphQL isteği
+    gönderilmeden önce tahmini maliyeti kovadan düşülür. Tahmin, bir sonraki yanıttaki gerçek durumla düzeltilir.
+    """
+    def __init__(self, path, max_requests_per_minute, min_request_interval=0.0, bucket_size=1000, restore_rate=50):
+        self.path = path
+        self.max_requests_per_minute = max_requests_per_minute
+        self.min_request_interval = min_request_interval
+        self.bucket_size = bucket_size
+        self.restore_rate = restore_rate
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Dosya yoksa oluştur (a+ mevcut içeriği silmez)
+        with open(self.path, 'a+', encoding='utf-8'):
+            pass
+
+    def _lock(self, f):
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock(self, f):
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read_state(self, f):
+        f.seek(0)
+        try:
+            return json.loads(f.read() or '{}')
+        except json.JSONDecodeError:
+            return {}
+
+    def _write_state(self, f, state):
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps(state))
+        f.flush()
+
+    def _available_points(self, bucket, now):
+        if not bucket:
+            return float(self.bucket_size)
+        restored = (now - bucket['observed_at']) * bucket['restore_rate']
+        return min(bucket['maximum_available'], bucket['currently_available'] + restored)
+
+    def acquire(self, cost=0):
+        """
+        Ortak bütçeden bir istek hakkı ve (GraphQL için) 'cost' maliyet puanı alır;
+        gerekirse ikisi de açılana kadar bekler.
+        """
+        while True:
+            with open(self.path, 'r+', encoding='utf-8') as f:
+                self._lock(f)
+                try:
+                    now = time.time()
+                    state = self._read_state(f)
+                    window_start = state.get('window_start', now)
+                    count = state.get('count', 0)
+                    last_request = state.get('last_request', 0)
+                    bucket = state.get('bucket')
+                    available = self._available_points(bucket, now)
+                    restore_rate = (bucket or {}).get('restore_rate', self.restore_rate)
+
+                    if now - window_start >= 60:
+                        window_start, count = now, 0
+
+                    wait_time = 0
+                    if count >= self.max_requests_per_minute:
+                        wait_time = 60 - (now - window_start)
+                    elif now - last_request < self.min_request_interval:
+                        wait_time = self.min_request_interval - (now - last_request)
+                    elif cost and available < cost:
+                        wait_time = (cost - available) / restore_rate
+
+                    if wait_time <= 0:
+                        state.update({'window_start': window_start, 'count': count + 1, 'last_request': now})
+                        if cost:
+                            state['bucket'] = {
+                                'currently_available': available - cost, 'restore_rate': restore_rate,
+                                'maximum_available': (bucket or {}).get('maximum_available', self.bucket_size),
+                                'observed_at': now,
+                            }
+                        self._write_state(f, state)
+                        return
+                finally:
+                    self._unlock(f)
+
+            if wait_time > 1:
+                logging.info(f"Ortak Shopify bütçesi dolu, {wait_time:.1f}s bekleniyor...")
+            sync_metrics.sleep(wait_time, 'shared_budget_wait')
+
+    def record_throttle_status(self, currently_available, maximum_available, restore_rate):
+        """Bir GraphQL yanıtındaki throttleStatus'u tüm shard'ların kova tahminine yazar."""
+        with open(self.path, 'r+', encoding='utf-8') as f:
+            self._lock(f)
+            try:
+                state = self._read_state(f)
+                state['bucket'] = {'currently_available': currently_available, 'maximum_available': maximum_available,
+                                   'restore_rate': restore_rate, 'observed_at': time.time()}
+                self._write_state(f, state)
+            finally:
+                self._unlock(f)
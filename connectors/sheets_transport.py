@@ -0,0 +1,155 @@
+# connectors/sheets_transport.py (Google Sheets yazma istekleri için kota bilinçli, tekrar deneyen taşıma katmanı)
+
+import collections
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import sync_metrics
+
+# Sheets API yazma kotası kullanıcı (servis hesabı) başına dakikada 60 istektir; biraz pay bırakılır
+SHEETS_WRITE_REQUESTS_PER_MINUTE = int(os.getenv("SHEETS_WRITE_REQUESTS_PER_MINUTE", "55"))
+SHEETS_WRITE_WORKERS = int(os.getenv("SHEETS_WRITE_WORKERS", "3"))
+# Tek values_batch_update isteğindeki en fazla hücre (Sheets API istek boyutu ~2 MB altında kalsın)
+MAX_CELLS_PER_REQUEST = int(os.getenv("SHEETS_MAX_CELLS_PER_REQUEST", "50000"))
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _column_letter(col):
+    letters = ""
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def a1_range(title, first_row, first_col, last_row, last_col):
+    """1 tabanlı satır/sütun sınırlarından "'Sayfa'!A1:C3" aralığı üretir."""
+    quoted = title.replace("'", "''")
+    return f"'{quoted}'!{_column_letter(first_col)}{first_row}:{_column_letter(last_col)}{last_row}"
+
+
+def chunk_value_ranges(blocks, max_cells=MAX_CELLS_PER_REQUEST):
+    """
+    (sayfa adı, ilk satır, ilk sütun, değerler) bloklarını values_batch_update 'data' listelerine çevirir;
+    her liste en fazla max_cells hücre içerir, tek başına sınırı aşan bloklar satır dilimlerine ayrılır.
+    """
+    chunk, chunk_cells = [], 0
+    for title, first_row, first_col, values in blocks:
+        width = max(len(values[0]), 1)
+        step = max(max_cells // width, 1)
+        for offset in range(0, len(values), step):
+            rows = values[offset:offset + step]
+            if chunk and chunk_cells + len(rows) * width > max_cells:
+                yield chunk
+                chunk, chunk_cells = [], 0
+            start = first_row + offset
+            chunk.append({'range': a1_range(title, start, first_col, start + len(rows) - 1, first_col + width - 1), 'values': rows})
+            chunk_cells += len(rows) * width
+    if chunk:
+        yield chunk
+
+
+class MinuteQuota:
+    """Kayan 60 saniyelik pencerede en fazla 'limit' isteğe izin verir; tüm thread'ler arasında paylaşılır."""
+    def __init__(self, limit):
+        self.limit = limit
+        self._calls = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= 60:
+                    self._calls.popleft()
+                if len(self._calls) < self.limit:
+                    self._calls.append(now)
+                    return
+                wait_time = 60 - (now - self._calls[0])
+            sync_metrics.sleep(wait_time, 'sheets_quota_wait')
+
+
+# Kota servis hesabı başına olduğundan aynı süreçteki tüm kayıtlar tek pencereyi paylaşır
+_WRITE_QUOTA = MinuteQuota(SHEETS_WRITE_REQUESTS_PER_MINUTE)
+
+
+class SheetsTransport:
+    """
+    Bir e-tabloya giden yazma isteklerini taşır: her istek dakikalık kotadan pay alır,
+    429 / 5xx ve bağlantı hatalarında üstel geri çekilmeyle tekrar denenir.
+    write_values büyük yükleri sınırlı hücrelik parçalara bölüp birkaç paralel işçiyle gönderir
+    ve ilerlemeyi progress_callback({'progress': yüzde, 'message': ...}) ile çağıran thread'de bildirir.
+    """
+    def __init__(self, spreadsheet, max_workers=SHEETS_WRITE_WORKERS, max_cells=MAX_CELLS_PER_REQUEST,
+                 max_retries=5, base_delay=2.0, quota=None, progress_callback=None):
+        self.spreadsheet = spreadsheet
+        self.max_workers = max(1, max_workers)
+        self.max_cells = max_cells
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.quota = quota or _WRITE_QUOTA
+        self.progress_callback = progress_callback
+
+    def _call(self, func, *args, **kwargs):
+        for attempt in range(self.max_retries):
+            self.quota.acquire()
+            try:
+                with sync_metrics.span('sheets.request'):
+                    return func(*args, **kwargs)
+            except Exception as e:
+                # gspread.exceptions.APIError yanıtı taşır; bağlantı hatalarında yanıt yoktur
+                response = getattr(e, 'response', None)
+                status = getattr(response, 'status_code', None)
+                retryable = status in RETRYABLE_STATUS_CODES or (response is None and isinstance(e, (ConnectionError, OSError)))
+                if not retryable or attempt == self.max_retries - 1:
+                    raise
+                wait_time = self.base_delay * (2 ** attempt) + random.uniform(0, 1)
+                logging.warning(f"Google Sheets isteği başarısız ({status or e}), {wait_time:.1f}s sonra tekrar denenecek... "
+                                f"(Deneme {attempt + 1}/{self.max_retries})")
+                sync_metrics.increment('sheets.throttled' if status == 429 else 'sheets.retries')
+                sync_metrics.sleep(wait_time, 'sheets_retry_backoff')
+
+    def fetch_sheet_metadata(self, params=None):
+        return self._call(self.spreadsheet.fetch_sheet_metadata, params=params)
+
+    def batch_update(self, body):
+        return self._call(self.spreadsheet.batch_update, body)
+
+    def _report(self, done, total, cells):
+        if self.progress_callback:
+            self.progress_callback({'progress': int(done * 100 / total),
+                                    'message': f"Google E-Tablolar'a yazılıyor: {done}/{total} parça ({cells} hücre)"})
+
+    def write_values(self, blocks, value_input_option='USER_ENTERED'):
+        """
+        Blokları (bkz. chunk_value_ranges) parçalar halinde values_batch_update ile gönderir.
+        Tekrar denemelere rağmen başarısız olan parça kalırsa diğerleri yazıldıktan sonra hata fırlatılır.
+        Dönen değer: gönderilen istek (parça) sayısı.
+        """
+        chunks = list(chunk_value_ranges(blocks, self.max_cells))
+        if not chunks:
+            return 0
+        done, cells, failures = 0, 0, []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            futures = {
+                executor.submit(sync_metrics.bind(self._call), self.spreadsheet.values_batch_update,
+                                {'valueInputOption': value_input_option, 'data': chunk}): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    future.result()
+                    done += 1
+                    cells += sum(len(item['values']) * len(item['values'][0]) for item in chunk)
+                except Exception as e:
+                    failures.append(f"{chunk[0]['range']}: {e}")
+                    logging.error(f"Google Sheets parçası yazılamadı ({chunk[0]['range']}...): {e}")
+                self._report(done + len(failures), len(chunks), cells)
+        if failures:
+            raise Exception(f"{len(failures)}/{len(chunks)} Google Sheets parçası yazılamadı: {failures[0]}")
+        return len(chunks)
@@ -0,0 +1,163 @@
+# connectors/sheets_writer.py (Google E-Tablolar'a yalnızca değişen hücreleri yazan yazıcı)
+
+import gzip
+import json
+import logging
+import math
+import os
+
+import numpy as np
+
+from connectors.sheets_transport import SheetsTransport
+
+# data_manager.DATA_CACHE_DIR ile aynı klasör (media_map.py ile aynı gerekçe)
+SHEETS_STATE_DIR = os.getenv("SHEETS_STATE_DIR", os.path.join("data_cache", "sheets_state"))
+
+
+def _cell(value, allow_formulas):
+    # set_with_dataframe(allow_formulas=False) ile aynı: '=' ile başlayan metin formül olarak yorumlanmaz
+    if value is None or value is True or value is False or isinstance(value, int):
+        return "" if value is None else value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else ""
+    if value != value:  # NaT / pd.NA
+        return ""
+    text = str(value)
+    return "'" + text if not allow_formulas and text.startswith("=") else text
+
+
+def frame_values(df, allow_formulas=False):
+    """DataFrame'i başlık satırı + veri satırları olarak E-Tablo hücre değerlerine çevirir (boş değerler '')."""
+    columns = [[_cell(v, allow_formulas) for v in df[column].tolist()] for column in df.columns]
+    header = [str(column) for column in df.columns]
+    return [header] + [list(row) for row in zip(*columns)]
+
+
+def _grid(values, rows, cols):
+    grid = np.full((rows, cols), "", dtype=object)
+    for i, row in enumerate(values[:rows]):
+        row = row[:cols]
+        grid[i, :len(row)] = row
+    return grid
+
+
+def changed_ranges(old_values, new_values):
+    """
+    Eski ve yeni hücre değerlerini karşılaştırır; değişen ardışık satır blokları için
+    (ilk_satır, ilk_sütun, son_satır, son_sütun) 1 tabanlı sınırlar döndürür.
+    old_values None ise tüm tablo tek aralık olarak döner.
+    """
+    rows, cols = len(new_values), max((len(row) for row in new_values), default=0)
+    if not rows or not cols:
+        return []
+    if old_values is None:
+        return [(1, 1, rows, cols)]
+    changed = _grid(old_values, rows, cols) != _grid(new_values, rows, cols)
+    changed_rows = np.flatnonzero(changed.any(axis=1))
+    if not changed_rows.size:
+        return []
+    ranges = []
+    for block in np.split(changed_rows, np.flatnonzero(np.diff(changed_rows) != 1) + 1):
+        changed_cols = np.flatnonzero(changed[block].any(axis=0))
+        ranges.append((int(block[0]) + 1, int(changed_cols[0]) + 1, int(block[-1]) + 1, int(changed_cols[-1]) + 1))
+    return ranges
+
+
+class SheetDiffWriter:
+    """
+    Her çalışma sayfasına son yazılan değerlerin yerel kopyasını (data_cache/sheets_state) tutar.
+    Kayıt birkaç istekte tamamlanır: e-tablo meta verisi bir kez okunur, eksik sayfalar ve boyut
+    değişiklikleri tek batch_update ile yapılır, tüm sayfaların değişen hücre aralıkları ise
+    values_batch_update ile gönderilir. İstekler SheetsTransport üzerinden (kota, parçalama, tekrar deneme) gider.
+    Yerel kopya yoksa (ilk kayıt, başka makine) tablo bir kez tamamen yazılır. Kopya, yazımdan sonraki
+    Drive değişiklik zamanıyla (modifiedTime) saklanır; e-tablo o zamandan beri başka yerden (elle veya
+    başka bir makineden) değiştirildiyse kopya yok sayılır ve tam yazım yapılır. full=True tam yazımı zorlar.
+    """
+    def __init__(self, spreadsheet, state_dir=None, transport=None, progress_callback=None):
+        self.spreadsheet = spreadsheet
+        self.state_dir = state_dir or SHEETS_STATE_DIR
+        self.state_path = os.path.join(self.state_dir, f"{spreadsheet.id}.json.gz")
+        self.transport = transport or SheetsTransport(spreadsheet, progress_callback=progress_callback)
+
+    def _load_state(self):
+        """Kaydedilmiş durum: {'modified_time': ..., 'sheets': {sheetId: {'title', 'values'}}}; yoksa boş sözlük."""
+        try:
+            with gzip.open(self.state_path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _modified_time(self):
+        try:
+            return self.spreadsheet.get_lastUpdateTime()
+        except Exception as e:
+            logging.warning(f"E-Tablo '{self.spreadsheet.title}' değişiklik zamanı okunamadı: {e}")
+            return None
+
+    def _load_sheet_states(self):
+        """Yerel kopyayı, yalnızca e-tablo son yazımdan beri değişmediyse döndürür; aksi halde boş sözlük."""
+        state = self._load_state()
+        if not state.get('sheets'):
+            return {}
+        modified_time = self._modified_time()
+        if modified_time is None or modified_time != state.get('modified_time'):
+            logging.info(f"E-Tablo '{self.spreadsheet.title}' son yazımdan sonra değişmiş, sayfalar tamamen yazılacak.")
+            return {}
+        return state['sheets']
+
+    def _save_state(self, state):
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _prepare_sheets(self, shapes):
+        """Eksik sayfaları oluşturur, boyutu değişenleri yeniden boyutlandırır: {sayfa adı: sheetId}."""
+        metadata = self.transport.fetch_sheet_metadata(params={'fields': 'sheets.properties'})
+        sheets = {s['properties']['title']: s['properties'] for s in metadata.get('sheets', [])}
+        requests = []
+        for title, (rows, cols) in shapes.items():
+            grid = {'rowCount': rows, 'columnCount': cols}
+            properties = sheets.get(title)
+            if properties is None:
+                requests.append({'addSheet': {'properties': {'title': title, 'gridProperties': grid}}})
+            elif (properties.get('gridProperties', {}).get('rowCount'), properties.get('gridProperties', {}).get('columnCount')) != (rows, cols):
+                requests.append({'updateSheetProperties': {
+                    'properties': {'sheetId': properties['sheetId'], 'gridProperties': grid},
+                    'fields': 'gridProperties(rowCount,columnCount)',
+                }})
+        if requests:
+            response = self.transport.batch_update({'requests': requests})
+            for reply in response.get('replies', []):
+                if 'addSheet' in reply:
+                    properties = reply['addSheet']['properties']
+                    sheets[properties['title']] = properties
+                    logging.info(f"E-Tablo '{self.spreadsheet.title}': '{properties['title']}' sayfası oluşturuldu.")
+        return {title: sheets[title]['sheetId'] for title in shapes}
+
+    def write(self, frames, allow_formulas=False, full=False):
+        """
+        frames: {sayfa adı: DataFrame}. Dönen değer: {sayfa adı: yazılan hücre sayısı}.
+        """
+        state = {} if full else self._load_sheet_states()
+        values_by_title = {title: frame_values(df, allow_formulas) for title, df in frames.items()}
+        sheet_ids = self._prepare_sheets({
+            title: (max(len(values), 1), max(len(values[0]), 1)) for title, values in values_by_title.items()
+        })
+
+        blocks, written, new_state = [], {}, dict(state)
+        for title, values in values_by_title.items():
+            sheet_id = str(sheet_ids[title])
+            previous = state.get(sheet_id)
+            ranges = changed_ranges(previous['values'] if previous else None, values)
+            for first_row, first_col, last_row, last_col in ranges:
+                blocks.append((title, first_row, first_col, [row[first_col - 1:last_col] for row in values[first_row - 1:last_row]]))
+            written[title] = sum((r[2] - r[0] + 1) * (r[3] - r[1] + 1) for r in ranges)
+            new_state[sheet_id] = {'title': title, 'values': values}
+
+        requests = self.transport.write_values(blocks)
+        # Bir sonraki yazımda dışarıdan yapılan değişiklikleri fark etmek için yazım sonrası zaman saklanır
+        self._save_state({'modified_time': self._modified_time(), 'sheets': new_state})
+        logging.info(f"E-Tablo '{self.spreadsheet.title}': {len(blocks)} aralık, {sum(written.values())} hücre, {requests} istekte yazıldı {written}")
+        return written
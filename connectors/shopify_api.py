@@ -4,10 +4,25 @@ import requests
 import time
 import json
 import logging
+import os
+import threading
 from datetime import datetime, timedelta
 
+import sync_metrics
+
 class ShopifyAPI:
     """Shopify Admin API ile iletişimi yöneten sınıf."""
+    # Shopify GraphQL maliyet kovası (standart plan varsayılanları)
+    GRAPHQL_BUCKET_SIZE = 1000
+    GRAPHQL_RESTORE_RATE = 50  # saniyede geri dolan puan
+    # Maliyeti önceden ayrılmamış GraphQL isteklerinin ortak bütçeden düşülen tahmini puanı
+    GRAPHQL_DEFAULT_COST = 10
+    # nodes(ids:) okumalarında sorgu başına tahmini maliyet üst sınırı ve Shopify'ın ID sınırı
+    NODES_MAX_QUERY_COST = 900
+    NODES_MAX_IDS = 250
+    # Toplu medya okumasında ürün başına istenen medya sayısı
+    MEDIA_PER_PRODUCT = 50
+
     def __init__(self, store_url, access_token):
         if not store_url: raise ValueError("Shopify Mağaza URL'si boş olamaz.")
         if not access_token: raise ValueError("Shopify Erişim Token'ı boş olamaz.")
@@ -31,8 +46,16 @@ class ShopifyAPI:
         self.max_requests_per_minute = 120  # Dakikada max 20 istek
         self.consecutive_throttles = 0
         self.adaptive_delay = 0.25
+        # Birden fazla süreç (shard) aynı mağazayı kullanıyorsa ortak bütçe
+        self.shared_budget = None
+        # Son GraphQL yanıtındaki maliyet kovası durumu (extensions.cost.throttleStatus)
+        self.throttle_status = None
+        self._throttle_lock = threading.Lock()
+        # wait_for_graphql_budget ile ayrılmış, yanıtı henüz gelmemiş puanlar
+        self._in_flight_points = 0.0
+        self._reservation = threading.local()
 
-    def _rate_limit_wait(self):
+    def _rate_limit_wait(self, graphql_cost=0):
         """Rate limit koruması - her API çağrısından önce çağrılır"""
         current_time = time.time()
         
@@ -49,7 +72,7 @@ class ShopifyAPI:
             wait_time = 60 - (current_time - self.window_start)
             if wait_time > 0:
                 logging.warning(f"Dakikalık rate limit aşıldı, {wait_time:.1f}s bekleniyor...")
-                time.sleep(wait_time)
+                sync_metrics.sleep(wait_time, 'shopify_minute_limit')
                 self.request_count = 0
                 self.window_start = time.time()
         
@@ -57,31 +80,93 @@ class ShopifyAPI:
         elapsed = current_time - self.last_request_time
         if elapsed < self.min_request_interval:
             wait_time = self.min_request_interval - elapsed
-            time.sleep(wait_time)
+            sync_metrics.sleep(wait_time, 'shopify_rate_limit')
 
         current_delay = self.adaptive_delay * (1 + self.consecutive_throttles * 0.5)
 
         elapsed = current_time - self.last_request_time
         if elapsed < current_delay:
             wait_time = current_delay - elapsed
-            time.sleep(wait_time)    
+            sync_metrics.sleep(wait_time, 'shopify_rate_limit')
         
+        if self.shared_budget:
+            self.shared_budget.acquire(graphql_cost)
+
         self.last_request_time = time.time()
         self.request_count += 1
 
+    def get_throttle_model(self):
+        """Süre tahminleri için mevcut hız limiti parametrelerini döndürür."""
+        return {
+            'min_request_interval': self.min_request_interval,
+            'adaptive_delay': self.adaptive_delay * (1 + self.consecutive_throttles * 0.5),
+            'max_requests_per_minute': self.max_requests_per_minute,
+            'graphql_bucket_size': self.GRAPHQL_BUCKET_SIZE,
+            'graphql_restore_rate': self.GRAPHQL_RESTORE_RATE,
+            'cache_page_size': 50,
+            'cache_page_delay': 1.0
+        }
+
+    def _record_throttle_status(self, response_data):
+        throttle = (response_data.get('extensions') or {}).get('cost', {}).get('throttleStatus')
+        if not throttle:
+            return
+        with self._throttle_lock:
+            self.throttle_status = {
+                'currently_available': float(throttle.get('currentlyAvailable', 0)),
+                'maximum_available': float(throttle.get('maximumAvailable', self.GRAPHQL_BUCKET_SIZE)),
+                'restore_rate': float(throttle.get('restoreRate', self.GRAPHQL_RESTORE_RATE)),
+                'observed_at': time.monotonic(),
+            }
+            status = self.throttle_status
+        if self.shared_budget:
+            self.shared_budget.record_throttle_status(status['currently_available'], status['maximum_available'], status['restore_rate'])
+
+    def _estimated_available_points(self):
+        status = self.throttle_status
+        if not status:
+            return float(self.GRAPHQL_BUCKET_SIZE)
+        restored = (time.monotonic() - status['observed_at']) * status['restore_rate']
+        return min(status['maximum_available'], status['currently_available'] + restored)
+
+    def wait_for_graphql_budget(self, cost):
+        """
+        Son görülen maliyet kovasına göre 'cost' puan açılana kadar bekler ve puanı ayırır.
+        Ayrılan puan, aynı thread'in bir sonraki GraphQL isteği sunucuya ulaşana kadar
+        'yolda' sayılır; böylece eşzamanlı işçiler aynı puanları harcayıp THROTTLED almaz.
+        """
+        while True:
+            with self._throttle_lock:
+                available = self._estimated_available_points() - self._in_flight_points
+                if available >= cost:
+                    self._in_flight_points += cost
+                    self._reservation.points = getattr(self._reservation, 'points', 0) + cost
+                    return
+                restore_rate = (self.throttle_status or {}).get('restore_rate', self.GRAPHQL_RESTORE_RATE)
+                wait_time = (cost - available) / restore_rate
+            sync_metrics.sleep(wait_time, 'shopify_cost_budget_wait')
+
+    def _release_graphql_reservation(self):
+        points = getattr(self._reservation, 'points', 0)
+        if points:
+            self._reservation.points = 0
+            with self._throttle_lock:
+                self._in_flight_points = max(0.0, self._in_flight_points - points)
+
     def _make_request(self, method, url, data=None, is_graphql=False, headers=None, files=None):
-        # Rate limit koruması
-        self._rate_limit_wait()
+        # Rate limit koruması; ortak bütçeden GraphQL isteğinin ayrılmış (yoksa tahmini) maliyeti de düşülür
+        self._rate_limit_wait((getattr(self._reservation, 'points', 0) or self.GRAPHQL_DEFAULT_COST) if is_graphql else 0)
         
         req_headers = headers if headers is not None else self.headers
         try:
             if not is_graphql and not url.startswith('http'):
                  url = f"{self.store_url}/admin/api/2024-04/{url}"
             
-            response = requests.request(method, url, headers=req_headers, 
-                                        json=data if isinstance(data, dict) else None, 
-                                        data=data if isinstance(data, bytes) else None,
-                                        files=files, timeout=90)
+            with sync_metrics.span('shopify.graphql' if is_graphql else 'shopify.rest'):
+                response = requests.request(method, url, headers=req_headers, 
+                                            json=data if isinstance(data, dict) else None, 
+                                            data=data if isinstance(data, bytes) else None,
+                                            files=files, timeout=90)
             response.raise_for_status()
             if response.content and 'application/json' in response.headers.get('Content-Type', ''):
                 return response.json()
@@ -102,7 +187,11 @@ class ShopifyAPI:
 
         for attempt in range(max_retries):
             try:
-                response_data = self._make_request('POST', self.graphql_url, data=payload, is_graphql=True)
+                try:
+                    response_data = self._make_request('POST', self.graphql_url, data=payload, is_graphql=True)
+                finally:
+                    self._release_graphql_reservation()
+                self._record_throttle_status(response_data)
                 
                 if "errors" in response_data:
                     is_throttled = any(
@@ -112,12 +201,14 @@ class ShopifyAPI:
                     
                     if is_throttled and attempt < max_retries - 1:
                         # Throttle algılandı, adaptif delay'i artır
+                        sync_metrics.increment('shopify.graphql_throttled')
+                        sync_metrics.increment('shopify.retries')
                         self.consecutive_throttles += 1
                         self.adaptive_delay = min(2.0, self.adaptive_delay * 1.5)  # Max 2 saniye
                         
                         wait_time = 1.0 * (1.5 ** attempt)  # Daha hızlı exponential backoff
                         logging.warning(f"GraphQL Throttled! {wait_time:.1f}s bekleniyor... (Deneme {attempt + 1}/{max_retries})")
-                        time.sleep(wait_time)
+                        sync_metrics.sleep(wait_time, 'shopify_graphql_throttle_backoff')
                         continue
                     
                     error_messages = [err.get('message', 'Bilinmeyen GraphQL hatası') for err in response_data["errors"]]
@@ -135,7 +226,9 @@ class ShopifyAPI:
                 if e.response and e.response.status_code == 429 and attempt < max_retries - 1:
                     wait_time = retry_delay * (2 ** attempt)
                     logging.warning(f"HTTP 429 Rate Limit! {wait_time} saniye beklenip tekrar denenecek...")
-                    time.sleep(wait_time)
+                    sync_metrics.increment('shopify.http_429')
+                    sync_metrics.increment('shopify.retries')
+                    sync_metrics.sleep(wait_time, 'shopify_http_429_backoff')
                     continue
                 else:
                     logging.error(f"API bağlantı hatası: {e}")
@@ -171,6 +264,54 @@ class ShopifyAPI:
         return all_collections
 
     def get_all_products_for_export(self, progress_callback=None):
+        """
+        Rapor sayfası için tüm ürünleri (koleksiyonlar, öne çıkan görsel, varyantlar) tek bir toplu sorguyla okur.
+        Sayfalı sorgudaki variants(first: 100) / collections(first: 20) sınırları yoktur. Dönen ürünler
+        sayfalı sorguyla aynı biçimdedir ({'variants': {'edges': [{'node': ...}]}, 'collections': ...}).
+        Toplu sorgu başlatılamazsa (ör. başka bir toplu sorgu çalışıyorsa) sayfalı sorguya dönülür.
+        progress_callback metin mesajı alır.
+        """
+        query = """
+        {
+          products {
+            edges {
+              node {
+                id title handle
+                featuredImage { url }
+                collections { edges { node { id title } } }
+                variants {
+                  edges {
+                    node {
+                      id sku displayName inventoryQuantity
+                      selectedOptions { name value }
+                      inventoryItem { unitCost { amount } }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+        """
+        try:
+            records = self.run_bulk_query(
+                query, progress_callback=(lambda update: progress_callback(update['message'])) if progress_callback else None
+            )
+        except Exception as e:
+            logging.warning(f"Export toplu sorgusu çalıştırılamadı, sayfalı sorguya dönülüyor: {e}")
+            return self._get_all_products_for_export_paged(progress_callback)
+
+        all_products = []
+        for record in records:
+            product = {k: v for k, v in record.items() if k != '__children'}
+            product['variants'] = {'edges': [{'node': v} for v in bulk_children(record, 'ProductVariant')]}
+            product['collections'] = {'edges': [{'node': c} for c in bulk_children(record, 'Collection')]}
+            all_products.append(product)
+        logging.info(f"Export için toplam {len(all_products)} ürün toplu sorguyla çekildi.")
+        return all_products
+
+    def _get_all_products_for_export_paged(self, progress_callback=None):
+        """Sayfalı (25'er ürün) export sorgusu; toplu sorgu kullanılamadığında yedek yol."""
         all_products = []
         query = """
         query getProductsForExport($cursor: String) {
@@ -211,6 +352,122 @@ class ShopifyAPI:
         logging.info(f"Export için toplam {len(all_products)} ürün çekildi.")
         return all_products
 
+    def run_bulk_query(self, query, initial_poll_interval=1.0, max_poll_interval=10.0, timeout=3600, progress_callback=None):
+        """
+        Sorguyu bulkOperationRunQuery ile arka planda çalıştırır, tamamlanana kadar artan aralıklarla
+        yoklar ve JSONL sonucunu indirir. İç içe bağlantılardaki kayıtlar (__parentId) üst kaydın
+        '__children' listesine eklenir; üst seviye kayıtların listesi döner.
+        """
+        mutation = """
+        mutation bulkRun($query: String!) {
+          bulkOperationRunQuery(query: $query) {
+            bulkOperation { id status }
+            userErrors { field message }
+          }
+        }
+        """
+        result = self.execute_graphql(mutation, {"query": query}).get("bulkOperationRunQuery", {})
+        if errors := result.get("userErrors"):
+            raise Exception(f"Toplu sorgu başlatılamadı: {errors}")
+        operation_id = (result.get('bulkOperation') or {}).get('id')
+        logging.info(f"Toplu sorgu başlatıldı: {operation_id}")
+
+        operation = self._wait_for_bulk_operation(operation_id, "QUERY", initial_poll_interval, max_poll_interval, timeout, progress_callback)
+        if not operation.get("url"):
+            logging.info("Toplu sorgu sonuç döndürmedi (0 nesne).")
+            return []
+        # Sonuç dosyası bellekte tek metin olarak tutulmadan satır satır ayrıştırılır
+        with sync_metrics.span('shopify.bulk_download'), requests.get(operation["url"], stream=True, timeout=300) as response:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            records = parse_bulk_jsonl(response.iter_lines(decode_unicode=True))
+        logging.info(f"Toplu sorgu tamamlandı: {operation.get('objectCount')} nesne, {len(records)} üst seviye kayıt.")
+        return records
+
+    def run_bulk_mutation(self, mutation, variables_path, initial_poll_interval=2.0, max_poll_interval=15.0, timeout=3600, progress_callback=None):
+        """
+        variables_path'teki JSONL dosyasını (satır başına bir mutasyon değişkeni) staged upload ile yükler,
+        bulkOperationRunMutation'ı başlatır ve tamamlanınca sonuç JSONL'ını indirir.
+        Dönen liste, girdi satır sırasına göre her satırın yanıtıdır ({'data': ..., '__lineNumber': n}).
+        """
+        staged_mutation = """
+        mutation stagedUploadsCreate($input: [StagedUploadInput!]!) {
+          stagedUploadsCreate(input: $input) {
+            stagedTargets { url resourceUrl parameters { name value } }
+            userErrors { field message }
+          }
+        }
+        """
+        staged_input = {"input": [{"resource": "BULK_MUTATION_VARIABLES", "filename": os.path.basename(variables_path),
+                                   "mimeType": "text/jsonl", "httpMethod": "POST"}]}
+        staged = self.execute_graphql(staged_mutation, staged_input).get("stagedUploadsCreate") or {}
+        if not staged.get("stagedTargets"):
+            raise Exception(f"Staged upload hedefi alınamadı: {staged.get('userErrors')}")
+        target = staged["stagedTargets"][0]
+        form_data = {param['name']: param['value'] for param in target['parameters']}
+        # bulkOperationRunMutation, yüklenen dosyanın 'key' parametresindeki yolunu bekler
+        staged_upload_path = form_data.get('key') or target.get('resourceUrl')
+
+        with sync_metrics.span('shopify.staged_upload'), open(variables_path, 'rb') as f:
+            upload_response = requests.post(target['url'], data=form_data,
+                                            files={'file': (os.path.basename(variables_path), f, 'text/jsonl')}, timeout=300)
+        upload_response.raise_for_status()
+
+        run_mutation = """
+        mutation bulkRunMutation($mutation: String!, $stagedUploadPath: String!) {
+          bulkOperationRunMutation(mutation: $mutation, stagedUploadPath: $stagedUploadPath) {
+            bulkOperation { id status }
+            userErrors { field message }
+          }
+        }
+        """
+        result = self.execute_graphql(run_mutation, {"mutation": mutation, "stagedUploadPath": staged_upload_path}).get("bulkOperationRunMutation", {})
+        if errors := result.get("userErrors"):
+            raise Exception(f"Toplu mutasyon başlatılamadı: {errors}")
+        operation_id = (result.get('bulkOperation') or {}).get('id')
+        logging.info(f"Toplu mutasyon başlatıldı: {operation_id}")
+
+        operation = self._wait_for_bulk_operation(operation_id, "MUTATION", initial_poll_interval, max_poll_interval, timeout, progress_callback)
+        result_url = operation.get("url") or operation.get("partialDataUrl")
+        if not result_url:
+            return []
+        with sync_metrics.span('shopify.bulk_download'):
+            response = requests.get(result_url, timeout=300)
+        response.raise_for_status()
+        lines = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+        return sorted(lines, key=lambda line: line.get('__lineNumber', 0))
+
+    def _wait_for_bulk_operation(self, operation_id, operation_type, initial_poll_interval, max_poll_interval, timeout, progress_callback=None):
+        """
+        Başlatılan toplu işlemi node(id:) ile artan aralıklarla yoklar; tamamlanan işlemi döndürür, başarısızsa hata fırlatır.
+        currentBulkOperation yerine kimlikle yoklanır: arada başka bir süreç (ör. haftalık medya senkronizasyonu)
+        yeni bir toplu işlem başlatırsa onun sonucu bizimki sanılmaz.
+        """
+        label = "toplu sorgu" if operation_type == "QUERY" else "toplu mutasyon"
+        if not operation_id:
+            raise Exception(f"Shopify {label} işlem kimliği dönmedi")
+        status_query = """
+        query bulkOperationStatus($id: ID!) {
+          node(id: $id) { ... on BulkOperation { id status errorCode objectCount url partialDataUrl } }
+        }
+        """
+        start, delay = time.monotonic(), initial_poll_interval
+        while True:
+            sync_metrics.sleep(delay, 'shopify_bulk_poll')
+            operation = self.execute_graphql(status_query, {"id": operation_id}).get("node")
+            if not operation or operation.get("id") != operation_id:
+                raise Exception(f"Shopify {label} işlemi bulunamadı ({operation_id})")
+            status = operation.get("status")
+            if progress_callback:
+                progress_callback({'message': f"Shopify {label}: {status} ({operation.get('objectCount', 0)} nesne)"})
+            if status == "COMPLETED":
+                return operation
+            if status in ("FAILED", "CANCELED", "EXPIRED"):
+                raise Exception(f"Shopify {label} {status} durumunda bitti (Hata kodu: {operation.get('errorCode')})")
+            if time.monotonic() - start > timeout:
+                raise Exception(f"Shopify {label} {timeout}s içinde tamamlanmadı (Son durum: {status})")
+            delay = min(max_poll_interval, delay * 1.5)
+
     def get_variant_ids_by_skus(self, skus: list, search_by_product_sku=False) -> dict:
         """
         RATE LIMIT KORUMASIZ GELIŞTIRILMIŞ VERSİYON
@@ -268,17 +525,53 @@ class ShopifyAPI:
                 # KRITIK: Her batch sonrası uzun bekleme
                 if i + batch_size < len(sanitized_skus):
                     logging.info(f"Batch {i//batch_size+1} tamamlandı, rate limit için 3 saniye bekleniyor...")
-                    time.sleep(1.5)
+                    sync_metrics.sleep(1.5, 'shopify_sku_batch_delay')
             
             except Exception as e:
                 logging.error(f"SKU grubu {i//batch_size+1} için varyant ID'leri alınırken hata: {e}")
                 # Hata durumunda da biraz bekle
-                time.sleep(3)
+                sync_metrics.sleep(3, 'shopify_sku_error_delay')
                 raise e
 
         logging.info(f"Toplam {len(sku_map)} eşleşen varyant detayı bulundu.")
         return sku_map
 
+    @classmethod
+    def nodes_chunk_size(cls, cost_per_node, max_query_cost=NODES_MAX_QUERY_COST):
+        """get_nodes'un tek sorguda okuduğu ID sayısı: tahmini maliyet max_query_cost'u ve NODES_MAX_IDS'i aşmaz."""
+        return max(1, min(cls.NODES_MAX_IDS, int(max_query_cost // max(1, cost_per_node))))
+
+    @staticmethod
+    def media_node_cost(media_per_product=MEDIA_PER_PRODUCT):
+        """Bir ürünün medya okumasının tahmini maliyeti: her medya bir puan, ürün ve bağlantı iki puan."""
+        return media_per_product + 2
+
+    @classmethod
+    def media_read_batch_size(cls, media_per_product=MEDIA_PER_PRODUCT, max_query_cost=NODES_MAX_QUERY_COST):
+        """get_products_media_details'in tek sorguda okuduğu ürün sayısı."""
+        return cls.nodes_chunk_size(cls.media_node_cost(media_per_product), max_query_cost)
+
+    def get_nodes(self, ids, fields, cost_per_node=1, max_query_cost=NODES_MAX_QUERY_COST):
+        """
+        nodes(ids:) ile birden fazla nesneyi okur; sorgular nodes_chunk_size'a göre tahmini maliyeti
+        max_query_cost'u aşmayacak (ve Shopify'ın ID sınırına uyacak) parçalara bölünür.
+        Dönen sözlük: {gid: node veya None (silinmiş / bulunamayan)}
+        """
+        ids = list(dict.fromkeys(ids))
+        chunk_size = self.nodes_chunk_size(cost_per_node, max_query_cost)
+        query = f"query getNodes($ids: [ID!]!) {{ nodes(ids: $ids) {{ id {fields} }} }}"
+        nodes_by_id = {}
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            nodes = self.execute_graphql(query, {"ids": chunk}).get("nodes") or []
+            for gid, node in zip(chunk, nodes + [None] * (len(chunk) - len(nodes))):
+                nodes_by_id[gid] = node
+        return nodes_by_id
+
+    @staticmethod
+    def _media_detail(node):
+        return {'id': node['id'], 'alt': node.get('alt'), 'originalSrc': (node.get('image') or {}).get('originalSrc')}
+
     def get_product_media_details(self, product_gid):
         try:
             query = """
@@ -292,13 +585,34 @@ class ShopifyAPI:
             """
             result = self.execute_graphql(query, {"id": product_gid})
             media_edges = result.get("product", {}).get("media", {}).get("edges", [])
-            media_details = [{'id': n['id'], 'alt': n.get('alt'), 'originalSrc': n.get('image', {}).get('originalSrc')} for n in [e.get('node') for e in media_edges] if n]
+            media_details = [self._media_detail(n) for n in [e.get('node') for e in media_edges] if n]
             logging.info(f"Ürün {product_gid} için {len(media_details)} mevcut medya bulundu.")
             return media_details
         except Exception as e:
             logging.error(f"Mevcut medya detayları alınırken hata: {e}")
             return []
 
+    def get_products_media_details(self, product_gids, media_per_product=MEDIA_PER_PRODUCT, max_query_cost=NODES_MAX_QUERY_COST):
+        """
+        Birden fazla ürünün medyasını nodes(ids:) ile, sorgu başına onlarca ürün olacak şekilde okur.
+        Dönen sözlük {product_gid: [medya]} get_product_media_details ile aynı biçimdedir;
+        bulunamayan ürünler sözlükte yer almaz. media_per_product'tan fazla medyası olan ürünler tek tek okunur.
+        """
+        fields = (f"... on Product {{ media(first: {media_per_product}) {{ pageInfo {{ hasNextPage }} "
+                  f"edges {{ node {{ id alt ... on MediaImage {{ image {{ originalSrc }} }} }} }} }} }}")
+        nodes = self.get_nodes(product_gids, fields, cost_per_node=self.media_node_cost(media_per_product), max_query_cost=max_query_cost)
+        media_by_product = {}
+        for gid, node in nodes.items():
+            if not node:
+                continue
+            media = node.get('media') or {}
+            if (media.get('pageInfo') or {}).get('hasNextPage'):
+                media_by_product[gid] = self.get_product_media_details(gid)
+                continue
+            media_by_product[gid] = [self._media_detail(e['node']) for e in media.get('edges', []) if e.get('node')]
+        logging.info(f"{len(media_by_product)} ürünün medyası toplu olarak okundu.")
+        return media_by_product
+
     def get_default_location_id(self):
         if self.location_id: return self.location_id
         query = "query { locations(first: 1, query: \"status:active\") { edges { node { id } } } }"
@@ -316,7 +630,8 @@ class ShopifyAPI:
         while endpoint:
             if progress_callback: progress_callback({'message': f"Shopify ürünleri önbelleğe alınıyor... {total_loaded} ürün bulundu."})
             
-            response = requests.get(endpoint, headers=self.headers)
+            with sync_metrics.span('shopify.rest'):
+                response = requests.get(endpoint, headers=self.headers)
             response.raise_for_status()
             products = response.json().get('products', [])
             
@@ -331,7 +646,32 @@ class ShopifyAPI:
             endpoint = next((link['url'] for link in requests.utils.parse_header_links(link_header) if link.get('rel') == 'next'), None)
             
             # REST API için de rate limit koruması
-            time.sleep(1)
+            sync_metrics.sleep(1, 'shopify_cache_page_delay')
         
         logging.info(f"Shopify'dan toplam {total_loaded} ürün önbelleğe alındı.")
-        return total_loaded
\ No newline at end of file
+        return total_loaded
+
+def parse_bulk_jsonl(lines):
+    """Toplu sorgu JSONL satırlarını üst kayıtlar altında '__children' listeleriyle yeniden kurar."""
+    records, by_id = [], {}
+    for line in lines:
+        if not line.strip():
+            continue
+        obj = json.loads(line)
+        parent_id = obj.pop('__parentId', None)
+        if obj.get('id'):
+            by_id[obj['id']] = obj
+        if parent_id:
+            parent = by_id.get(parent_id)
+            if parent is None:
+                logging.warning(f"Toplu sorgu satırının üst kaydı bulunamadı: {parent_id}")
+                continue
+            parent.setdefault('__children', []).append(obj)
+        else:
+            records.append(obj)
+    return records
+
+
+def bulk_children(record, kind):
+    """Toplu sorgu kaydının belirtilen türdeki (örn. 'MediaImage', 'ProductVariant') alt kayıtlarını döndürür."""
+    return [child for child in record.get('__children', []) if f"/{kind}/" in str(child.get('id', ''))]
@@ -3,16 +3,19 @@
 import streamlit as st
 import pandas as pd
 import json
+import logging
+import os
 
 # Try-except bloğu ile gerekli tüm bağımlılıkları kontrol et
 try:
     import gspread
-    from gspread_dataframe import set_with_dataframe
     from google.oauth2.service_account import Credentials
     import gspread.exceptions
 except ImportError as e:
     st.error(f"Gerekli Google Sheets bağımlılıkları yüklenemedi. Lütfen 'requirements.txt' dosyanızı kontrol edin ve `pip install -r requirements.txt` komutunu çalıştırın. Hata: {e}")
     st.stop()
+
+from connectors.sheets_writer import SheetDiffWriter
     
 # --- Sabitler ---
 SPREADSHEET_NAME = "Vervegrand Fiyat Yönetim"
@@ -22,6 +25,10 @@ SHEET_NAMES = {
     "wholesale": "Toptan Fiyat",
     "variants": "Varyantlar"
 }
+# Okunan tabloların yerel önbelleği (data_manager.DATA_CACHE_DIR ile aynı klasör)
+GSHEETS_CACHE_DIR = os.getenv("GSHEETS_CACHE_DIR", os.path.join("data_cache", "gsheets_cache"))
+TEXT_COLUMNS = ['MODEL KODU', 'base_sku']
+NUMERIC_COLUMNS = ['ALIŞ FİYATI', 'SATIS_FIYATI_KDVSIZ', 'NIHAI_SATIS_FIYATI', 'KÂR', 'KÂR ORANI (%)']
 
 # --- Bağlantı Fonksiyonu ---
 @st.cache_resource(ttl=3600)
@@ -58,24 +65,19 @@ def save_pricing_data_to_gsheets(main_df, discount_df, wholesale_df, variants_df
             creds_dict = json.loads(st.secrets["GCP_SERVICE_ACCOUNT_JSON"])
             spreadsheet.share(creds_dict['client_email'], perm_type='user', role='writer')
 
-        data_map = {
+        frames = {
             SHEET_NAMES["main"]: main_df,
             SHEET_NAMES["discount"]: discount_df,
             SHEET_NAMES["wholesale"]: wholesale_df,
             SHEET_NAMES["variants"]: variants_df
         }
 
-        for sheet_name, df in data_map.items():
-            try:
-                worksheet = spreadsheet.worksheet(sheet_name)
-                st.info(f"'{sheet_name}' sayfası güncelleniyor...")
-            except gspread.exceptions.WorksheetNotFound:
-                st.info(f"'{sheet_name}' sayfası bulunamadı, yeni sayfa oluşturuluyor...")
-                worksheet = spreadsheet.add_worksheet(title=sheet_name, rows="1000", cols="50")
-            
-            worksheet.clear()
-            # DataFrame'i yazarken NaN değerlerini boş string ile değiştir
-            set_with_dataframe(worksheet, df.fillna(""), allow_formulas=False, resize=True)
+        # Eksik sayfalar tek istekte oluşturulur; yalnızca son kayıttan bu yana değişen hücreler gönderilir
+        st.info(f"{len(frames)} sayfa güncelleniyor: {', '.join(frames)}")
+        progress_bar = st.progress(0, text="Google E-Tablolar'a yazılıyor...")
+        progress_callback = lambda update: progress_bar.progress(update['progress'] / 100.0, text=update['message'])
+        SheetDiffWriter(spreadsheet, progress_callback=progress_callback).write(frames, allow_formulas=False)
+        progress_bar.empty()
             
         return True, spreadsheet.url
     except Exception as e:
@@ -83,41 +85,86 @@ def save_pricing_data_to_gsheets(main_df, discount_df, wholesale_df, variants_df
         return False, None
 
 # --- Veri Yükleme Fonksiyonu ---
+def _values_to_frame(values, numeric_cols=()):
+    """
+    get_values çıktısını (başlık + satırlar) sütun bazında DataFrame'e çevirir.
+    MODEL KODU ve base_sku metin, numeric_cols sayı olarak tek seferde dönüştürülür.
+    """
+    if len(values) < 2:
+        return pd.DataFrame()
+    header, rows = values[0], values[1:]
+    width = len(header)
+    rows = [row[:width] if len(row) >= width else row + [""] * (width - len(row)) for row in rows]
+    df = pd.DataFrame(dict(zip(header, (list(column) for column in zip(*rows)))), columns=header)
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            # Arrow hatası ve base_sku eşleşmesi için SKU sütunları her zaman metin
+            df[col] = [str(v) for v in df[col].tolist()]
+    for col in numeric_cols:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def _cache_path(spreadsheet_id):
+    return os.path.join(GSHEETS_CACHE_DIR, f"{spreadsheet_id}.pkl.gz")
+
+
+def _read_cached_frames(spreadsheet_id, modified_time):
+    """E-Tablo son okumadan beri değişmediyse önbellekteki (df_main, df_variants) çiftini döndürür."""
+    if not modified_time:
+        return None
+    try:
+        cached = pd.read_pickle(_cache_path(spreadsheet_id), compression='gzip')
+    except Exception:
+        return None
+    if cached.get('modified_time') != modified_time:
+        return None
+    return cached['main'], cached['variants']
+
+
+def _write_cached_frames(spreadsheet_id, modified_time, df_main, df_variants):
+    if not modified_time:
+        return
+    try:
+        os.makedirs(GSHEETS_CACHE_DIR, exist_ok=True)
+        pd.to_pickle({'modified_time': modified_time, 'main': df_main, 'variants': df_variants},
+                     _cache_path(spreadsheet_id), compression='gzip')
+    except OSError as e:
+        logging.warning(f"E-Tablo önbelleği yazılamadı: {e}")
+
+
 def load_pricing_data_from_gsheets():
-    """Google E-Tablosundan 'Ana Fiyat' ve 'Varyantlar' sayfalarını okur ve DataFrame olarak döndürür."""
+    """
+    Google E-Tablosundan 'Ana Fiyat' ve 'Varyantlar' sayfalarını okur ve DataFrame olarak döndürür.
+    Ayrıştırılmış tablolar e-tablonun Drive değişiklik zamanıyla (modifiedTime) birlikte yerelde saklanır;
+    e-tablo o zamandan beri değişmediyse yeniden indirilmez.
+    """
     try:
         client = get_gsheet_client()
         spreadsheet = client.open(SPREADSHEET_NAME)
+
+        try:
+            modified_time = spreadsheet.get_lastUpdateTime()
+        except Exception as e:
+            logging.warning(f"E-Tablo değişiklik zamanı okunamadı, önbellek kullanılmayacak: {e}")
+            modified_time = None
+
+        cached = _read_cached_frames(spreadsheet.id, modified_time)
+        if cached is not None:
+            st.info(f"'{SPREADSHEET_NAME}' son okumadan beri değişmedi, veriler yerel önbellekten yüklendi.")
+            return cached
         
         ws_main = spreadsheet.worksheet(SHEET_NAMES["main"])
         ws_variants = spreadsheet.worksheet(SHEET_NAMES["variants"])
         
         st.info(f"'{SPREADSHEET_NAME}' e-tablosundan veriler okunuyor...")
         
-        data_main = ws_main.get_all_records()
-        df_main = pd.DataFrame(data_main) if data_main else pd.DataFrame()
-        
-        data_variants = ws_variants.get_all_records()
-        df_variants = pd.DataFrame(data_variants) if data_variants else pd.DataFrame()
-
-        # --- YENİ EKLENEN KISIM BURASI ---
-        # Veri tipi tutarsızlığını ve Arrow hatasını kalıcı olarak çözmek için
-        # MODEL KODU ve base_sku sütunlarının veri tipini metin (string) olarak zorunlu kılıyoruz.
-        if not df_main.empty and 'MODEL KODU' in df_main.columns:
-            df_main['MODEL KODU'] = df_main['MODEL KODU'].astype(str)
-        
-        if not df_variants.empty and 'MODEL KODU' in df_variants.columns:
-            df_variants['MODEL KODU'] = df_variants['MODEL KODU'].astype(str)
-            if 'base_sku' in df_variants.columns:
-                df_variants['base_sku'] = df_variants['base_sku'].astype(str)
-        # --- YENİ KISIM BİTİŞ ---
-
-        # Sayısal olması gereken sütunları sayısal yap
-        numeric_cols = ['ALIŞ FİYATI', 'SATIS_FIYATI_KDVSIZ', 'NIHAI_SATIS_FIYATI', 'KÂR', 'KÂR ORANI (%)']
-        for col in numeric_cols:
-            if col in df_main.columns:
-                df_main[col] = pd.to_numeric(df_main[col], errors='coerce')
-        
+        # Biçimlendirilmemiş değerler: sayılar sayı olarak gelir, metin SKU'ların baştaki sıfırları korunur
+        df_main = _values_to_frame(ws_main.get_values(value_render_option='UNFORMATTED_VALUE'), NUMERIC_COLUMNS)
+        df_variants = _values_to_frame(ws_variants.get_values(value_render_option='UNFORMATTED_VALUE'))
+
+        _write_cached_frames(spreadsheet.id, modified_time, df_main, df_variants)
         return df_main, df_variants
         
     except gspread.exceptions.SpreadsheetNotFound:
@@ -128,4 +175,4 @@ def load_pricing_data_from_gsheets():
         return None, None
     except Exception as e:
         st.error(f"Google E-Tablolardan veri okunurken bir hata oluştu: {e}")
-        return None, None
\ No newline at end of file
+        return None, None
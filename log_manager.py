@@ -28,6 +28,10 @@ def save_log(sync_results):
         "stats": sync_results.get('stats', {}),
         "details": sync_results.get('details', [])
     }
+    # Shard'lı çalışmalarda birleştirme bilgisini de sakla
+    for key in ("duration", "shards"):
+        if sync_results.get(key):
+            log_entry[key] = sync_results[key]
     
     # Yeni kaydı listenin başına ekle
     logs.insert(0, log_entry)
@@ -41,3 +45,52 @@ def save_log(sync_results):
             json.dump(logs, f, indent=2, ensure_ascii=False)
     except IOError as e:
         print(f"Log dosyası kaydedilirken hata oluştu: {e}")
+
+def save_shard_result(path, shard, sync_mode, results):
+    """Bir shard'ın sonucunu, koordinatörün daha sonra birleştireceği dosyaya yazar."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"shard": shard, "sync_mode": sync_mode, "results": results}, f, indent=2, ensure_ascii=False)
+
+def merge_shard_results(result_files):
+    """
+    Shard sonuç dosyalarını tek bir senkronizasyon sonucu olarak birleştirir.
+    İstatistikler toplanır, detaylar birleştirilir, süre olarak en uzun shard alınır.
+    """
+    merged_stats, merged_details, shards = {}, [], []
+    longest_duration = None
+
+    for path in result_files:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                shard_result = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Shard sonuç dosyası okunamadı ({path}): {e}")
+            shards.append({"file": os.path.basename(path), "status": "missing"})
+            continue
+
+        results = shard_result.get("results") or {}
+        for key, value in results.get("stats", {}).items():
+            if isinstance(value, (int, float)):
+                merged_stats[key] = merged_stats.get(key, 0) + value
+        merged_details.extend(results.get("details", []))
+
+        duration = results.get("duration")
+        if duration and (longest_duration is None or _parse_duration(duration) > _parse_duration(longest_duration)):
+            longest_duration = duration
+        shards.append({"shard": shard_result.get("shard"), "status": results.get("status", "done"), "duration": duration})
+
+    return {"stats": merged_stats, "details": merged_details, "duration": longest_duration, "shards": shards}
+
+def _parse_duration(duration_str):
+    """str(timedelta) biçimindeki süreyi ('H:MM:SS(.ffffff)' veya 'N day(s), H:MM:SS') saniyeye çevirir."""
+    try:
+        days, clock = 0, str(duration_str)
+        if "day" in clock:
+            day_part, clock = clock.split(",", 1)
+            days = int(day_part.split()[0])
+        hours, minutes, seconds = clock.strip().split(":")
+        return days * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:
+        return 0.0
@@ -0,0 +1,177 @@
+# operations/bulk_media_sync.py (Tüm katalog için toplu medya uzlaştırması)
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import sync_metrics
+from connectors.shopify_api import bulk_children
+from operations.media_readiness import MediaReadinessPoller
+from operations.media_sync import get_current_media, find_changed_images, plan_media_changes, apply_media_plan
+
+# Tek bir bulkOperationRunQuery ile tüm ürünlerin medyası ve varyant SKU'ları okunur
+CATALOG_MEDIA_BULK_QUERY = """
+{
+  products {
+    edges {
+      node {
+        id
+        title
+        variants { edges { node { id sku } } }
+        media { edges { node { id alt ... on MediaImage { image { originalSrc } } } } }
+      }
+    }
+  }
+}
+"""
+
+# Mutasyon başına Shopify'ın istediği maliyet puanı
+MUTATION_COST = 10
+
+
+def fetch_catalog_media(shopify_api, progress_callback=None):
+    """
+    Shopify kataloğunu tek toplu sorguyla okur.
+    Dönen sözlük: {'by_sku': {sku: product_gid}, 'by_title': {başlık: product_gid}, 'media': {product_gid: [medya]}}
+    Medya listesi get_product_media_details ile aynı biçimdedir.
+    """
+    with sync_metrics.span('phase.shopify_bulk_prefetch'):
+        records = shopify_api.run_bulk_query(CATALOG_MEDIA_BULK_QUERY, progress_callback=progress_callback)
+
+    catalog = {'by_sku': {}, 'by_title': {}, 'media': {}}
+    for product in records:
+        product_gid = product['id']
+        if title := (product.get('title') or '').strip():
+            catalog['by_title'].setdefault(title, product_gid)
+        for variant in bulk_children(product, 'ProductVariant'):
+            if sku := (variant.get('sku') or '').strip():
+                catalog['by_sku'].setdefault(sku, product_gid)
+        catalog['media'][product_gid] = [
+            {'id': m['id'], 'alt': m.get('alt'), 'originalSrc': (m.get('image') or {}).get('originalSrc')}
+            for m in bulk_children(product, 'MediaImage')
+        ]
+    logging.info(f"Toplu ön okuma: {len(catalog['media'])} ürün, {len(catalog['by_sku'])} varyant SKU'su.")
+    return catalog
+
+
+def match_sentos_product(catalog, sentos_product):
+    """Sentos ürününü önce varyant/ürün SKU'su, sonra başlık ile Shopify ürününe eşler."""
+    skus = [str(v.get('sku')).strip() for v in sentos_product.get('variants', []) if v.get('sku')]
+    skus.append(str(sentos_product.get('sku', '')).strip())
+    for sku in skus:
+        if sku and sku in catalog['by_sku']:
+            return catalog['by_sku'][sku]
+    return catalog['by_title'].get((sentos_product.get('name') or '').strip())
+
+
+def fetch_sentos_image_orders(sentos_api, sentos_products, max_workers=8):
+    """Sentos görsel sıralarını eşzamanlı çeker: {sentos_product_id: [url, ...] veya None (cookie eksik)}."""
+    orders = {}
+    with sync_metrics.span('phase.sentos_image_orders'), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(sync_metrics.bind(sentos_api.get_ordered_image_urls), p.get('id')): p.get('id') for p in sentos_products}
+        for future in as_completed(futures):
+            product_id = futures[future]
+            try:
+                orders[product_id] = future.result()
+            except Exception as e:
+                logging.error(f"Sentos görsel sırası alınamadı (Ürün ID: {product_id}): {e}")
+                orders[product_id] = None
+    return orders
+
+
+def _plan_cost(plan):
+    # Ekleme, silme ve sıralama mutasyonları (sıralamadan önceki durum yoklaması hariç)
+    return MUTATION_COST * (bool(plan['urls_to_add']) + bool(plan['media_ids_to_delete']) + bool(plan['needs_reorder']))
+
+
+def run_bulk_media_sync(shopify_api, sentos_api, sentos_products, media_map=None, force_update=False,
+                        set_alt_text=True, max_workers=4, sentos_workers=8, progress_callback=None, image_cache=None,
+                        max_failures=None):
+    """
+    Katalog genelinde medya uzlaştırması:
+      1. Shopify ürünleri, varyant SKU'ları ve medyası tek toplu sorguyla okunur,
+      2. Sentos görsel sıraları eşzamanlı çekilir,
+      3. Tüm ürünlerin planı API'ye gitmeden hesaplanır (image_cache verilirse görseller önce eşzamanlı doğrulanır),
+      4. Yalnızca değişiklik gereken ürünler, GraphQL maliyet bütçesine uyan sınırlı bir işçi havuzunda uygulanır.
+    Ürün başına arama yapılmadığı için çağrı sayısı ürün sayısıyla değil değişiklik sayısıyla orantılıdır.
+    İstatistikler ürün ürün senkronizasyonla aynı anlamdadır: değişiklik gerekmeyenler 'unchanged',
+    eşleşmeyen veya cookie eksikliğiyle atlananlar 'skipped' sayılır. Başarısız ürün sayısı max_failures'ı
+    aşarsa bekleyen uygulamalar iptal edilir.
+    """
+    stats = {'total': len(sentos_products), 'processed': 0, 'success': 0, 'failed': 0, 'skipped': 0, 'unchanged': 0}
+    details = []
+
+    catalog = fetch_catalog_media(shopify_api, progress_callback)
+    matched = []
+    for sentos_product in sentos_products:
+        product_gid = match_sentos_product(catalog, sentos_product)
+        if product_gid:
+            matched.append((sentos_product, product_gid))
+        else:
+            logging.warning(f"Ürün Shopify'da bulunamadı: {sentos_product.get('sku', 'N/A')}")
+            stats['skipped'] += 1
+    logging.info(f"{len(matched)}/{len(sentos_products)} Sentos ürünü Shopify ile eşleşti.")
+
+    image_orders = fetch_sentos_image_orders(sentos_api, [p for p, _ in matched], sentos_workers)
+
+    if image_cache is not None:
+        with sync_metrics.span('phase.image_revalidation'):
+            image_cache.check_many([url for urls in image_orders.values() if urls for url in urls], sentos_workers)
+
+    plans = []
+    with sync_metrics.span('phase.media_plan'):
+        for sentos_product, product_gid in matched:
+            sentos_ordered_urls = image_orders.get(sentos_product.get('id'))
+            if sentos_ordered_urls is None:
+                logging.warning(f"Cookie eksikliği nedeniyle medya sync atlandı - Ürün ID: {sentos_product.get('id')}")
+                stats['skipped'] += 1
+                continue
+            current = get_current_media(shopify_api, product_gid, sentos_ordered_urls, media_map, force_update,
+                                        shopify_media=catalog['media'].get(product_gid, []))
+            changed_urls = find_changed_images(product_gid, current, sentos_ordered_urls, image_cache, media_map)
+            plan = plan_media_changes(current, sentos_ordered_urls, changed_urls)
+            if plan['urls_to_add'] or plan['media_ids_to_delete'] or plan['needs_reorder']:
+                plans.append((sentos_product, product_gid, plan))
+            else:
+                stats['unchanged'] += 1
+                stats['processed'] += 1
+    logging.info(f"Medya planı hazır: {len(plans)} üründe değişiklik gerekiyor.")
+
+    stats_lock = threading.Lock()
+
+    def apply_one(sentos_product, product_gid, plan):
+        shopify_api.wait_for_graphql_budget(_plan_cost(plan))
+        with sync_metrics.span('op.media'):
+            return apply_media_plan(shopify_api, product_gid, plan, sentos_product.get('name', '').strip(),
+                                    set_alt_text, readiness_poller, media_map, image_cache)
+
+    readiness_poller = MediaReadinessPoller(shopify_api)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(sync_metrics.bind(apply_one), *item): item[0] for item in plans}
+            for future in as_completed(futures):
+                sku = futures[future].get('sku', 'N/A')
+                try:
+                    changes = future.result()
+                    failed = any(str(c).startswith('Hata') for c in changes)
+                    with stats_lock:
+                        stats['failed' if failed else 'success'] += 1
+                        stats['processed'] += 1
+                    details.append({'sku': sku, 'changes': changes})
+                    logging.info(f"{'❌' if failed else '✅'} {sku}: {', '.join(changes)}")
+                except Exception as e:
+                    with stats_lock:
+                        stats['failed'] += 1
+                    details.append({'sku': sku, 'changes': [f"Hata: {e}"]})
+                    logging.error(f"❌ {sku} işlenirken hata: {e}")
+                if progress_callback:
+                    progress_callback({'message': f"Medya uygulanıyor: {len(details)}/{len(plans)}"})
+                if max_failures is not None and stats['failed'] > max_failures:
+                    logging.error("Çok fazla hata oluştu, işlem durduruluyor")
+                    for pending in futures:
+                        pending.cancel()
+                    break
+    finally:
+        with sync_metrics.span('phase.media_reorder_drain'):
+            readiness_poller.close()
+    return stats, details
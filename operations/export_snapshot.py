@@ -0,0 +1,360 @@
+# operations/export_snapshot.py (Rapor sayfası için süreç genelinde paylaşılan katalog + alış fiyatı anlık görüntüsü)
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import sync_metrics
+
+
+# Anlık görüntü bu süreden eskiyse rapor eski veriyle hemen üretilir, arka planda yenilenir
+EXPORT_SNAPSHOT_MAX_AGE = int(os.getenv("EXPORT_SNAPSHOT_MAX_AGE", "600"))
+# Sentos alış fiyatı araması: paralel işçi, ortak hız sınırı, kod başına önbellek süresi ve
+# tek tek arama yerine tüm kataloğun çekileceği kod sayısı
+SENTOS_LOOKUP_WORKERS = int(os.getenv("SENTOS_LOOKUP_WORKERS", "4"))
+SENTOS_REQUESTS_PER_SECOND = float(os.getenv("SENTOS_REQUESTS_PER_SECOND", "5"))
+SENTOS_PRICE_CACHE_TTL = int(os.getenv("SENTOS_PRICE_CACHE_TTL", "3600"))
+SENTOS_FULL_CATALOG_THRESHOLD = int(os.getenv("SENTOS_FULL_CATALOG_THRESHOLD", "500"))
+
+
+def _get_apparel_sort_key(size_str):
+    if not isinstance(size_str, str): return (3, 9999, size_str)
+    size_upper = size_str.strip().upper()
+    size_order_map = {'XXS': 0, 'XS': 1, 'S': 2, 'M': 3, 'L': 4, 'XL': 5, 'XXL': 6, '2XL': 6, '3XL': 7, 'XXXL': 7, '4XL': 8, 'XXXXL': 8, '5XL': 9, 'XXXXXL': 9, 'TEK EBAT': 100, 'STANDART': 100}
+    if size_upper in size_order_map: return (1, size_order_map[size_upper], size_str)
+    numbers = re.findall(r'\d+', size_str)
+    if numbers: return (2, int(numbers[0]), size_str)
+    return (3, 9999, size_str)
+
+
+def get_base_code_from_skus(variant_skus):
+    """
+    Bir ürüne ait tüm varyant SKU'larının listesini alarak ana model kodunu bulur.
+    """
+    skus = [s for s in variant_skus if s and isinstance(s, str)]
+    if not skus: return ""
+    if len(skus) == 1:
+        last_hyphen_index = skus[0].rfind('-')
+        if last_hyphen_index > 0: return skus[0][:last_hyphen_index]
+        return skus[0]
+    common_prefix = os.path.commonprefix(skus)
+    if common_prefix and not common_prefix.endswith('-') and common_prefix not in skus:
+        last_hyphen_index = common_prefix.rfind('-')
+        if last_hyphen_index > 0: return common_prefix[:last_hyphen_index]
+    return common_prefix.strip('-')
+
+
+def _product_base_code(product):
+    variants = product.get('variants', {}).get('edges', [])
+    return get_base_code_from_skus([v['node']['sku'] for v in variants if v['node'] and v['node'].get('sku')])
+
+
+def _purchase_info(sentos_product, code):
+    """Sentos ürününden {'verified_code', 'purchase_price'}: ana fiyat yoksa ilk pozitif varyant fiyatı."""
+    price = None
+    main_price = sentos_product.get('purchase_price')
+
+    if main_price and float(str(main_price).replace(',', '.')) > 0:
+        price = main_price
+    else:
+        variants = sentos_product.get('variants', [])
+        if variants:
+            for variant in variants:
+                variant_price = variant.get('purchase_price')
+                if variant_price and float(str(variant_price).replace(',', '.')) > 0:
+                    price = variant_price
+                    break
+
+    return {
+        'verified_code': sentos_product.get('sku', code),
+        'purchase_price': float(str(price).replace(',', '.')) if price is not None else None
+    }
+
+
+class _PriceCache:
+    """Model kodu başına Sentos sonucu (bulunamadı dahil) ttl saniye boyunca tutulur; tüm oturumlar paylaşır."""
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, codes, max_age=None):
+        """({kod: bilgi veya None}, önbellekte olmayan kodlar); max_age verilirse ttl'den kısa olduğunda o geçerlidir."""
+        now = time.time()
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        found, missing = {}, []
+        with self._lock:
+            for code in codes:
+                entry = self._entries.get(code)
+                if entry and now - entry[0] < ttl:
+                    found[code] = entry[1]
+                else:
+                    missing.append(code)
+        return found, missing
+
+    def put(self, code, info):
+        with self._lock:
+            self._entries[code] = (time.time(), info)
+
+
+class _IntervalLimiter:
+    """İstekler arasında sabit bir asgari aralık bırakan, iş parçacıkları arasında paylaşılan sınırlayıcı."""
+
+    def __init__(self, requests_per_second):
+        self.min_interval = 1.0 / requests_per_second
+        self._lock = threading.Lock()
+        self._last_request_time = 0.0
+
+    def wait(self):
+        with self._lock:
+            elapsed = time.time() - self._last_request_time
+            if elapsed < self.min_interval:
+                sync_metrics.sleep(self.min_interval - elapsed, 'sentos_rate_limit_wait')
+            self._last_request_time = time.time()
+
+
+_PRICE_CACHE = _PriceCache(SENTOS_PRICE_CACHE_TTL)
+# Tüm arama işçileri (ve oturumlar) Sentos'a tek bir hız sınırı altında gider
+_SENTOS_LIMITER = _IntervalLimiter(SENTOS_REQUESTS_PER_SECOND)
+
+
+def _lookup_code(sentos_api, code):
+    _SENTOS_LIMITER.wait()
+    sentos_product = sentos_api.get_product_by_sku(code)
+    return _purchase_info(sentos_product, code) if sentos_product else None
+
+
+def _lookup_from_full_catalog(sentos_api, codes, progress_callback=None):
+    """
+    Çok sayıda kod için tek tek arama yerine tüm Sentos kataloğunu sayfa sayfa çeker ve SKU ile eşler.
+    Eşleşme yalnızca ürün SKU'sunun (baştaki/sondaki boşluklar kırpılarak) birebir aynı olmasıyla yapılır.
+    Tek tek arama ise Sentos'un /products?sku= sunucu araması ile yapılır ve ilk sonucu alır; bu arama
+    daha gevşek eşleşiyorsa (ör. varyant SKU'su veya kısmi eşleşme) o yolda bulunan bazı kodlar burada bulunamaz;
+    bu yüzden katalogda bulunamayan kodlar önbelleğe yazılmaz, (bulunan sonuçlar, bulunamayan kodlar) olarak
+    döndürülür ve çağıran tarafından tek tek aranır.
+    """
+    products = sentos_api.get_all_products(progress_callback=progress_callback)
+    by_sku = {}
+    for product in products:
+        if product.get('sku'):
+            by_sku.setdefault(str(product['sku']).strip(), product)
+    results, not_found = {}, []
+    for code in codes:
+        product = by_sku.get(code.strip())
+        if product:
+            results[code] = _purchase_info(product, code)
+            _PRICE_CACHE.put(code, results[code])
+        else:
+            not_found.append(code)
+    return results, not_found
+
+
+def get_sentos_data_by_base_code(sentos_api, model_codes_to_fetch, progress_callback=None,
+                                 max_workers=SENTOS_LOOKUP_WORKERS, full_catalog_threshold=SENTOS_FULL_CATALOG_THRESHOLD,
+                                 cache_max_age=None):
+    """
+    Verilen ANA ürün kodları listesini kullanarak Sentos'tan alış fiyatı ve doğrulanmış ana kod bilgisini çeker.
+    Kodlar tekilleştirilir ve önbellekte (SENTOS_PRICE_CACHE_TTL, cache_max_age daha kısaysa o; 0 önbelleği
+    atlar) olanlar yeniden sorulmaz; kalanlar
+    paylaşılan hız sınırı altında max_workers paralel işçiyle aranır. Aranacak kod sayısı
+    full_catalog_threshold'u aşarsa önce tüm katalog çekilir, katalogda bulunamayanlar yine tek tek aranır.
+    Streamlit'e bağımlı değildir; ilerleme progress_callback({'progress': yüzde, 'message': ...}) ile bildirilir.
+    """
+    unique_model_codes = [code for code in dict.fromkeys(model_codes_to_fetch) if code]
+    if not unique_model_codes:
+        return {}
+
+    results, missing = _PRICE_CACHE.get_many(unique_model_codes, cache_max_age)
+    logging.info(f"Sentos alış fiyatları: {len(results)} kod önbellekten, {len(missing)} kod aranacak.")
+    if len(missing) > full_catalog_threshold:
+        logging.info(f"{len(missing)} kod eşiği ({full_catalog_threshold}) aşıyor, Sentos kataloğu toplu çekiliyor.")
+        found, missing = _lookup_from_full_catalog(sentos_api, missing, progress_callback)
+        results.update(found)
+        logging.info(f"Katalogda bulunamayan {len(missing)} kod tek tek aranacak.")
+
+    total_codes, last_progress = len(missing), -1
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(_lookup_code, sentos_api, code): code for code in missing}
+        for done, future in enumerate(as_completed(futures), start=1):
+            code = futures[future]
+            try:
+                results[code] = future.result()
+                _PRICE_CACHE.put(code, results[code])
+            except Exception as e:
+                # Hatalı aramalar önbelleğe alınmaz, bir sonraki raporda tekrar denenir
+                logging.warning(f"Sentos'tan '{code}' SKU'su için veri çekilirken bir hata oluştu: {e}")
+            progress = int(done * 100 / total_codes)
+            if progress_callback and progress != last_progress:
+                last_progress = progress
+                progress_callback({'progress': progress,
+                                   'message': f"Sentos'tan alış fiyatları çekiliyor... ({done}/{total_codes})"})
+
+    return {code: info for code, info in results.items() if info is not None}
+
+
+class ExportCatalog:
+    """Bir anlık görüntü: Shopify ürünleri, ana model kodları ve Sentos alış fiyatları."""
+    def __init__(self, products, price_map, fetched_at):
+        self.products = products
+        self.base_codes = [_product_base_code(product) for product in products]
+        self.price_map = price_map
+        self.fetched_at = fetched_at
+
+
+def build_export_dataframe(catalog, selected_collection_ids, store_url):
+    """
+    Anlık görüntüden koleksiyon filtresine göre rapor tablosunu bellekte üretir (API çağrısı yapmaz).
+    Uygun ürün yoksa None döner.
+    """
+    processed_data, all_sizes = {}, set()
+    for product, base_model_code in zip(catalog.products, catalog.base_codes):
+        if selected_collection_ids and (
+            not product.get('collections')
+            or {c['node']['id'] for c in product['collections']['edges']}.isdisjoint(selected_collection_ids)
+        ):
+            continue
+        variants = product.get('variants', {}).get('edges', [])
+        if not variants: continue
+
+        # Ürünleri renk bazında grupla
+        variants_by_group = {}
+        has_color_option = any('renk' in opt['name'].lower() for v in variants if v.get('node', {}).get('selectedOptions') for opt in v['node']['selectedOptions'])
+        for v_edge in variants:
+            v = v_edge['node']
+            if not v or not v.get('selectedOptions'): continue
+            group_key = 'N/A'
+            if has_color_option:
+                color_option = next((opt['value'] for opt in v['selectedOptions'] if opt['name'].lower() == 'renk'), 'N/A')
+                group_key = color_option
+            if group_key not in variants_by_group: variants_by_group[group_key] = []
+            variants_by_group[group_key].append(v)
+
+        if not variants_by_group: continue
+
+        collection_names = ", ".join([c['node']['title'] for c in product.get('collections', {}).get('edges', [])])
+        # Sentos'tan gelen fiyat ve doğrulanmış model kodu
+        sentos_info = catalog.price_map.get(base_model_code)
+        purchase_price = sentos_info.get('purchase_price') if sentos_info else None
+        model_code = sentos_info.get('verified_code', base_model_code) if sentos_info else base_model_code
+
+        for group_key, group_variants in variants_by_group.items():
+            key = (product['title'], group_key)
+            image_data = product.get('featuredImage')
+            image_url = image_data.get('url', '') if image_data else ''
+
+            row = {"TÜR": collection_names, "GÖRSEL_URL": image_url, "MODEL KODU": model_code,
+                   "ÜRÜN LİNKİ": f"{store_url}/products/{product['handle']}",
+                   "RENK": group_key if has_color_option else '', "sizes": {}, "ALIŞ FİYATI": purchase_price}
+
+            total_stock = 0
+            for variant in group_variants:
+                size_value = next((opt['value'] for opt in variant['selectedOptions'] if opt['name'].lower() == 'beden'), 'N/A')
+                stock = variant.get('inventoryQuantity') or 0
+                row["sizes"][size_value] = stock
+                total_stock += stock
+                all_sizes.add(size_value)
+
+            row["TOPLAM STOK"] = total_stock
+            processed_data[key] = row
+
+    sorted_sizes = sorted(list(all_sizes), key=_get_apparel_sort_key)
+    final_rows = []
+    for data in processed_data.values():
+        new_row = {
+            "TÜR": data["TÜR"], "GÖRSEL": f'=IMAGE("{data["GÖRSEL_URL"]}")' if data["GÖRSEL_URL"] else '',
+            "MODEL KODU": data["MODEL KODU"], "ÜRÜN LİNKİ": data["ÜRÜN LİNKİ"], "RENK": data["RENK"]
+        }
+        for size in sorted_sizes: new_row[size] = data["sizes"].get(size, 0)
+        new_row["TOPLAM STOK"] = data["TOPLAM STOK"]
+        new_row["ALIŞ FİYATI"] = data["ALIŞ FİYATI"]
+        final_rows.append(new_row)
+
+    return pd.DataFrame(final_rows) if final_rows else None
+
+
+class ExportSnapshot:
+    """
+    Tüm oturumların paylaştığı katalog anlık görüntüsü (sayfada st.cache_resource ile mağaza başına bir tane).
+    İlk istekte tüm katalog ve tüm ana model kodlarının alış fiyatları bir kez çekilir; sonraki raporlar
+    ve koleksiyon filtreleri bellekteki veriden üretilir. max_age aşıldığında mevcut veri sunulmaya devam
+    eder ve tek bir arka plan thread'i anlık görüntüyü yeniler. Yenilemede alış fiyatı önbelleğinden
+    yalnızca max_age'den genç sonuçlar kullanılır; elle yenileme (force=True) önbelleği hiç kullanmaz.
+    """
+    def __init__(self, max_age=EXPORT_SNAPSHOT_MAX_AGE):
+        self.max_age = max_age
+        self.catalog = None
+        self.last_error = None
+        self._build_lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+
+    def age(self):
+        """Anlık görüntünün yaşı (saniye) veya None."""
+        return None if self.catalog is None else time.time() - self.catalog.fetched_at
+
+    def is_stale(self):
+        return self.catalog is None or self.age() > self.max_age
+
+    def is_refreshing(self):
+        return self._refresh_thread is not None and self._refresh_thread.is_alive()
+
+    def refresh(self, shopify_api, sentos_api, progress_callback=None, force=False, requested_at=None):
+        """
+        Anlık görüntüyü şimdi (çağıran thread'de) yeniden oluşturur; aynı anda tek yenileme çalışır.
+        force=True alış fiyatlarını önbelleğe bakmadan yeniden çeker. requested_at verilirse ve kilit
+        beklenirken o andan sonra bir yenileme tamamlandıysa iş tekrarlanmaz.
+        """
+        with self._build_lock:
+            if requested_at is not None and self.catalog is not None and self.catalog.fetched_at >= requested_at:
+                logging.info("Rapor anlık görüntüsü beklerken zaten yenilendi, tekrar çekilmiyor.")
+                return self.catalog
+            start = time.monotonic()
+            products = shopify_api.get_all_products_for_export(
+                progress_callback=lambda msg: progress_callback({'message': f"Shopify: {msg}"}) if progress_callback else None
+            )
+            base_codes = {_product_base_code(product) for product in products}
+            base_codes.discard("")
+            price_map = get_sentos_data_by_base_code(sentos_api, list(base_codes), progress_callback,
+                                                     cache_max_age=0 if force else self.max_age)
+            self.catalog = ExportCatalog(products, price_map, fetched_at=time.time())
+            self.last_error = None
+            logging.info(f"Rapor anlık görüntüsü yenilendi: {len(products)} ürün, {len(price_map)} alış fiyatı "
+                         f"({time.monotonic() - start:.1f}s)")
+            return self.catalog
+
+    def _refresh_quietly(self, shopify_api, sentos_api, force, requested_at):
+        try:
+            self.refresh(shopify_api, sentos_api, force=force, requested_at=requested_at)
+        except Exception as e:
+            self.last_error = str(e)
+            logging.error(f"Rapor anlık görüntüsü arka planda yenilenemedi: {e}")
+
+    def refresh_in_background(self, shopify_api, sentos_api, force=False):
+        """Çalışan bir yenileme yoksa arka planda yenilemeyi başlatır (kontrol ve başlatma tek kilit altında)."""
+        with self._refresh_lock:
+            if self.is_refreshing():
+                return False
+            self._refresh_thread = threading.Thread(target=self._refresh_quietly,
+                                                    args=(shopify_api, sentos_api, force, time.time()),
+                                                    name="ExportSnapshotRefresh", daemon=True)
+            self._refresh_thread.start()
+            return True
+
+    def get(self, shopify_api, sentos_api, progress_callback=None):
+        """
+        Hiç veri yoksa anlık görüntüyü çağıran thread'de oluşturur (ilerleme bildirilir);
+        veri eskimişse mevcut veriyi döndürür ve arka planda yenilemeyi başlatır.
+        """
+        if self.catalog is None:
+            # Başka bir oturum şu an oluşturuyorsa onun sonucunu bekle
+            with self._build_lock:
+                if self.catalog is None:
+                    return self.refresh(shopify_api, sentos_api, progress_callback)
+        if self.is_stale():
+            self.refresh_in_background(shopify_api, sentos_api)
+        return self.catalog
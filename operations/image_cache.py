@@ -0,0 +1,151 @@
+# operations/image_cache.py (Sentos görsel URL'leri için koşullu yeniden doğrulama önbelleği)
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+import sync_metrics
+
+# data_manager.DATA_CACHE_DIR ile aynı klasör (media_map.py ile aynı gerekçe)
+IMAGE_CACHE_FILE = os.getenv("IMAGE_CACHE_FILE", os.path.join("data_cache", "image_cache.json"))
+
+UNCHANGED, CHANGED, NEW, UNKNOWN = 'unchanged', 'changed', 'new', 'unknown'
+
+
+class ImageCache:
+    """
+    Görsel URL'si başına ETag, Last-Modified, boyut ve içerik hash'ini diskte tutar.
+    Aynı URL'deki görselin içeriği değişmiş mi sorusu koşullu HEAD isteğiyle (304) cevaplanır;
+    sunucu doğrulayıcı başlık vermiyorsa görsel indirilip sha256 ile karşılaştırılır.
+    Her URL bir çalışma içinde en fazla bir kez doğrulanır.
+    """
+    def __init__(self, path=None, timeout=15):
+        self.path = path or IMAGE_CACHE_FILE
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._checked = {}  # bu çalışmada doğrulanan URL -> durum
+        self._session = requests.Session()
+        self._entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('images', {})
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Görsel önbelleği okunamadı, boş başlatılıyor: {e}")
+            return {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def fingerprint(self, url):
+        """
+        Görselin içerik parmak izi: indirildiyse sha256, yoksa ETag veya Last-Modified + boyut.
+        Medya eşlemesine content_hash olarak yazılır; doğrulanmamış URL için önce 'check' çağrılır.
+        """
+        self.check(url)
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return None
+        if entry.get('content_hash'):
+            return f"sha256:{entry['content_hash']}"
+        if entry.get('etag'):
+            return f"etag:{entry['etag']}"
+        if entry.get('last_modified'):
+            return f"lm:{entry['last_modified']}|{entry.get('size')}"
+        return None
+
+    def check(self, url):
+        """URL'yi koşullu istekle doğrular: 'unchanged', 'changed', 'new' veya 'unknown' (hata) döner."""
+        with self._lock:
+            if url in self._checked:
+                return self._checked[url]
+            previous = dict(self._entries.get(url) or {})
+
+        try:
+            status = self._revalidate(url, previous)
+        except requests.RequestException as e:
+            logging.warning(f"Görsel doğrulanamadı ({url}): {e}")
+            status = UNKNOWN
+        sync_metrics.increment(f"image_cache.{status}")
+        with self._lock:
+            self._checked[url] = status
+        return status
+
+    def check_many(self, urls, max_workers=8):
+        """Birden fazla URL'yi eşzamanlı doğrular: {url: durum}."""
+        urls = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(urls, executor.map(sync_metrics.bind(self.check), urls)))
+
+    def _revalidate(self, url, previous):
+        headers = {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+        response = self._session.head(url, headers=headers, timeout=self.timeout, allow_redirects=True)
+        if response.status_code == 304:
+            self._store(url, previous)
+            return UNCHANGED
+        response.raise_for_status()
+
+        entry = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': response.headers.get('Content-Length'),
+            'content_hash': None,
+        }
+        if not entry['etag'] and not entry['last_modified']:
+            # Doğrulayıcı başlık yok: içeriği indirip karşılaştırmaktan başka yol yok
+            with sync_metrics.span('image_cache.download'):
+                body = self._session.get(url, timeout=self.timeout).content
+            entry['size'] = str(len(body))
+            entry['content_hash'] = hashlib.sha256(body).hexdigest()
+        elif previous.get('content_hash') and self._same_validators(previous, entry):
+            entry['content_hash'] = previous['content_hash']
+
+        self._store(url, entry)
+        if not previous:
+            return NEW
+        if entry['content_hash'] and previous.get('content_hash'):
+            return UNCHANGED if entry['content_hash'] == previous['content_hash'] else CHANGED
+        return UNCHANGED if self._same_validators(previous, entry) else CHANGED
+
+    @staticmethod
+    def _same_validators(old, new):
+        # Sunucu koşullu isteği yok sayıp 200 döndürse de doğrulayıcılar aynıysa içerik aynıdır
+        return (old.get('etag'), old.get('last_modified'), old.get('size')) == (new.get('etag'), new.get('last_modified'), new.get('size'))
+
+    def _store(self, url, entry):
+        with self._lock:
+            self._entries[url] = {**entry, 'checked_at': datetime.now().isoformat()}
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps({'version': 1, 'images': self._entries}, ensure_ascii=False)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+            logging.info(f"Görsel önbelleği kaydedildi: {self.path}")
+        except OSError as e:
+            logging.error(f"Görsel önbelleği kaydedilemedi: {e}")
@@ -0,0 +1,135 @@
+# operations/media_map.py (Sentos görsel URL'si -> Shopify medya ID'si kalıcı eşlemesi)
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+# data_manager.DATA_CACHE_DIR ile aynı klasör (data_manager streamlit'e bağımlı olduğu için içe aktarılmıyor)
+MEDIA_MAP_FILE = os.getenv("MEDIA_MAP_FILE", os.path.join("data_cache", "media_map.json"))
+
+
+def _url_stem(url):
+    name = os.path.basename(urlparse(url or '').path)
+    return os.path.splitext(name)[0].lower()
+
+
+def _stem_matches(shopify_src, sentos_url):
+    # Shopify CDN dosya adını korur; aynı adlı dosyada sonuna _<uuid> ekleyebilir
+    sentos_stem = _url_stem(sentos_url)
+    return bool(sentos_stem) and re.fullmatch(rf"{re.escape(sentos_stem)}(_[0-9a-f-]{{8,}})?", _url_stem(shopify_src)) is not None
+
+
+def match_shopify_media(shopify_media, sentos_urls):
+    """
+    Shopify'dan okunan medyayı Sentos URL'leriyle eşleştirir (tam URL, alt etiketi, CDN dosya adı).
+    Dönen değerler: ({sentos_url: media_id}, Shopify'daki mevcut sıra, eşleşmeyen medya ID'leri).
+    Yalnızca kaynak URL'si olan görseller (MediaImage) silinmek üzere işaretlenir; video, 3B model ve
+    hâlâ işlenen (kaynağı henüz olmayan) medyaya dokunulmaz.
+    """
+    url_to_media_id, current_order, stale_ids = {}, [], []
+    remaining = list(dict.fromkeys(sentos_urls))
+    for media in shopify_media:
+        src, alt = media.get('originalSrc'), media.get('alt')
+        match = next((url for url in remaining if url == src), None) \
+            or next((url for url in remaining if url == alt), None) \
+            or next((url for url in remaining if src and _stem_matches(src, url)), None)
+        if match:
+            url_to_media_id[match] = media['id']
+            current_order.append(match)
+            remaining.remove(match)
+        elif src:
+            stale_ids.append(media['id'])
+    return url_to_media_id, current_order, stale_ids
+
+
+class MediaMap:
+    """
+    Ürün bazında Sentos görsel URL'si (ve içerik hash'i) -> Shopify medya GID eşlemesini diskte tutar.
+    Eşleme, productCreateMedia yanıtı döndüğünde yazılır; böylece sonraki çalışmalarda medya
+    karşılaştırması Shopify'dan okuma yapmadan yapılır ve API yalnızca gerçek değişiklikler için kullanılır.
+    """
+    def __init__(self, path=None):
+        self.path = path or MEDIA_MAP_FILE
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._products = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('products', {})
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Medya eşleme dosyası okunamadı, boş başlatılıyor: {e}")
+            return {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._products)
+
+    def has_product(self, product_gid):
+        with self._lock:
+            return product_gid in self._products
+
+    def get_product(self, product_gid):
+        """{'media': {url: {'media_id', 'content_hash'}}, 'order': [url, ...]} kopyası veya None döner."""
+        with self._lock:
+            entry = self._products.get(product_gid)
+            if entry is None:
+                return None
+            return {'media': {url: dict(info) for url, info in entry['media'].items()}, 'order': list(entry.get('order', []))}
+
+    def set_product(self, product_gid, url_to_media_id, order):
+        """Ürünün eşlemesini verilen URL->medya haritasıyla değiştirir; bilinen içerik hash'leri korunur."""
+        with self._lock:
+            previous = self._products.get(product_gid, {}).get('media', {})
+            media = {}
+            for url, media_id in url_to_media_id.items():
+                old = previous.get(url, {})
+                media[url] = {'media_id': media_id, 'content_hash': old.get('content_hash') if old.get('media_id') == media_id else None}
+            self._products[product_gid] = {'media': media, 'order': list(order), 'updated_at': datetime.now().isoformat()}
+            self._dirty = True
+
+    def record_media(self, product_gid, url, media_id, content_hash=None):
+        """productCreateMedia yanıtından dönen yeni medyayı eşlemeye ekler."""
+        with self._lock:
+            entry = self._products.setdefault(product_gid, {'media': {}, 'order': []})
+            entry['media'][url] = {'media_id': media_id, 'content_hash': content_hash}
+            entry['updated_at'] = datetime.now().isoformat()
+            self._dirty = True
+
+    def set_content_hash(self, product_gid, url, content_hash):
+        """Eşlemesi bilinen ama içerik hash'i olmayan görselin hash'ini (ilk doğrulamada) kaydeder."""
+        with self._lock:
+            info = self._products.get(product_gid, {}).get('media', {}).get(url)
+            if info is not None and info.get('content_hash') != content_hash:
+                info['content_hash'] = content_hash
+                self._dirty = True
+
+    def forget_product(self, product_gid):
+        """Eşleme Shopify ile uyuşmadığında ürünü unutur; bir sonraki çalışmada API'den yeniden kurulur."""
+        with self._lock:
+            if self._products.pop(product_gid, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps({'version': 1, 'products': self._products}, ensure_ascii=False)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+            logging.info(f"Medya eşlemesi kaydedildi: {self.path}")
+        except OSError as e:
+            logging.error(f"Medya eşlemesi kaydedilemedi: {e}")
@@ -0,0 +1,180 @@
+# operations/media_readiness.py (Medya işleme durumunu sabit bekleme yerine yoklayarak takip eder)
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+import sync_metrics
+
+# Shopify medyası UPLOADED -> PROCESSING -> READY (veya FAILED) sırasıyla ilerler
+DONE_STATUSES = {'READY', 'FAILED', 'MISSING'}
+
+
+
+def fetch_media_statuses(shopify_api, media_ids, batch_size=100):
+    """
+    Birden fazla ürünün medyalarının durumunu tek nodes(ids:) sorgusuyla okur.
+    Dönen sözlük: {media_gid: status}. Silinmiş / bulunamayan medya 'MISSING' olarak işaretlenir.
+    """
+    statuses = {}
+    media_ids = list(dict.fromkeys(media_ids))
+    for i in range(0, len(media_ids), batch_size):
+        chunk = media_ids[i:i + batch_size]
+        nodes = shopify_api.get_nodes(chunk, "... on MediaImage { status }")
+        sync_metrics.increment('media.readiness_polls')
+        for media_id in chunk:
+            statuses[media_id] = (nodes.get(media_id) or {}).get('status') or 'MISSING'
+    return statuses
+
+
+def wait_for_media_ready(shopify_api, media_ids, initial_delay=0.5, max_delay=4.0, timeout=30):
+    """
+    Verilen medyalar hazır olana kadar kısa, üstel artan aralıklarla yoklar.
+    Tekil ürün senkronizasyonu gibi arka plan yoklayıcısı olmayan akışlar için engelleyen sürümdür.
+    """
+    if not media_ids:
+        return True
+    start = time.monotonic()
+    delay = initial_delay
+    while True:
+        sync_metrics.sleep(delay, 'media_readiness_poll')
+        try:
+            statuses = fetch_media_statuses(shopify_api, media_ids)
+        except Exception as e:
+            logging.warning(f"Medya durumu okunamadı, tekrar denenecek: {e}")
+            statuses = {}
+        if statuses and all(status in DONE_STATUSES for status in statuses.values()):
+            sync_metrics.record_span('media.ready_latency', time.monotonic() - start)
+            return True
+        if time.monotonic() - start >= timeout:
+            sync_metrics.increment('media.readiness_timeouts')
+            logging.warning(f"{len(media_ids)} medya {timeout}s içinde hazır olmadı, işleme devam ediliyor.")
+            return False
+        delay = min(max_delay, delay * 2)
+
+
+class _ReadinessJob:
+    def __init__(self, product_gid, media_ids, on_ready, initial_delay):
+        self.product_gid = product_gid
+        self.media_ids = list(media_ids)
+        self.on_ready = on_ready
+        self.submitted_at = time.monotonic()
+        self.delay = initial_delay
+        self.next_poll_at = self.submitted_at + initial_delay
+
+
+class MediaReadinessPoller:
+    """
+    Medya ekleyen işçilerin beklemeden bir sonraki ürüne geçmesini sağlar.
+    İşçiler 'submit' ile yeni medya ID'lerini ve hazır olunca çalışacak adımı (sıralama) bırakır;
+    tek bir arka plan thread'i tüm ürünlerin bekleyen medyasını toplu nodes(ids:) sorgularıyla
+    yoklar ve medya hazır olur olmaz ilgili adımı çalıştırır. Çalışma sonunda 'close' ile boşaltılır.
+    """
+    def __init__(self, shopify_api, batch_size=100, initial_delay=0.5, max_delay=4.0, timeout=60):
+        self.shopify_api = shopify_api
+        self.batch_size = batch_size
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._jobs = []  # (next_poll_at, sıra, job) min-heap
+        self._sequence = itertools.count()
+        self._active = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=sync_metrics.bind(self._run), name="MediaReadinessPoller", daemon=True)
+        self._thread.start()
+
+    def submit(self, product_gid, media_ids, on_ready):
+        """on_ready(hazır_mı) medya hazır olduğunda (veya zaman aşımında) poller thread'inde çağrılır."""
+        if not media_ids:
+            self._execute(_ReadinessJob(product_gid, [], on_ready, 0), True)
+            return
+        with self._condition:
+            job = _ReadinessJob(product_gid, media_ids, on_ready, self.initial_delay)
+            heapq.heappush(self._jobs, (job.next_poll_at, next(self._sequence), job))
+            self._active += 1
+            self._condition.notify_all()
+
+    def pending(self):
+        with self._condition:
+            return self._active
+
+    def drain(self, timeout=None):
+        """Bekleyen tüm medya işleri tamamlanana kadar bekler."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    logging.warning(f"{self._active} ürünün medya sıralaması tamamlanmadan çıkılıyor.")
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        drained = self.drain(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout=5)
+        return drained
+
+    def _due_jobs(self):
+        """Yoklama zamanı gelmiş işleri (bir batch'e sığacak kadar) kuyruktan alır; yoksa bekler."""
+        with self._condition:
+            while True:
+                if self._closed and not self._jobs:
+                    return None
+                if not self._jobs:
+                    self._condition.wait()
+                    continue
+                wait_time = self._jobs[0][0] - time.monotonic()
+                if wait_time <= 0:
+                    break
+                self._condition.wait(wait_time)
+
+            due, media_count = [], 0
+            now = time.monotonic()
+            while self._jobs and self._jobs[0][0] <= now and media_count < self.batch_size:
+                job = heapq.heappop(self._jobs)[2]
+                due.append(job)
+                media_count += len(job.media_ids)
+            return due
+
+    def _run(self):
+        while True:
+            due = self._due_jobs()
+            if due is None:
+                return
+            try:
+                statuses = fetch_media_statuses(self.shopify_api, [m for job in due for m in job.media_ids], self.batch_size)
+            except Exception as e:
+                logging.warning(f"Medya durumları yoklanamadı, tekrar denenecek: {e}")
+                statuses = {}
+
+            now = time.monotonic()
+            for job in due:
+                ready = bool(statuses) and all(statuses.get(m) in DONE_STATUSES for m in job.media_ids)
+                timed_out = now - job.submitted_at >= self.timeout
+                if ready or timed_out:
+                    if timed_out and not ready:
+                        sync_metrics.increment('media.readiness_timeouts')
+                        logging.warning(f"Ürün {job.product_gid} medyası {self.timeout}s içinde hazır olmadı, sıralama yine de yapılıyor.")
+                    sync_metrics.record_span('media.ready_latency', now - job.submitted_at)
+                    self._execute(job, ready)
+                    with self._condition:
+                        self._active -= 1
+                        self._condition.notify_all()
+                else:
+                    job.delay = min(self.max_delay, job.delay * 2)
+                    job.next_poll_at = now + job.delay
+                    with self._condition:
+                        heapq.heappush(self._jobs, (job.next_poll_at, next(self._sequence), job))
+
+    def _execute(self, job, ready):
+        try:
+            job.on_ready(ready)
+        except Exception as e:
+            logging.error(f"Ürün {job.product_gid} için medya hazır sonrası adım başarısız: {e}")
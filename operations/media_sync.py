@@ -1,12 +1,21 @@
 # operations/media_sync.py - Eski kodun mantığıyla düzeltilmiş
 
 import logging
-import time
 
-def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_text=False, force_update=False):
+from operations.image_cache import CHANGED
+from operations.media_map import match_shopify_media
+from operations.media_readiness import wait_for_media_ready
+
+def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_text=False, force_update=False, readiness_poller=None, media_map=None, image_cache=None, shopify_media=None):
     """
     ESKİ KODDAN UYARLANMIŞ ÇALIŞAN VERSİYON
-    Eski _sync_product_media fonksiyonunun aynısı
+    Eski _sync_product_media fonksiyonunun aynısı.
+    readiness_poller verilirse yeni medyanın hazır olması beklenmeden dönülür; sıralama
+    medya hazır olduğunda poller thread'inde yapılır.
+    media_map verilirse mevcut medya kalıcı eşlemeden okunur (force_update eşlemeyi yeniler).
+    image_cache verilirse aynı URL'de içeriği değişmiş görseller yeniden yüklenir.
+    shopify_media, ShopifyAPI.get_products_media_details ile önceden toplu okunmuş medya listesidir;
+    verilirse ürün başına medya okuması yapılmaz.
     """
     changes = []
     product_title = sentos_product.get('name', '').strip()
@@ -23,75 +32,185 @@ def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_tex
         logging.warning(f"Cookie eksikliği nedeniyle medya sync atlandı - Ürün ID: {product_id}")
         return changes
     
-    # Mevcut Shopify medyalarını al
     try:
-        initial_shopify_media = shopify_api.get_product_media_details(product_gid)
-        logging.info(f"Shopify'da {len(initial_shopify_media)} mevcut medya bulundu")
+        current = get_current_media(shopify_api, product_gid, sentos_ordered_urls, media_map, force_update, shopify_media)
     except Exception as e:
         logging.error(f"Shopify medya bilgileri alınamadı: {e}")
         changes.append(f"Hata: Shopify medya bilgileri alınamadı - {e}")
         return changes
     
-    # Eğer Sentos'tan hiç görsel gelmezse, Shopify'daki tüm görselleri sil
+    changed_urls = find_changed_images(product_gid, current, sentos_ordered_urls, image_cache, media_map)
+    plan = plan_media_changes(current, sentos_ordered_urls, changed_urls)
+    changes = apply_media_plan(shopify_api, product_gid, plan, product_title, set_alt_text, readiness_poller, media_map, image_cache)
+        
+    logging.info(f"Medya senkronizasyonu tamamlandı - {len(changes)} değişiklik")
+    return changes
+
+
+def get_current_media(shopify_api, product_gid, sentos_ordered_urls, media_map=None, force_update=False, shopify_media=None):
+    """
+    Ürünün mevcut Shopify medyasını Sentos URL'lerine eşlenmiş olarak döndürür.
+    Önceden okunmuş (toplu) medya listesi verilmişse güncel kaynak odur ve eşleme onunla yenilenir;
+    verilmemişse kalıcı eşleme, o da yoksa Shopify okuması kullanılır.
+    """
+    known = None
+    if shopify_media is None and media_map is not None and not force_update:
+        known = media_map.get_product(product_gid)
+    if known is not None:
+        url_to_media_id = {url: info['media_id'] for url, info in known['media'].items()}
+        logging.info(f"Medya eşlemesinden {len(url_to_media_id)} mevcut medya kullanıldı (Shopify okuması yapılmadı)")
+        return {'url_to_media_id': url_to_media_id, 'stale_media_ids': [],
+                'current_order': [url for url in known['order'] if url in url_to_media_id],
+                'content_hashes': {url: info['content_hash'] for url, info in known['media'].items()}}
+
+    if shopify_media is None:
+        shopify_media = shopify_api.get_product_media_details(product_gid)
+        logging.info(f"Shopify'da {len(shopify_media)} mevcut medya bulundu")
+    url_to_media_id, current_order, stale_media_ids = match_shopify_media(shopify_media, sentos_ordered_urls or [])
+    content_hashes = {}
+    if media_map is not None:
+        media_map.set_product(product_gid, url_to_media_id, current_order)
+        # Aynı medya ID'si için daha önce kaydedilmiş içerik hash'leri korunur
+        content_hashes = {url: info['content_hash'] for url, info in media_map.get_product(product_gid)['media'].items()}
+    return {'url_to_media_id': url_to_media_id, 'current_order': current_order, 'stale_media_ids': stale_media_ids,
+            'content_hashes': content_hashes}
+
+
+def find_changed_images(product_gid, current, sentos_ordered_urls, image_cache=None, media_map=None):
+    """
+    URL'si aynı kalıp içeriği değişen görselleri bulur (koşullu HEAD, değişmeyen görsel için 304).
+    Hash'i henüz bilinmeyen görsellerin parmak izi eşlemeye yazılır; bir sonraki çalışmada karşılaştırılır.
+    """
+    if image_cache is None:
+        return []
+    changed = []
+    for url in sentos_ordered_urls or []:
+        if url not in current['url_to_media_id']:
+            continue
+        status = image_cache.check(url)
+        fingerprint = image_cache.fingerprint(url)
+        stored = current.get('content_hashes', {}).get(url)
+        if (stored and fingerprint and stored != fingerprint) or (not stored and status == CHANGED):
+            changed.append(url)
+        elif not stored and fingerprint and media_map is not None:
+            media_map.set_content_hash(product_gid, url, fingerprint)
+    if changed:
+        logging.info(f"Ürün {product_gid}: {len(changed)} görselin içeriği değişmiş, yeniden yüklenecek")
+    return changed
+
+
+def plan_media_changes(current, sentos_ordered_urls, changed_urls=()):
+    """
+    API'ye gitmeden eklenecek/silinecek görselleri ve sıralama ihtiyacını hesaplar.
+    changed_urls içindeki görseller (içerik değişmiş) silinip aynı URL'den yeniden eklenir.
+    """
+    url_to_media_id = {url: media_id for url, media_id in current['url_to_media_id'].items() if url not in changed_urls}
+    replaced_media_ids = [current['url_to_media_id'][url] for url in changed_urls if url in current['url_to_media_id']]
+
+    # Eğer Sentos'tan hiç görsel gelmezse, Shopify'daki tüm görseller silinir
     if not sentos_ordered_urls:
+        return {'sentos_ordered_urls': [], 'urls_to_add': [], 'url_to_media_id': {}, 'needs_reorder': False, 'delete_all': True,
+                'media_ids_to_delete': current['stale_media_ids'] + replaced_media_ids + list(url_to_media_id.values())}
+
+    media_ids_to_delete = current['stale_media_ids'] + replaced_media_ids + [media_id for url, media_id in url_to_media_id.items() if url not in sentos_ordered_urls]
+    kept = {url: media_id for url, media_id in url_to_media_id.items() if url in sentos_ordered_urls}
+    urls_to_add = [url for url in sentos_ordered_urls if url not in kept]
+    return {
+        'sentos_ordered_urls': list(sentos_ordered_urls),
+        'urls_to_add': urls_to_add,
+        'media_ids_to_delete': media_ids_to_delete,
+        'url_to_media_id': kept,
+        'needs_reorder': bool(urls_to_add or media_ids_to_delete) or current['current_order'] != list(sentos_ordered_urls),
+        'delete_all': False,
+    }
+
+
+def apply_media_plan(shopify_api, product_gid, plan, product_title, set_alt_text=False, readiness_poller=None, media_map=None, image_cache=None):
+    """Hesaplanmış medya planını Shopify'a uygular ve değişiklik açıklamalarını döndürür."""
+    changes = []
+    sentos_ordered_urls = plan['sentos_ordered_urls']
+    url_to_media_id = dict(plan['url_to_media_id'])
+    urls_to_add, media_ids_to_delete = plan['urls_to_add'], plan['media_ids_to_delete']
+
+    if plan['delete_all']:
         logging.info("Sentos'tan görsel gelmedi, Shopify görselleri silinecek")
-        if media_ids_to_delete := [m['id'] for m in initial_shopify_media]:
-            shopify_api.delete_product_media(product_gid, media_ids_to_delete)
+        if media_ids_to_delete:
+            errors = delete_product_media(shopify_api, product_gid, media_ids_to_delete)
             changes.append(f"{len(media_ids_to_delete)} Shopify görseli silindi.")
+            if media_map is not None and errors:
+                media_map.forget_product(product_gid)
+            elif media_map is not None:
+                media_map.set_product(product_gid, {}, [])
         return changes
     
-    # Mevcut Shopify görsellerini URL'lere göre haritala
-    shopify_src_map = {m['originalSrc']: m for m in initial_shopify_media if m.get('originalSrc')}
-    
-    # Hangi görsellerin silinmesi ve eklenmesi gerektiğini hesapla
-    media_ids_to_delete = [media['id'] for src, media in shopify_src_map.items() if src not in sentos_ordered_urls]
-    urls_to_add = [url for url in sentos_ordered_urls if url not in shopify_src_map]
-    
     logging.info(f"Medya karşılaştırması: {len(urls_to_add)} eklenecek, {len(media_ids_to_delete)} silinecek")
-    
-    media_changed = False
+    created_media = {}
     
     # Yeni görseller ekle
     if urls_to_add:
         changes.append(f"{len(urls_to_add)} yeni görsel eklendi.")
-        _add_new_media_to_product(shopify_api, product_gid, urls_to_add, product_title, set_alt_text)
-        media_changed = True
+        created_media = _add_new_media_to_product(shopify_api, product_gid, urls_to_add, product_title, set_alt_text)
+        url_to_media_id.update(created_media)
+        if media_map is not None:
+            for url, media_id in created_media.items():
+                media_map.record_media(product_gid, url, media_id, image_cache.fingerprint(url) if image_cache else None)
         
     # Eski görselleri sil
     if media_ids_to_delete:
         changes.append(f"{len(media_ids_to_delete)} eski görsel silindi.")
-        shopify_api.delete_product_media(product_gid, media_ids_to_delete)
-        media_changed = True
+        if delete_product_media(shopify_api, product_gid, media_ids_to_delete) and media_map is not None:
+            # Eşlemedeki ID'ler Shopify'da yoksa eşleme bayatlamıştır
+            media_map.forget_product(product_gid)
         
-    # Görsel sıralamasını güncelle (eski mantık)
-    if media_changed:
-        changes.append("Görsel sırası güncellendi.")
-        time.sleep(10)  # Medyanın işlenmesi için bekle
-        
-        # Yeniden düzenlenmiş medya listesini al
-        final_shopify_media = shopify_api.get_product_media_details(product_gid)
-        final_alt_map = {m['alt']: m['id'] for m in final_shopify_media if m.get('alt')}
-        ordered_media_ids = [final_alt_map.get(url) for url in sentos_ordered_urls if final_alt_map.get(url)]
+    # Görsel sıralamasını güncelle: sabit bekleme yerine yeni medya hazır olunca
+    if plan['needs_reorder']:
 
-        if len(ordered_media_ids) < len(sentos_ordered_urls):
-            logging.warning(f"Alt etiketi eşleştirme sorunu: {len(sentos_ordered_urls)} resim beklenirken {len(ordered_media_ids)} ID bulundu. Sıralama eksik olabilir.")
+        def reorder_when_ready(ready):
+            ordered_media_ids = _resolve_media_order(shopify_api, product_gid, sentos_ordered_urls, url_to_media_id)
+            errors = reorder_product_media(shopify_api, product_gid, ordered_media_ids)
+            if media_map is not None:
+                if errors:
+                    media_map.forget_product(product_gid)
+                elif len(ordered_media_ids) == len(sentos_ordered_urls):
+                    media_map.set_product(product_gid, url_to_media_id, sentos_ordered_urls)
 
-        shopify_api.reorder_product_media(product_gid, ordered_media_ids)
+        if readiness_poller:
+            readiness_poller.submit(product_gid, list(created_media.values()), reorder_when_ready)
+            changes.append("Görsel sırası, medya hazır olduğunda güncellenecek.")
+        else:
+            reorder_when_ready(wait_for_media_ready(shopify_api, list(created_media.values())))
+            changes.append("Görsel sırası güncellendi.")
     
     # Hiç değişiklik olmadıysa
-    if not changes and not media_changed:
+    if not changes:
         changes.append("Resimler kontrol edildi (Değişiklik yok).")
-        
-    logging.info(f"Medya senkronizasyonu tamamlandı - {len(changes)} değişiklik")
     return changes
 
 
+def _resolve_media_order(shopify_api, product_gid, sentos_ordered_urls, url_to_media_id):
+    """Sentos sırasına göre medya ID listesini çıkarır; bilinmeyen URL varsa medyayı yeniden okur."""
+    if all(url in url_to_media_id for url in sentos_ordered_urls):
+        return [url_to_media_id[url] for url in sentos_ordered_urls]
+
+    # Yeniden düzenlenmiş medya listesini al (eski alt etiketi eşleştirmesi)
+    final_shopify_media = get_product_media_details(shopify_api, product_gid)
+    final_alt_map = {m['alt']: m['id'] for m in final_shopify_media if m.get('alt')}
+    ordered_media_ids = [url_to_media_id.get(url) or final_alt_map.get(url) for url in sentos_ordered_urls]
+    ordered_media_ids = [media_id for media_id in ordered_media_ids if media_id]
+
+    if len(ordered_media_ids) < len(sentos_ordered_urls):
+        logging.warning(f"Alt etiketi eşleştirme sorunu: {len(sentos_ordered_urls)} resim beklenirken {len(ordered_media_ids)} ID bulundu. Sıralama eksik olabilir.")
+    return ordered_media_ids
+
+
 def _add_new_media_to_product(shopify_api, product_gid, urls_to_add, product_title, set_alt_text=False):
     """
     ESKİ KODDAN ALINMIŞ MEDYA EKLEME FONKSİYONU
+    Oluşturulan medyaların {sentos_url: media_gid} haritasını döndürür.
     """
+    created_media = {}
     if not urls_to_add: 
-        return
+        return created_media
         
     logging.info(f"{len(urls_to_add)} yeni medya ekleniyor...")
     
@@ -123,10 +242,17 @@ def _add_new_media_to_product(shopify_api, product_gid, urls_to_add, product_tit
                 logging.error(f"Medya ekleme hataları: {errors}")
             else:
                 logging.info(f"Batch {i//10 + 1}: {len(batch)} medya başarıyla eklendi")
+            # Shopify oluşturulan medyayı girdi sırasıyla döndürür
+            created = result.get('productCreateMedia', {}).get('media') or []
+            for item, media in zip(batch, created):
+                if media and media.get('id'):
+                    created_media[item['originalSource']] = media['id']
                 
         except Exception as e:
             logging.error(f"Medya batch {i//10 + 1} eklenirken hata: {e}")
 
+    return created_media
+
 
 # ShopifyAPI sınıfına eksik fonksiyonları ekle
 def get_product_media_details(shopify_api, product_gid):
@@ -178,7 +304,7 @@ def get_product_media_details(shopify_api, product_gid):
 def delete_product_media(shopify_api, product_id, media_ids):
     """
     ESKİ KODDAK delete_product_media FONKSİYONU
-    ShopifyAPI sınıfına eklenmesi gereken fonksiyon
+    ShopifyAPI sınıfına eklenmesi gereken fonksiyon. Shopify userErrors listesini döndürür.
     """
     if not media_ids: 
         return
@@ -202,15 +328,17 @@ def delete_product_media(shopify_api, product_id, media_ids):
             logging.warning(f"Medya silme hataları: {errors}")
         
         logging.info(f"{len(deleted_ids)} medya başarıyla silindi.")
+        return errors
         
     except Exception as e:
         logging.error(f"Medya silinirken kritik hata oluştu: {e}")
+        return [{'message': str(e)}]
 
 
 def reorder_product_media(shopify_api, product_id, media_ids):
     """
     ESKİ KODDAK reorder_product_media FONKSİYONU  
-    ShopifyAPI sınıfına eklenmesi gereken fonksiyon
+    ShopifyAPI sınıfına eklenmesi gereken fonksiyon. Shopify userErrors listesini döndürür.
     """
     if not media_ids or len(media_ids) < 2:
         logging.info("Yeniden sıralama için yeterli medya bulunmuyor (1 veya daha az).")
@@ -238,9 +366,11 @@ def reorder_product_media(shopify_api, product_id, media_ids):
             logging.warning(f"Medya yeniden sıralama hataları: {errors}")
         else:
             logging.info("✅ Medya yeniden sıralama işlemi başarıyla gönderildi.")
+        return errors
             
     except Exception as e:
         logging.error(f"Medya yeniden sıralanırken kritik hata: {e}")
+        return [{'message': str(e)}]
 
 
 # ShopifyAPI sınıfına eksik fonksiyonları dinamik olarak ekleyen yardımcı
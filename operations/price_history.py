@@ -0,0 +1,167 @@
+# operations/price_history.py (Hesaplanan ve gönderilen fiyat tablolarının sütunlu anlık görüntü geçmişi)
+
+import logging
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# data_manager.DATA_CACHE_DIR ile aynı klasör (media_map.py ile aynı gerekçe)
+PRICE_HISTORY_DIR = os.getenv("PRICE_HISTORY_DIR", os.path.join("data_cache", "price_history"))
+# Tür başına saklanacak en fazla anlık görüntü (0: sınırsız); eskiler her kayıttan sonra silinir
+PRICE_HISTORY_KEEP = int(os.getenv("PRICE_HISTORY_KEEP", "50"))
+
+KEY_COLUMN = 'MODEL KODU'
+_SNAPSHOT_NAME = re.compile(r'^(?P<created>\d{8}-\d{6}-\d{6})_(?P<kind>[a-z_]+)\.(?P<ext>parquet|pkl\.gz)$')
+
+
+def _parquet_engine():
+    """Kurulu Parquet motoru ('pyarrow' / 'fastparquet') veya None."""
+    for engine in ('pyarrow', 'fastparquet'):
+        try:
+            __import__(engine)
+            return engine
+        except ImportError:
+            continue
+    return None
+
+
+class PriceHistory:
+    """
+    Fiyat tablolarını (ana, indirimli, toptan) ve Shopify'a gönderim sonuçlarını sıkıştırılmış
+    anlık görüntüler olarak saklar. Parquet motoru (pyarrow/fastparquet) kuruluysa zstd/gzip sıkıştırmalı
+    Parquet, değilse gzip'li pickle kullanılır; ikisi de sütun tiplerini aynen korur.
+    Her dosya '<zaman>_<tür>' adını taşır; Google E-Tablo her kayıtta üzerine yazılsa da geçmiş burada kalır.
+    Her türün yalnızca son 'keep' anlık görüntüsü tutulur.
+    """
+    def __init__(self, directory=None, keep=PRICE_HISTORY_KEEP):
+        self.directory = directory or PRICE_HISTORY_DIR
+        self.keep = keep
+        self.engine = _parquet_engine()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def save(self, df, kind, created_at=None):
+        """DataFrame'i '<zaman>_<tür>' kimliğiyle kaydeder ve kimliği döndürür."""
+        snapshot_id = f"{(created_at or datetime.now()):%Y%m%d-%H%M%S-%f}_{kind}"
+        df = df.reset_index(drop=True)
+        if self.engine:
+            path = os.path.join(self.directory, f"{snapshot_id}.parquet")
+            compression = 'zstd' if self.engine == 'pyarrow' else 'gzip'
+            df.to_parquet(path, engine=self.engine, compression=compression, index=False)
+        else:
+            path = os.path.join(self.directory, f"{snapshot_id}.pkl.gz")
+            df.to_pickle(path, compression='gzip')
+        logging.info(f"Fiyat anlık görüntüsü kaydedildi: {path} ({len(df)} satır)")
+        self.prune(kind)
+        return snapshot_id
+
+    def prune(self, kind):
+        """'kind' türünün en yeni 'keep' anlık görüntüsü dışındakileri siler; silinen sayısını döndürür."""
+        if not self.keep:
+            return 0
+        expired = self.list(kind).iloc[self.keep:]
+        for path in expired['path']:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.warning(f"Eski fiyat anlık görüntüsü silinemedi ({path}): {e}")
+        if len(expired):
+            logging.info(f"'{kind}' türünün {len(expired)} eski fiyat anlık görüntüsü silindi.")
+        return len(expired)
+
+    def save_pricing(self, main_df=None, discount_df=None, wholesale_df=None):
+        """Aynı hesaplamanın tablolarını aynı zaman damgasıyla kaydeder: {tür: kimlik}."""
+        created_at = datetime.now()
+        tables = {'main': main_df, 'discount': discount_df, 'wholesale': wholesale_df}
+        return {kind: self.save(df, kind, created_at) for kind, df in tables.items() if df is not None}
+
+    def save_push(self, price_df, results, kind='push'):
+        """
+        Shopify'a gönderilen fiyat tablosunu ('<kind>') ve varyant bazındaki sonuçları ('<kind>_result') kaydeder.
+        Ana ve indirimli fiyat gönderimleri farklı kind ile saklanırsa her biri kendi son gönderimiyle karşılaştırılabilir.
+        """
+        created_at = datetime.now()
+        details = pd.DataFrame(results.get('details') or [], columns=['sku', 'variant_id', 'price', 'status', 'reason'])
+        return {
+            kind: self.save(price_df, kind, created_at),
+            f"{kind}_result": self.save(details.assign(run_id=results.get('run_id')), f"{kind}_result", created_at),
+        }
+
+    def list(self, kind=None):
+        """Anlık görüntüleri en yeniden eskiye listeler (snapshot_id, kind, created_at, path, size_bytes)."""
+        rows = []
+        for name in os.listdir(self.directory):
+            match = _SNAPSHOT_NAME.match(name)
+            if not match or (kind and match['kind'] != kind):
+                continue
+            path = os.path.join(self.directory, name)
+            rows.append({
+                'snapshot_id': f"{match['created']}_{match['kind']}", 'kind': match['kind'],
+                'created_at': datetime.strptime(match['created'], '%Y%m%d-%H%M%S-%f'),
+                'path': path, 'size_bytes': os.path.getsize(path),
+            })
+        columns = ['snapshot_id', 'kind', 'created_at', 'path', 'size_bytes']
+        return pd.DataFrame(rows, columns=columns).sort_values('snapshot_id', ascending=False, ignore_index=True)
+
+    def latest(self, kind):
+        snapshots = self.list(kind)
+        return None if snapshots.empty else snapshots.iloc[0]['snapshot_id']
+
+    def load(self, snapshot_id):
+        for ext in ('parquet', 'pkl.gz'):
+            path = os.path.join(self.directory, f"{snapshot_id}.{ext}")
+            if os.path.exists(path):
+                return pd.read_parquet(path) if ext == 'parquet' else pd.read_pickle(path, compression='gzip')
+        raise FileNotFoundError(f"Fiyat anlık görüntüsü bulunamadı: {snapshot_id}")
+
+    def diff(self, old_id, new_id, columns=None, key=KEY_COLUMN):
+        """İki anlık görüntüyü SKU bazında karşılaştırır; bkz. diff_snapshots."""
+        return diff_snapshots(self.load(old_id), self.load(new_id), columns, key)
+
+
+def _values_differ(old, new):
+    # Sayısal sütunlar kuruş bazında, diğerleri birebir karşılaştırılır; iki tarafın da boş olması fark değildir
+    both_missing = old.isna().to_numpy() & new.isna().to_numpy()
+    if pd.api.types.is_numeric_dtype(old) and pd.api.types.is_numeric_dtype(new):
+        old_cents = np.rint(old.to_numpy(dtype=np.float64) * 100)
+        new_cents = np.rint(new.to_numpy(dtype=np.float64) * 100)
+        return ~(old_cents == new_cents) & ~both_missing
+    return (old.astype(object).to_numpy() != new.astype(object).to_numpy()) & ~both_missing
+
+
+def diff_snapshots(old_df, new_df, columns=None, key=KEY_COLUMN):
+    """
+    İki fiyat tablosunu SKU anahtarıyla vektörel olarak karşılaştırır.
+    Dönen tabloda yalnızca farklı satırlar vardır: anahtar, 'DEGISIKLIK' ('eklendi' / 'silindi' / 'degisti')
+    ve karşılaştırılan her sütun için '<sütun>_ESKI' ve '<sütun>_YENI' değerleri.
+    columns verilmezse iki tabloda ortak olan tüm sütunlar karşılaştırılır.
+    """
+    if columns is None:
+        columns = [c for c in new_df.columns if c in old_df.columns and c != key]
+    old = old_df[[key] + columns].drop_duplicates(subset=key, keep='last')
+    new = new_df[[key] + columns].drop_duplicates(subset=key, keep='last')
+    merged = old.merge(new, on=key, how='outer', suffixes=('_ESKI', '_YENI'), indicator=True)
+
+    changed = np.zeros(len(merged), dtype=bool)
+    for column in columns:
+        changed |= _values_differ(merged[f"{column}_ESKI"], merged[f"{column}_YENI"])
+    change = np.select(
+        [merged['_merge'].to_numpy() == 'right_only', merged['_merge'].to_numpy() == 'left_only', changed],
+        ['eklendi', 'silindi', 'degisti'], default='',
+    )
+    merged.insert(1, 'DEGISIKLIK', change)
+    return merged[merged['DEGISIKLIK'] != ''].drop(columns='_merge').reset_index(drop=True)
+
+
+def incremental_prices(diff_df, price_col, compare_col=None, key=KEY_COLUMN):
+    """
+    diff_snapshots sonucundan send_prices_to_shopify'a verilebilecek fiyat tablosu üretir:
+    yalnızca eklenen veya fiyatı değişen SKU'ların yeni değerleri ('MODEL KODU', fiyat, [karşılaştırma fiyatı]).
+    """
+    rows = diff_df[diff_df['DEGISIKLIK'].isin(['eklendi', 'degisti'])]
+    result = pd.DataFrame({key: rows[key], price_col: rows[f"{price_col}_YENI"]})
+    if compare_col:
+        result[compare_col] = rows[f"{compare_col}_YENI"]
+    return result.dropna(subset=[price_col]).reset_index(drop=True)
@@ -0,0 +1,120 @@
+# operations/price_journal.py (Fiyat gönderimleri için kalıcı, tekrar çalıştırılabilir günlük)
+
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+# data_manager.DATA_CACHE_DIR ile aynı klasör (media_map.py ile aynı gerekçe)
+PRICE_JOURNAL_FILE = os.getenv("PRICE_JOURNAL_FILE", os.path.join("data_cache", "price_journal.sqlite3"))
+
+PENDING, SUCCESS, FAILED, UNCHANGED = 'pending', 'success', 'failed', 'unchanged'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    price_column TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    total INTEGER DEFAULT 0,
+    success INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0,
+    unchanged INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS variants (
+    variant_id TEXT PRIMARY KEY,
+    sku TEXT,
+    product_id TEXT,
+    price TEXT,
+    compare_at_price TEXT,
+    status TEXT,
+    reason TEXT,
+    run_id TEXT,
+    updated_at TEXT
+);
+"""
+
+
+class PriceJournal:
+    """
+    Her varyantın son hedef fiyatını ve sonucunu (çalışma ID'siyle) SQLite dosyasında tutar.
+    Gönderimden önce hedefler 'pending' olarak yazılır, yanıt gelince 'success'/'failed' olur;
+    böylece yarıda kalan bir çalışmada hangi varyantların gönderilmediği de bilinir.
+    Kaldığı yerden devam modunda yalnızca başarısız, hiç denenmemiş veya hedef fiyatı değişmiş
+    varyantlar yeniden gönderilir. Streamlit oturumundan bağımsızdır.
+    """
+    def __init__(self, path=None):
+        self.path = path or PRICE_JOURNAL_FILE
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def start_run(self, price_column, total):
+        run_id = f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO runs (run_id, price_column, started_at, total) VALUES (?, ?, ?, ?)",
+                               (run_id, price_column, datetime.now().isoformat(), total))
+        return run_id
+
+    def finish_run(self, run_id, success, failed, unchanged=0):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE runs SET finished_at = ?, success = ?, failed = ?, unchanged = ? WHERE run_id = ?",
+                               (datetime.now().isoformat(), success, failed, unchanged, run_id))
+
+    def last_run(self):
+        """Son çalışmanın özeti (sözlük) veya None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs ORDER BY started_at DESC LIMIT 1").fetchone()
+        return dict(row) if row else None
+
+    def record_targets(self, run_id, updates, status=PENDING, reason=None):
+        """Gönderilecek (veya zaten güncel olan) varyantların hedef fiyatlarını yazar."""
+        now = datetime.now().isoformat()
+        rows = [(u["id"], u.get("sku"), u.get("product_id"), u["price"], u.get("compareAtPrice"), status, reason, run_id, now)
+                for u in updates]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO variants (variant_id, sku, product_id, price, compare_at_price, status, reason, run_id, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(variant_id) DO UPDATE SET
+                    sku = excluded.sku, product_id = excluded.product_id, price = excluded.price,
+                    compare_at_price = excluded.compare_at_price, status = excluded.status,
+                    reason = excluded.reason, run_id = excluded.run_id, updated_at = excluded.updated_at
+            """, rows)
+
+    def record_unchanged(self, run_id, updates):
+        """Shopify'da zaten hedef fiyatta olan (gönderilmeyen) varyantları tamamlanmış olarak yazar."""
+        self.record_targets(run_id, updates, status=UNCHANGED, reason="Fiyat zaten güncel.")
+
+    def record_outcomes(self, run_id, details):
+        """update_prices_* sonuç detaylarındaki (variant_id, status, reason) bilgilerini işler."""
+        now = datetime.now().isoformat()
+        rows = [(SUCCESS if d.get("status") == "success" else FAILED, d.get("reason"), now, d.get("variant_id"), run_id)
+                for d in details if d.get("variant_id")]
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE variants SET status = ?, reason = ?, updated_at = ? WHERE variant_id = ? AND run_id = ?", rows)
+
+    def pending_updates(self, updates):
+        """
+        Kaldığı yerden devam için filtre: (gönderilecekler, zaten_tamam_sayısı).
+        Günlükte başarılı/güncel görünen ve hedef fiyatı (ve karşılaştırma fiyatı) aynı kalan varyantlar atlanır.
+        """
+        with self._lock:
+            done = {
+                row["variant_id"]: (row["price"], row["compare_at_price"])
+                for row in self._conn.execute("SELECT variant_id, price, compare_at_price FROM variants WHERE status IN (?, ?)",
+                                              (SUCCESS, UNCHANGED))
+            }
+        to_send = [u for u in updates if done.get(u["id"]) != (u["price"], u.get("compareAtPrice"))]
+        skipped = len(updates) - len(to_send)
+        logging.info(f"Fiyat günlüğü: {skipped} varyant önceki çalışmalarda tamamlanmış, {len(to_send)} varyant gönderilecek.")
+        return to_send, skipped
@@ -1,133 +1,414 @@
 # operations/price_sync.py (Düzeltilmiş Sürüm)
 
+import json
 import logging
-import requests
+import os
+import tempfile
 import time
 import random
+import pandas as pd
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def update_prices_for_single_product(shopify_api, product_id, variants_to_update, rate_limiter):
+import sync_metrics
+
+# productVariantsBulkUpdate mutasyonu başına Shopify maliyet puanı
+BULK_UPDATE_COST = 10
+# Tek istekte (alias'larla) gönderilecek en fazla ürün ve varyant sayısı
+MAX_PRODUCTS_PER_REQUEST = 25
+MAX_VARIANTS_PER_REQUEST = 250
+# Bu sayıdan fazla varyant güncellemesi staged upload + bulkOperationRunMutation ile gönderilir
+BULK_MUTATION_THRESHOLD = int(os.getenv("PRICE_BULK_THRESHOLD", "2000"))
+
+# Fark kontrolünde varyant başına okunan alanlar
+CURRENT_PRICE_FIELDS = "... on ProductVariant { price compareAtPrice }"
+
+BULK_PRICE_MUTATION = """
+mutation call($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
+  productVariantsBulkUpdate(productId: $productId, variants: $variants) {
+    productVariants { id }
+    userErrors { field message }
+  }
+}
+"""
+
+
+def build_price_index(all_variants_df, price_data_df, price_col, compare_col=None):
     """
-    Tek bir ürüne ait varyantların fiyatlarını REST API ile tek tek günceller.
-    Paylaşılan bir rate_limiter objesi kullanarak hız limitlerini aşmaz.
+    Çalışma başında bir kez kurulan ana ürün indeksi: {base_sku: {'variant_skus', 'price', 'compare_price'}}.
+    Ürünler DataFrame taranarak değil bu sözlükten okunur; indeks sütunlar üzerinde
+    tek geçişte kurulur. Fiyat listesinde olmayan ürünün 'price' değeri None'dır.
     """
-    if not variants_to_update:
-        return {"status": "skipped", "reason": "Güncellenecek varyant yok."}
+    variants = all_variants_df[['base_sku', 'MODEL KODU']].dropna(subset=['base_sku'])
+    index = {}
+    for base_sku, variant_sku in zip(variants['base_sku'].tolist(), variants['MODEL KODU'].tolist()):
+        entry = index.get(base_sku)
+        if entry is None:
+            entry = index[base_sku] = {'variant_skus': [], 'price': None, 'compare_price': None}
+        entry['variant_skus'].append(variant_sku)
+    has_compare = bool(compare_col) and compare_col in price_data_df.columns
+    columns = ['MODEL KODU', price_col] + ([compare_col] if has_compare else [])
+    # Aynı ana ürün birden fazla kez varsa (eski davranıştaki gibi) ilk satır geçerlidir
+    price_rows = price_data_df[columns].drop_duplicates(subset='MODEL KODU', keep='first')
+    compare_values = price_rows[compare_col].tolist() if has_compare else [None] * len(price_rows)
+    for base_sku, price, compare_price in zip(price_rows['MODEL KODU'].tolist(), price_rows[price_col].tolist(), compare_values):
+        entry = index.setdefault(base_sku, {'variant_skus': [], 'price': None, 'compare_price': None})
+        entry['price'], entry['compare_price'] = price, compare_price
+    return index
+
 
-    success_count = 0
-    errors = []
-    max_retries = 3
+def price_rows_from_index(price_index, price_col, compare_col=None):
+    """build_price_index sonucundan fiyatı olan varyant satırları: DataFrame('MODEL KODU', 'base_sku', fiyat[, karşılaştırma])."""
+    rows = [
+        (variant_sku, base_sku, entry['price'], entry['compare_price'])
+        for base_sku, entry in price_index.items() if entry['price'] is not None and pd.notna(entry['price'])
+        for variant_sku in entry['variant_skus']
+    ]
+    df = pd.DataFrame(rows, columns=['MODEL KODU', 'base_sku', price_col, compare_col or 'compare_price'])
+    return df if compare_col else df.drop(columns='compare_price')
 
-    for variant_payload in variants_to_update:
-        variant_gid = variant_payload.get("id")
-        variant_id_numeric = variant_gid.split("/")[-1]
-        
+
+def send_prices_to_shopify(shopify_api, calculated_df, variants_df, price_column_name, compare_price_column_name=None, progress_callback=None, worker_count=4, max_retries=3, bulk_threshold=None, skip_unchanged=True, journal=None, resume=False):
+    """
+    Hesaplanmış fiyatları (calculated_df) ve tüm varyant listesini (variants_df) alarak
+    Shopify'a fiyat güncellemesi gönderir. Varyantlar ana ürün SKU'su (base_sku) ile eşleştirilir,
+    güncellemeler ürün bazında gruplanıp productVariantsBulkUpdate ile gönderilir.
+    skip_unchanged açıkken Shopify'daki fiyatı kuruşu kuruşuna aynı olan varyantlar gönderilmez.
+    Güncelleme sayısı bulk_threshold'u (varsayılan BULK_MUTATION_THRESHOLD) aşarsa toplu mutasyon kullanılır.
+    journal (PriceJournal) verilirse hedef fiyatlar ve sonuçlar çalışma ID'siyle günlüğe yazılır;
+    resume=True iken günlükte başarılı görünen ve hedef fiyatı değişmemiş varyantlar hiç gönderilmez.
+    Sonuçta gönderim sonuçlarına ek olarak 'changed', 'unchanged', 'unmatched' ve 'resumed' sayıları,
+    Shopify'da hedef fiyatta olduğu doğrulanan (gönderilip başarılı olan, zaten güncel veya önceden tamamlanmış)
+    varyantların 'completed_skus' listesi ve eşleşmeyen varyantların 'unmatched_skus' listesi döner.
+    """
+    if progress_callback:
+        progress_callback({'progress': 5, 'message': 'Fiyatlar ve varyantlar birleştiriliyor...'})
+
+    if not (compare_price_column_name and compare_price_column_name in calculated_df.columns):
+        compare_price_column_name = None
+    # Varyant -> fiyat eşlemesi ana ürün indeksinden gelir (aynı ana ürünün ilk fiyat satırı geçerlidir)
+    price_index = build_price_index(variants_df, calculated_df, price_column_name, compare_price_column_name)
+    df_to_send = price_rows_from_index(price_index, price_column_name, compare_price_column_name)
+
+    if df_to_send.empty:
+        logging.warning("Shopify'a gönderilecek güncel fiyatlı ürün bulunamadı.")
+        return {"success": 0, "failed": 0, "errors": ["Gönderilecek veri bulunamadı."], "details": []}
+
+    if progress_callback:
+        progress_callback({'progress': 15, 'message': 'Varyantlar Shopify ile eşleştiriliyor (Ürün Bazlı Arama)...'})
+
+    base_skus_to_search = df_to_send['base_sku'].dropna().astype(str).unique().tolist()
+    logging.info(f"{len(base_skus_to_search)} adet ana ürün (base_sku) üzerinden Shopify'da arama yapılacak...")
+    try:
+        variant_map = shopify_api.get_variant_ids_by_skus(base_skus_to_search, search_by_product_sku=True)
+        logging.info(f"Ürün bazlı arama sonucu {len(variant_map)} adet varyant Shopify'da bulundu.")
+    except Exception as e:
+        logging.error(f"Ana ürün bazlı SKU eşleştirmesi sırasında kritik hata: {e}. İşlem durduruldu.")
+        return {"success": 0, "failed": len(df_to_send), "errors": [f"SKU eşleştirme hatası: {e}"], "details": []}
+
+    updates, skipped_skus = build_price_payloads(df_to_send, variant_map, price_column_name, compare_price_column_name)
+
+    if skipped_skus:
+        logging.warning(f"{len(skipped_skus)} varyant SKU'su, ana ürünleri bulunmasına rağmen Shopify'da eşleştirilemedi. İlk 10: {skipped_skus[:10]}")
+    if not updates:
+        logging.warning("Shopify'da eşleşen ve güncellenecek varyant bulunamadı.")
+        return {"success": 0, "failed": len(df_to_send), "errors": ["Shopify'da eşleşen SKU bulunamadı."], "details": [],
+                "changed": 0, "unchanged": 0, "unmatched": len(skipped_skus), "unmatched_skus": skipped_skus}
+
+    matched_skus = [u["sku"] for u in updates]
+    resumed_count = 0
+    if resume and journal is not None:
+        updates, resumed_count = journal.pending_updates(updates)
+
+    unchanged = []
+    if skip_unchanged and updates:
+        if progress_callback:
+            progress_callback({'progress': 20, 'message': f'Mevcut Shopify fiyatları okunuyor ({len(updates)} varyant)...'})
+        try:
+            updates, unchanged = filter_changed_prices(shopify_api, updates)
+        except Exception as e:
+            logging.warning(f"Mevcut fiyatlar okunamadı, tüm varyantlar gönderilecek: {e}")
+    counts = {"changed": len(updates), "unchanged": len(unchanged), "unmatched": len(skipped_skus), "resumed": resumed_count}
+    logging.info(f"Fiyat farkı: {counts['changed']} değişen, {counts['unchanged']} aynı, {counts['unmatched']} eşleşmeyen varyant.")
+
+    run_id = None
+    if journal is not None:
+        run_id = journal.start_run(price_column_name, len(updates) + len(unchanged))
+        journal.record_unchanged(run_id, unchanged)
+        journal.record_targets(run_id, updates)
+    if not updates:
+        if journal is not None:
+            journal.finish_run(run_id, 0, 0, len(unchanged))
+        if progress_callback:
+            progress_callback({'progress': 100, 'message': f'✅ Gönderilecek fark yok ({len(unchanged)} güncel, {resumed_count} önceden tamamlanmış).'})
+        return {"success": 0, "failed": 0, "errors": [], "details": [], **counts, "run_id": run_id,
+                "completed_skus": matched_skus, "unmatched_skus": skipped_skus}
+
+    logging.info(f"{len(updates)} adet varyant için güncelleme başlatılıyor...")
+    result = None
+    threshold = BULK_MUTATION_THRESHOLD if bulk_threshold is None else bulk_threshold
+    # Sonuçlar parti parti günlüğe yazılır; çalışma yarıda kesilse de tamamlanan partiler devam için korunur
+    record_outcomes = (lambda batch_details: journal.record_outcomes(run_id, batch_details)) if journal is not None else None
+    if threshold and len(updates) >= threshold:
+        try:
+            result = update_prices_bulk_mutation(shopify_api, updates, progress_callback, on_batch=record_outcomes)
+        except Exception as e:
+            logging.error(f"Toplu fiyat mutasyonu başarısız, istek bazlı güncellemeye geçiliyor: {e}")
+    if result is None:
+        result = update_prices_graphql(shopify_api, updates, progress_callback, worker_count, max_retries, on_batch=record_outcomes)
+    if journal is not None:
+        journal.finish_run(run_id, result["success"], result["failed"], len(unchanged))
+    failed_skus = {d["sku"] for d in result["details"] if d["status"] != "success"}
+    completed_skus = [sku for sku in matched_skus if sku not in failed_skus]
+    return {**result, **counts, "run_id": run_id, "completed_skus": completed_skus, "unmatched_skus": skipped_skus}
+
+
+def build_price_payloads(df_to_send, variant_map, price_col, compare_col=None):
+    """
+    Fiyatlı varyant satırlarını SKU -> varyant GID tablosuyla birleştirip güncelleme listesini üretir.
+    Fiyatlar sütun bazında biçimlendirilir; Shopify'da eşleşmeyen SKU'lar anti-join ile ayrılır.
+    Dönen değerler: ([{'id', 'product_id', 'price', 'sku', 'compareAtPrice'?}], eşleşmeyen SKU listesi)
+    """
+    variant_table = pd.DataFrame({
+        'variant_id': [v['variant_id'] for v in variant_map.values()],
+        'product_id': [v['product_id'] for v in variant_map.values()],
+    }, index=pd.Index(list(variant_map), dtype=object))
+    # str() ile: boş SKU eski davranıştaki gibi 'nan' olur (astype(str) yeni pandas'ta NaN'ı korur)
+    skus = [str(sku) for sku in df_to_send['MODEL KODU'].tolist()]
+    rows = pd.DataFrame({'sku': pd.array(skus, dtype=object), 'price': df_to_send[price_col].to_numpy()})
+    if compare_col:
+        rows['compare'] = df_to_send[compare_col].to_numpy()
+    merged = rows.merge(variant_table, left_on='sku', right_index=True, how='left', indicator=True)
+    skipped_skus = merged.loc[merged['_merge'] == 'left_only', 'sku'].tolist()
+    matched = merged[merged['_merge'] == 'both']
+
+    columns = [matched['variant_id'].tolist(), matched['product_id'].tolist(),
+               matched['price'].map('{:.2f}'.format).tolist(), matched['sku'].tolist()]
+    if not compare_col:
+        updates = [{"id": i, "product_id": p, "price": price, "sku": sku} for i, p, price, sku in zip(*columns)]
+        return updates, skipped_skus
+    compare = [value if present else None for value, present in
+               zip(matched['compare'].map('{:.2f}'.format).tolist(), matched['compare'].notna().tolist())]
+    updates = [
+        {"id": i, "product_id": p, "price": price, "sku": sku, **({"compareAtPrice": c} if c is not None else {})}
+        for i, p, price, sku, c in zip(*columns, compare)
+    ]
+    return updates, skipped_skus
+
+
+def _to_cents(value):
+    """Fiyatı kuruş cinsinden tamsayıya çevirir ('12.5', 12.499999 ve '12.50' aynı sonucu verir); boşsa None."""
+    if value is None or value == "":
+        return None
+    try:
+        return int((Decimal(str(value)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        return None
+
+
+def filter_changed_prices(shopify_api, price_updates):
+    """
+    Varyantların Shopify'daki mevcut price/compareAtPrice değerlerini nodes(ids:) ile toplu okur
+    ve güncellemeleri kuruş bazında ikiye ayırır: (değişenler, değişmeyenler).
+    compareAtPrice yalnızca güncellemede gönderiliyorsa karşılaştırılır; okunamayan varyant değişmiş sayılır.
+    """
+    with sync_metrics.span('price.current_price_read'):
+        current = shopify_api.get_nodes([u["id"] for u in price_updates], CURRENT_PRICE_FIELDS)
+    changed, unchanged = [], []
+    for update in price_updates:
+        node = current.get(update["id"])
+        if node is not None and _to_cents(node.get("price")) == _to_cents(update["price"]) and (
+                "compareAtPrice" not in update or _to_cents(node.get("compareAtPrice")) == _to_cents(update["compareAtPrice"])):
+            unchanged.append(update)
+        else:
+            changed.append(update)
+    return changed, unchanged
+
+
+def _pack_price_batches(product_groups, products_per_request):
+    """Ürün gruplarını, istek başına ürün ve varyant sınırlarını aşmayacak şekilde paketler."""
+    batches, current, variant_count = [], [], 0
+    for product_id, variants in product_groups:
+        if current and (len(current) >= products_per_request or variant_count + len(variants) > MAX_VARIANTS_PER_REQUEST):
+            batches.append(current)
+            current, variant_count = [], 0
+        current.append((product_id, variants))
+        variant_count += len(variants)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _build_price_mutation(batch):
+    """Her ürün için bir productVariantsBulkUpdate alias'ı içeren tek mutasyon ve değişkenlerini üretir."""
+    definitions, fields, variables = [], [], {}
+    for index, (product_id, variants) in enumerate(batch):
+        definitions.append(f"$product{index}: ID!, $variants{index}: [ProductVariantsBulkInput!]!")
+        fields.append(
+            f"p{index}: productVariantsBulkUpdate(productId: $product{index}, variants: $variants{index}) "
+            "{ productVariants { id } userErrors { field message } }"
+        )
+        variables[f"product{index}"] = product_id
+        variables[f"variants{index}"] = [
+            {key: value for key, value in v.items() if key in ("id", "price", "compareAtPrice")} for v in variants
+        ]
+    query = f"mutation bulkPriceUpdate({', '.join(definitions)}) {{\n  " + "\n  ".join(fields) + "\n}"
+    return query, variables
+
+
+def _price_detail(update, status, reason):
+    return {"status": status, "variant_id": update.get("id"), "sku": update.get("sku", "Unknown"),
+            "price": update.get("price"), "reason": reason}
+
+
+def _product_details(variants, result):
+    """Tek ürünün productVariantsBulkUpdate yanıtını, varyant bazındaki userErrors'ları da eşleyerek detay satırlarına çevirir."""
+    if result is None:
+        return [_price_detail(v, "failed", "Shopify yanıt vermedi.") for v in variants]
+    variant_errors, product_errors = {}, []
+    for error in result.get("userErrors") or []:
+        field = error.get("field") or []
+        # field: ["variants", "<sıra>", "price"] -> ilgili varyant; aksi halde tüm ürün
+        if len(field) >= 2 and field[0] == "variants" and str(field[1]).isdigit():
+            variant_errors.setdefault(int(field[1]), []).append(error.get("message", ""))
+        else:
+            product_errors.append(error.get("message", ""))
+    details = []
+    for position, variant in enumerate(variants):
+        messages = product_errors + variant_errors.get(position, [])
+        if messages:
+            details.append(_price_detail(variant, "failed", f"Hata: {'; '.join(messages)[:100]}"))
+        else:
+            details.append(_price_detail(variant, "success", "Başarıyla güncellendi."))
+    return details
+
+
+def _batch_details(batch, data):
+    """Alias'lı mutasyon yanıtını ürün sırasına göre detay satırlarına çevirir."""
+    details = []
+    for index, (product_id, variants) in enumerate(batch):
+        details.extend(_product_details(variants, (data or {}).get(f"p{index}")))
+    return details
+
+
+def update_prices_graphql(shopify_api, price_updates, progress_callback=None, worker_count=4, max_retries=3, on_batch=None):
+    """
+    Varyant fiyatlarını ürün bazında productVariantsBulkUpdate ile günceller; maliyet bütçesi
+    elverdiğince birden fazla ürün alias'larla tek istekte gönderilir. Her güncelleme 'product_id'
+    içermelidir. Dönen sonuç {"success", "failed", "errors", "details"} biçimindedir.
+    on_batch verilirse her istek tamamlandığında o isteğin detaylarıyla (çağıran iş parçacığında) çağrılır.
+    """
+    groups = {}
+    for update in price_updates:
+        groups.setdefault(update["product_id"], []).append(update)
+
+    # Eşzamanlı işçiler kovayı paylaşır; istek başına ürün sayısı kova boyutuna göre sınırlanır
+    bucket_size = shopify_api.get_throttle_model()['graphql_bucket_size']
+    products_per_request = max(1, min(MAX_PRODUCTS_PER_REQUEST, int(bucket_size // (BULK_UPDATE_COST * max(1, worker_count)))))
+    batches = _pack_price_batches(list(groups.items()), products_per_request)
+    total = len(price_updates)
+    logging.info(f"🚀 {total} varyant, {len(groups)} ürün için {len(batches)} GraphQL isteği ({worker_count} worker) ile güncelleniyor...")
+    if progress_callback:
+        progress_callback({'progress': 25, 'message': f'🚀 {len(groups)} ürün, {len(batches)} istekte güncelleniyor...'})
+
+    def send_batch(batch):
         for attempt in range(max_retries):
             try:
-                # İstek göndermeden önce hız limitini bekle
-                rate_limiter.wait()
-
-                endpoint = f"variants/{variant_id_numeric}.json"
-                
-                # REST API için doğru payload formatı
-                data_to_send = {"variant": {"id": int(variant_id_numeric), "price": variant_payload["price"]}}
-                if "compareAtPrice" in variant_payload:
-                    data_to_send["variant"]["compare_at_price"] = variant_payload["compareAtPrice"]
-
-                # _make_request'e dictionary olarak gönderiyoruz, o JSON'a çeviriyor
-                shopify_api._make_request("PUT", endpoint, data=data_to_send)
-                
-                success_count += 1
-                logging.info(f"✅ Varyant {variant_id_numeric} başarıyla güncellendi: {variant_payload['price']}")
-                break # Başarılı oldu, bir sonraki varyanta geç
-
-            except requests.exceptions.HTTPError as e:
-                if e.response is not None and e.response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    logging.warning(f"Rate limit! {variant_id_numeric} için {wait_time:.1f}s bekleniyor...")
-                    time.sleep(wait_time)
-                else:
-                    error_msg = f"Varyant {variant_id_numeric} güncellenemedi: {e}"
-                    logging.error(error_msg)
-                    errors.append(error_msg)
-                    break # Hata kalıcı, bir sonraki varyanta geç
+                shopify_api.wait_for_graphql_budget(BULK_UPDATE_COST * len(batch))
+                query, variables = _build_price_mutation(batch)
+                with sync_metrics.span('price.bulk_update_request'):
+                    data = shopify_api.execute_graphql(query, variables)
+                return _batch_details(batch, data)
             except Exception as e:
                 if attempt < max_retries - 1:
-                    time.sleep(1)
+                    sync_metrics.increment('price.retries')
+                    sync_metrics.sleep((2 ** attempt) + random.uniform(0, 1), 'price_retry_backoff')
+                    continue
+                logging.error(f"{len(batch)} ürünlük fiyat isteği başarısız: {e}")
+                return [_price_detail(v, "failed", f"Hata: {str(e)[:100]}") for _, variants in batch for v in variants]
+
+    details, errors = [], []
+    success_count = failed_count = 0
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, worker_count)) as executor:
+        futures = [executor.submit(sync_metrics.bind(send_batch), batch) for batch in batches]
+        for future in as_completed(futures):
+            batch_details = future.result()
+            details.extend(batch_details)
+            if on_batch:
+                on_batch(batch_details)
+            for detail in batch_details:
+                if detail["status"] == "success":
+                    success_count += 1
                 else:
-                    error_msg = f"Varyant {variant_id_numeric} güncellenemedi (Genel Hata): {e}"
-                    logging.error(error_msg)
-                    errors.append(error_msg)
-                    break
+                    failed_count += 1
+                    errors.append(detail["reason"])
+            if progress_callback:
+                processed = success_count + failed_count
+                elapsed = time.time() - start_time
+                rate = processed / elapsed if elapsed > 0 else 0
+                eta = (total - processed) / rate if rate > 0 else 0
+                progress_callback({
+                    'progress': 25 + int((processed / total) * 70),
+                    'message': f'⚡ Güncelleme: {processed}/{total} (✅ {success_count} / ❌ {failed_count}) - {rate:.1f}/s',
+                    'stats': {'rate': rate, 'eta': eta / 60}
+                })
 
-    if errors:
-        return {"status": "failed", "reason": "; ".join(errors)}
-    else:
-        logging.info(f"✅ Ürün {product_id.split('/')[-1]} için {success_count} varyant başarıyla güncellendi.")
-        return {"status": "success", "updated_count": success_count}
+    elapsed = time.time() - start_time
+    logging.info(f"🎉 Fiyat güncellemesi tamamlandı. Süre: {elapsed:.1f}s, Başarılı: {success_count}, Başarısız: {failed_count}")
+    if progress_callback:
+        progress_callback({'progress': 100, 'message': f'✅ Tamamlandı! Başarılı: {success_count}, Başarısız: {failed_count} ({elapsed:.1f} saniye)'})
+    return {"success": success_count, "failed": failed_count, "errors": errors, "details": details}
 
 
-def _process_one_product_for_price_sync(shopify_api, product_base_sku, all_variants_df, price_data_df, price_col, compare_col, rate_limiter):
+def update_prices_bulk_mutation(shopify_api, price_updates, progress_callback=None, on_batch=None):
     """
-    DÜZELTME: Tek bir ürünü baştan sona işleyen worker fonksiyonu.
-    Varyant eşleştirme mantığı tamamen düzeltildi.
+    Çok büyük fiyat gönderimleri için: ürün başına bir satır içeren JSONL dosyası diske yazılır,
+    staged upload ile yüklenir ve tek bulkOperationRunMutation olarak çalıştırılır. Toplu işlem
+    maliyet kovasını tüketmediği için süre istek sayısıyla değil Shopify'ın iş kuyruğuyla belirlenir.
+    Sonuç dosyası satır numarasıyla ürünlere, userErrors da varyantlara eşlenir; dönüş biçimi
+    update_prices_graphql ile aynıdır; on_batch, sonuç dosyası işlenir işlenmez tüm detaylarla çağrılır.
     """
+    groups = {}
+    for update in price_updates:
+        groups.setdefault(update["product_id"], []).append(update)
+    products = list(groups.items())
+    total = len(price_updates)
+    logging.info(f"📦 {total} varyant, {len(products)} ürün için toplu mutasyon hazırlanıyor...")
+    if progress_callback:
+        progress_callback({'progress': 20, 'message': f'📦 {len(products)} ürün için toplu mutasyon dosyası hazırlanıyor...'})
+
+    start_time = time.time()
+    handle, variables_path = tempfile.mkstemp(prefix="price_bulk_", suffix=".jsonl")
     try:
-        # 1. Önce bu ürüne ait tüm varyant SKU'larını bulalım
-        product_variants = all_variants_df[all_variants_df['base_sku'] == product_base_sku]
-        if product_variants.empty:
-            return {"status": "failed", "reason": f"Varyant listesinde ürün bulunamadı: {product_base_sku}"}
-        
-        variant_skus = product_variants['MODEL KODU'].tolist()
-        logging.info(f"Ürün {product_base_sku} için {len(variant_skus)} varyant bulundu: {variant_skus}")
-        
-        # 2. Bu varyant SKU'ları için Shopify'dan ID'leri alalım
-        variant_map = shopify_api.get_variant_ids_by_skus(variant_skus, search_by_product_sku=False)
-        if not variant_map:
-            return {"status": "failed", "reason": f"Shopify'da varyantlar bulunamadı: {variant_skus}"}
-
-        # 3. Ana ürünün hesaplanmış fiyatını bul
-        price_row = price_data_df.loc[price_data_df['MODEL KODU'] == product_base_sku]
-        if price_row.empty:
-            return {"status": "skipped", "reason": f"Hesaplanmış fiyat listesinde ürün bulunamadı: {product_base_sku}"}
-        
-        price_to_set = price_row.iloc[0][price_col]
-        compare_price_to_set = price_row.iloc[0].get(compare_col)
-
-        # 4. Her varyant için güncelleme verisini hazırla
-        updates = []
-        for variant_sku in variant_skus:
-            if variant_sku in variant_map:
-                variant_info = variant_map[variant_sku]
-                payload = {
-                    "id": variant_info['variant_id'], 
-                    "price": f"{price_to_set:.2f}",
-                    "sku": variant_sku  # Debug için ekliyoruz
-                }
-                if compare_price_to_set is not None and pd.notna(compare_price_to_set):
-                    payload["compareAtPrice"] = f"{compare_price_to_set:.2f}"
-                updates.append(payload)
-                logging.info(f"Varyant {variant_sku} için fiyat güncelleme hazırlandı: {price_to_set:.2f}")
-            else:
-                logging.warning(f"Varyant SKU {variant_sku} Shopify'da bulunamadı")
-
-        if not updates:
-            return {"status": "skipped", "reason": "Shopify'da eşleşen varyant bulunamadı."}
-
-        # 5. Product ID'yi ilk varyanttan alalım
-        first_variant_info = list(variant_map.values())[0]
-        product_id = first_variant_info['product_id']
-
-        # 6. REST tabanlı güncelleme fonksiyonunu çağır
-        result = update_prices_for_single_product(shopify_api, product_id, updates, rate_limiter)
-        
-        # Sonucu detaylandır
-        if result.get('status') == 'success':
-            rate_limiter.on_success()  # Başarı durumunda hızlan
-        elif "throttled" in result.get('reason', '').lower():
-            rate_limiter.on_throttle()  # Throttle durumunda yavaşla
-            
-        return result
-    except Exception as e:
-        if "throttled" in str(e).lower():
-            rate_limiter.on_throttle()
-        return {"status": "failed", "reason": str(e)}
\ No newline at end of file
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            for product_id, variants in products:
+                line = {"productId": product_id, "variants": [
+                    {key: value for key, value in v.items() if key in ("id", "price", "compareAtPrice")} for v in variants
+                ]}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+        def forward(update):
+            if progress_callback:
+                progress_callback({'progress': 50, 'message': update.get('message', '')})
+
+        with sync_metrics.span('price.bulk_mutation'):
+            results = shopify_api.run_bulk_mutation(BULK_PRICE_MUTATION, variables_path, progress_callback=forward)
+    finally:
+        os.remove(variables_path)
+
+    by_line = {line.get("__lineNumber"): (line.get("data") or {}).get("productVariantsBulkUpdate") for line in results}
+    details = []
+    for line_number, (product_id, variants) in enumerate(products):
+        details.extend(_product_details(variants, by_line.get(line_number)))
+    if on_batch:
+        on_batch(details)
+
+    success_count = sum(1 for d in details if d["status"] == "success")
+    failed_count = len(details) - success_count
+    errors = [d["reason"] for d in details if d["status"] != "success"]
+    elapsed = time.time() - start_time
+    logging.info(f"🎉 Toplu fiyat mutasyonu tamamlandı. Süre: {elapsed:.1f}s, Başarılı: {success_count}, Başarısız: {failed_count}")
+    if progress_callback:
+        progress_callback({'progress': 100, 'message': f'✅ Tamamlandı! Başarılı: {success_count}, Başarısız: {failed_count} ({elapsed:.1f} saniye)'})
+    return {"success": success_count, "failed": failed_count, "errors": errors, "details": details}
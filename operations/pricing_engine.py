@@ -0,0 +1,168 @@
+# operations/pricing_engine.py (Fiyat Hesaplayıcı için vektörel fiyatlandırma motoru)
+
+import math
+
+import numpy as np
+import pandas as pd
+
+ROUND_UP = "Yukarı Yuvarla"
+ROUND_DOWN = "Aşağı Yuvarla"
+MARKUP_PERCENT = "Yüzde Ekle (%)"
+MARKUP_MULTIPLIER = "Çarpan Kullan (x)"
+
+
+def apply_rounding(price, method):
+    """Tek fiyat için X9.99 yuvarlaması (referans sürüm; round_prices bununla birebir aynı sonucu verir)."""
+    if method == ROUND_UP:
+        if price % 10 != 9.99 and price % 10 != 9:
+            return math.floor(price / 10) * 10 + 9.99
+        elif price % 1 == 0:
+            return price - 0.01
+        return price
+    elif method == ROUND_DOWN:
+        return math.floor(price / 10) * 10 - 0.01 if price > 10 else 9.99
+    return price
+
+
+def round_prices(prices, method):
+    """
+    apply_rounding'in NumPy sürümü: tüm fiyat dizisini satır başına Python çağrısı yapmadan yuvarlar.
+    np.remainder Python'daki float '%' ile aynı sonucu verdiği için çıktı bit düzeyinde aynıdır.
+    (apply_rounding NaN/sonsuz fiyatta hata fırlatır; burada sonuç NaN olur.)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        if method == ROUND_UP:
+            remainder = np.remainder(prices, 10)
+            rounded_up = np.floor(prices / 10) * 10 + 9.99
+            whole = np.where(np.remainder(prices, 1) == 0, prices - 0.01, prices)
+            return np.where((remainder != 9.99) & (remainder != 9), rounded_up, whole)
+        if method == ROUND_DOWN:
+            return np.where(prices > 10, np.floor(prices / 10) * 10 - 0.01, 9.99)
+    return prices.copy()
+
+
+def profit_and_margin(sale_prices, purchase_prices, vat_rate, vat_included=True):
+    """KDV'li satış fiyatından kâr ve alış fiyatına göre kâr oranını (%) hesaplar; alış fiyatı 0 ise oran 0'dır."""
+    sale_prices = np.asarray(sale_prices, dtype=np.float64)
+    purchase_prices = np.asarray(purchase_prices, dtype=np.float64)
+    revenue = sale_prices / (1 + vat_rate / 100) if vat_included else sale_prices
+    profit = revenue - purchase_prices
+    margin = np.divide(profit, purchase_prices, out=np.zeros_like(profit), where=purchase_prices != 0) * 100
+    return profit, margin
+
+
+def calculate_prices(df, markup_type, markup_value, add_vat, vat_rate, rounding_method):
+    """
+    'ALIŞ FİYATI' sütunundan kâr marjı, KDV, X9.99 yuvarlaması, kâr ve kâr oranı sütunlarını
+    tek geçişte hesaplar. Sayfadaki satır satır hesapla aynı değerleri üreten yeni bir DataFrame döner.
+    """
+    result = df.copy()
+    purchase = result['ALIŞ FİYATI'].to_numpy(dtype=np.float64)
+    if markup_type == MARKUP_PERCENT:
+        without_vat = purchase * (1 + markup_value / 100)
+    else:
+        without_vat = purchase * markup_value
+    with_vat = without_vat * (1 + vat_rate / 100) if add_vat else without_vat
+    final = round_prices(with_vat, rounding_method)
+    profit, margin = profit_and_margin(final, purchase, vat_rate, add_vat)
+
+    index = result.index
+    result['SATIS_FIYATI_KDVSIZ'] = pd.Series(without_vat, index=index)
+    result['SATIS_FIYATI_KDVLI'] = pd.Series(with_vat, index=index)
+    result['NIHAI_SATIS_FIYATI'] = pd.Series(final, index=index)
+    result['KÂR'] = pd.Series(profit, index=index)
+    result['KÂR ORANI (%)'] = pd.Series(margin, index=index)
+    return result
+
+
+# Senaryo ızgarası sütunları (sayfadaki widget'ların karşılıkları)
+SCENARIO_COLUMNS = ['KÂR MARJI TİPİ', 'DEĞER', 'KDV ORANI (%)', 'YUVARLAMA', 'İNDİRİM ORANI (%)', 'TOPTAN ÇARPANI']
+
+
+def scenario_grid(markup_types=(MARKUP_PERCENT,), markup_values=(100.0,), vat_rates=(10,),
+                  rounding_methods=(ROUND_UP,), discounts=(0,), wholesale_multipliers=(1.8,)):
+    """
+    Verilen seçeneklerin tüm kombinasyonlarından senaryo tablosu üretir (satır başına bir senaryo).
+    KDV'siz satış için KDV oranı 0 verilir; sonuç 'KDV dahil etme' seçeneğiyle birebir aynıdır.
+    """
+    index = pd.MultiIndex.from_product(
+        [markup_types, markup_values, vat_rates, rounding_methods, discounts, wholesale_multipliers], names=SCENARIO_COLUMNS
+    )
+    return index.to_frame(index=False)
+
+
+def _scenario_matrices(purchase, grid):
+    """Her senaryo için (senaryo sayısı x SKU sayısı) boyutlu fiyat/kâr matrislerini yayınlama (broadcasting) ile hesaplar."""
+    markup_values = grid['DEĞER'].to_numpy(dtype=np.float64)
+    factor = np.where(grid['KÂR MARJI TİPİ'].to_numpy() == MARKUP_PERCENT, 1 + markup_values / 100, markup_values)[:, None]
+    vat_rate = grid['KDV ORANI (%)'].to_numpy(dtype=np.float64)[:, None]
+    discount = grid['İNDİRİM ORANI (%)'].to_numpy(dtype=np.float64)[:, None]
+    multiplier = grid['TOPTAN ÇARPANI'].to_numpy(dtype=np.float64)[:, None]
+    purchase = purchase[None, :]
+
+    without_vat = purchase * factor
+    with_vat = without_vat * (1 + vat_rate / 100)
+    final = np.empty_like(with_vat)
+    rounding = grid['YUVARLAMA'].to_numpy()
+    for method in pd.unique(rounding):
+        rows = rounding == method
+        final[rows] = round_prices(with_vat[rows], method)
+    profit, margin = profit_and_margin(final, purchase, vat_rate)
+
+    discounted = final * (1 - discount / 100)
+    discount_profit, discount_margin = profit_and_margin(discounted, purchase, vat_rate)
+
+    wholesale = purchase * multiplier
+    wholesale_profit, wholesale_margin = profit_and_margin(wholesale, purchase, 0)
+    return {
+        'SATIS_FIYATI_KDVSIZ': without_vat, 'NIHAI_SATIS_FIYATI': final, 'KÂR': profit, 'KÂR ORANI (%)': margin,
+        'İNDİRİMLİ SATIŞ FİYATI': discounted, 'İNDİRİM SONRASI KÂR': discount_profit,
+        'İNDİRİM SONRASI KÂR ORANI (%)': discount_margin,
+        "TOPTAN FİYAT (KDV'siz)": wholesale, "TOPTAN FİYAT (KDV'li)": wholesale * (1 + vat_rate / 100),
+        'TOPTAN KÂR': wholesale_profit, 'TOPTAN KÂR ORANI (%)': wholesale_margin,
+    }
+
+
+def _summarize_scenarios(grid, matrices, margin_threshold):
+    summary = grid.copy()
+    margin = matrices['KÂR ORANI (%)']
+    p10, median, p90 = np.nanpercentile(margin, [10, 50, 90], axis=1)
+    summary['ORTALAMA KÂR ORANI (%)'] = np.nanmean(margin, axis=1)
+    summary['P10 KÂR ORANI (%)'] = p10
+    summary['MEDYAN KÂR ORANI (%)'] = median
+    summary['P90 KÂR ORANI (%)'] = p90
+    summary['EN DÜŞÜK KÂR ORANI (%)'] = np.nanmin(margin, axis=1)
+    summary['TOPLAM KÂR'] = np.nansum(matrices['KÂR'], axis=1)
+    summary['EŞİK ALTI SKU'] = (margin < margin_threshold).sum(axis=1)
+    summary['İNDİRİM SONRASI ORTALAMA KÂR ORANI (%)'] = np.nanmean(matrices['İNDİRİM SONRASI KÂR ORANI (%)'], axis=1)
+    summary['İNDİRİM SONRASI EŞİK ALTI SKU'] = (matrices['İNDİRİM SONRASI KÂR ORANI (%)'] < margin_threshold).sum(axis=1)
+    summary['TOPTAN ORTALAMA KÂR ORANI (%)'] = np.nanmean(matrices['TOPTAN KÂR ORANI (%)'], axis=1)
+    summary['TOPTAN EŞİK ALTI SKU'] = (matrices['TOPTAN KÂR ORANI (%)'] < margin_threshold).sum(axis=1)
+    return summary
+
+
+def evaluate_scenarios(purchase_prices, grid, skus=None, margin_threshold=0.0, tidy=True):
+    """
+    Alış fiyatı vektörü için senaryo tablosundaki (bkz. scenario_grid) tüm senaryoları tek seferde hesaplar.
+    Dönen değerler:
+      - uzun biçimli sonuç: senaryo x SKU başına bir satır (tidy=False ise None),
+      - özet: senaryo başına kâr oranı dağılımı ve kâr oranı margin_threshold'un altında kalan SKU sayıları.
+    Perakende sütunları calculate_prices ile aynı senaryoda birebir aynı değerleri verir.
+    """
+    purchase = np.asarray(purchase_prices, dtype=np.float64)
+    grid = grid.reset_index(drop=True)
+    matrices = _scenario_matrices(purchase, grid)
+    summary = _summarize_scenarios(grid, matrices, margin_threshold)
+    if not tidy:
+        return None, summary
+
+    scenario_count, sku_count = len(grid), len(purchase)
+    skus = np.asarray(skus) if skus is not None else np.arange(sku_count)
+    result = pd.DataFrame({
+        'SENARYO': np.repeat(np.arange(scenario_count), sku_count),
+        'MODEL KODU': np.tile(skus, scenario_count),
+        'ALIŞ FİYATI': np.tile(purchase, scenario_count),
+        **{column: values.ravel() for column, values in matrices.items()},
+    })
+    return result, summary
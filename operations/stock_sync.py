@@ -5,6 +5,8 @@ import time
 from utils import get_variant_color, get_variant_size, get_apparel_sort_key
 import json 
 
+import sync_metrics
+
 def sync_stock_and_variants(shopify_api, product_gid, sentos_product):
     """Bir ürünün varyantlarını ve stoklarını senkronize eder."""
     changes = []
@@ -15,13 +17,14 @@ def sync_stock_and_variants(shopify_api, product_gid, sentos_product):
     s_vars = sentos_product.get('variants', []) or [sentos_product]
     
     new_vars = [v for v in s_vars if str(v.get('sku','')).strip() not in ex_skus]
+    all_now_variants = ex_vars
     if new_vars:
         msg = f"{len(new_vars)} yeni varyant eklendi."
         changes.append(msg)
-        _add_variants(shopify_api, product_gid, new_vars, sentos_product)
-        time.sleep(3) # Varyantların işlenmesi için bekle
+        created = _add_variants(shopify_api, product_gid, new_vars, sentos_product)
+        # Sabit bekleme yerine oluşturma yanıtındaki varyantlar kullanılır; eksik kalırsa kısa yoklama yapılır
+        all_now_variants = _wait_for_variants(shopify_api, product_gid, ex_vars + created, new_vars)
     
-    all_now_variants = _get_shopify_variants(shopify_api, product_gid)
     if adjustments := _prepare_inventory_adjustments(s_vars, all_now_variants):
         msg = f"{len(adjustments)} varyantın stok seviyesi güncellendi."
         changes.append(msg)
@@ -81,6 +84,22 @@ def _add_variants(shopify_api, product_gid, new_variants, main_product):
     bulk_q="""mutation pVBC($pId:ID!,$v:[ProductVariantInput!]!){productVariantsBulkCreate(productId:$pId,variants:$v){productVariants{id inventoryItem{id sku}} userErrors{field message}}}"""
     res=shopify_api.execute_graphql(bulk_q,{"pId":product_gid,"v":v_in})
     # ... Hata yönetimi ve aktivasyon eklenebilir ...
+    return (res.get('productVariantsBulkCreate') or {}).get('productVariants') or []
+
+def _wait_for_variants(shopify_api, product_gid, known_variants, new_vars, initial_delay=0.25, max_delay=2.0, timeout=10):
+    """Yeni varyant SKU'ları bilinen listede yoksa, görünene kadar üstel aralıklarla varyantları yeniden okur."""
+    expected = {str(v.get('sku','')).strip() for v in new_vars if v.get('sku')}
+    variants, delay, start = known_variants, initial_delay, time.monotonic()
+    while True:
+        present = {str(v.get('inventoryItem',{}).get('sku','')).strip() for v in variants}
+        if expected <= present:
+            return variants
+        if time.monotonic() - start >= timeout:
+            logging.warning(f"Ürün {product_gid} için {len(expected - present)} yeni varyant {timeout}s içinde görünmedi.")
+            return variants
+        sync_metrics.sleep(delay, 'variant_readiness_poll')
+        variants = _get_shopify_variants(shopify_api, product_gid)
+        delay = min(max_delay, delay * 2)
 
 # NOTE: productUpdate mutasyonu ile options alanını güncellemeye çalışan
 # _sync_product_options fonksiyonu kaldırılmıştır. Bu işlev, varyant oluşturma
@@ -0,0 +1,199 @@
+# operations/sync_plan.py (Kuru çalıştırma / plan ve maliyet tahmini)
+
+import logging
+import math
+
+from connectors.shopify_api import ShopifyAPI
+
+FULL_SYNC_MODE = "Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)"
+
+# Her işlem tipi için (api, yaklaşık GraphQL maliyet puanı).
+# Mutasyonlar Shopify'da sabit 10 puan; okuma maliyeti dönen nesne sayısına göre hesaplanır.
+OPERATION_COSTS = {
+    'product_update': ('graphql', 10),
+    'product_create': ('graphql', 10),
+    'variant_read': ('graphql', None),
+    'variant_create': ('graphql', 10),
+    'inventory_set': ('graphql', 10),
+    'location_read': ('graphql', 2),
+    'media_read': ('graphql', None),
+    'media_create': ('graphql', 10),
+    'media_delete': ('graphql', 10),
+    'media_reorder': ('graphql', 10),
+    'sentos_image_fetch': ('sentos', 0),
+}
+
+# Medya toplu okumada (ShopifyAPI.get_products_media_details varsayılanları) sorgu başına ürün sayısı
+MEDIA_READ_BATCH = ShopifyAPI.media_read_batch_size()
+
+# İşlemler içinde sabit kodlanmış beklemeler (saniye)
+FIXED_SLEEPS = {
+    'product_create': 1,    # sync_runner._create_product
+}
+
+# Yeni medyanın Shopify'da READY olması için tipik süre. İşçiler beklemez (media_readiness);
+# yalnızca çalışma sonunda son eklenen medyanın sıralaması için bir kez beklenir.
+MEDIA_READY_SECONDS = 10
+
+
+def get_update_steps(sync_mode):
+    """Senkronizasyon moduna göre mevcut bir üründe çalışacak adımları döndürür."""
+    steps = set()
+    if sync_mode in [FULL_SYNC_MODE, "Sadece Açıklamalar"]:
+        steps.add('details')
+    if sync_mode in [FULL_SYNC_MODE, "Sadece Stok ve Varyantlar"]:
+        steps.add('stock')
+    if sync_mode in [FULL_SYNC_MODE, "Sadece Resimler", "SEO Alt Metinli Resimler"]:
+        steps.add('media')
+    return steps
+
+
+def _variant_read_cost(variant_count):
+    # variants{ id inventoryItem{ id sku } } -> varyant başına ~2 nesne + kök ürün
+    return 2 + 2 * max(1, variant_count)
+
+
+def _new_plan():
+    return {
+        'operations': {op: 0 for op in OPERATION_COSTS},
+        'graphql_cost': 0,
+        'products': {'update': 0, 'create': 0, 'skip': 0},
+        'media_products': 0,
+        'media_images': 0,
+        'new_variants': 0,
+        'fixed_sleep_seconds': 0,
+        'prefetch': {},
+    }
+
+
+def _add_op(plan, op, count=1, cost=None):
+    if count <= 0:
+        return
+    plan['operations'][op] += count
+    default_cost = OPERATION_COSTS[op][1]
+    plan['graphql_cost'] += (cost if cost is not None else (default_cost or 0)) * count
+    plan['fixed_sleep_seconds'] += FIXED_SLEEPS.get(op, 0) * count
+
+
+def _plan_stock(plan, shopify_api, sentos_product):
+    s_vars = sentos_product.get('variants', []) or [sentos_product]
+    read_cost = _variant_read_cost(len(s_vars))
+    _add_op(plan, 'variant_read', cost=read_cost)
+
+    # Önbellekte bulunmayan varyant SKU'ları Shopify'da oluşturulacak
+    new_vars = [v for v in s_vars if (sku := str(v.get('sku', '')).strip()) and f"sku:{sku}" not in shopify_api.product_cache]
+    if new_vars:
+        # Oluşturulan varyantlar mutasyon yanıtından alınır, yeniden okuma gerekmez
+        plan['new_variants'] += len(new_vars)
+        _add_op(plan, 'variant_create')
+
+    if len(new_vars) < len(s_vars):
+        _add_op(plan, 'inventory_set')
+
+
+def _plan_media(plan, sentos_product):
+    plan['media_products'] += 1
+    plan['media_images'] += len(sentos_product.get('images', []) or [])
+    _add_op(plan, 'sentos_image_fetch')
+
+
+def build_sync_plan(shopify_api, products, sync_mode, find_shopify_product):
+    """
+    Hiçbir mutasyon göndermeden, önbelleğe alınmış Shopify verisi ve Sentos ürünleri
+    üzerinden tam bir değişiklik planı çıkarır.
+    """
+    plan = _new_plan()
+    steps = get_update_steps(sync_mode)
+
+    for sentos_product in products:
+        if not sentos_product.get('name', '').strip():
+            plan['products']['skip'] += 1
+            continue
+
+        existing_product = find_shopify_product(shopify_api, sentos_product)
+        if existing_product:
+            if "Sadece Eksik" in sync_mode:
+                plan['products']['skip'] += 1
+                continue
+            plan['products']['update'] += 1
+            if 'details' in steps:
+                _add_op(plan, 'product_update')
+                if sentos_product.get('category'):
+                    _add_op(plan, 'product_update')
+            if 'stock' in steps:
+                _plan_stock(plan, shopify_api, sentos_product)
+            if 'media' in steps:
+                _plan_media(plan, sentos_product)
+        elif "Tam Senkronizasyon" in sync_mode or "Sadece Eksik" in sync_mode:
+            plan['products']['create'] += 1
+            _add_op(plan, 'product_create')
+        else:
+            plan['products']['skip'] += 1
+
+    if plan['media_products']:
+        # Medya okuması ürün başına değil, nodes(ids:) ile toplu yapılır (sync_runner._prefetch_media)
+        batches = math.ceil(plan['media_products'] / MEDIA_READ_BATCH)
+        _add_op(plan, 'media_read', count=batches, cost=(2 * plan['media_products'] + plan['media_images']) / batches)
+
+    if plan['operations']['inventory_set'] and not shopify_api.location_id:
+        _add_op(plan, 'location_read')
+
+    logging.info(f"Kuru çalıştırma planı hazırlandı: {plan['products']} | İşlemler: {plan['operations']}")
+    return plan
+
+
+def estimate_plan_duration(plan, throttle_model, max_workers=1):
+    """
+    Planın mevcut hız limiti modeliyle ne kadar süreceğini tahmin eder.
+    Medya değişiklikleri okuma yapmadan bilinemediği için ayrıca en kötü durum da hesaplanır.
+    """
+    ops = plan['operations']
+    graphql_calls = sum(count for op, count in ops.items() if OPERATION_COSTS[op][0] == 'graphql')
+    sentos_calls = sum(count for op, count in ops.items() if OPERATION_COSTS[op][0] == 'sentos')
+
+    # Tüm işçiler aynı ShopifyAPI hız sınırlayıcısını paylaştığı için istekler sıralı ilerler
+    per_request = max(
+        throttle_model['min_request_interval'],
+        throttle_model['adaptive_delay'],
+        60.0 / throttle_model['max_requests_per_minute']
+    )
+    request_seconds = graphql_calls * per_request
+    cost_seconds = max(0, plan['graphql_cost'] - throttle_model['graphql_bucket_size']) / throttle_model['graphql_restore_rate']
+    api_seconds = max(request_seconds, cost_seconds)
+
+    # Sabit beklemeler işçiler arasında paralel geçer
+    workers = max(1, max_workers)
+    sleep_seconds = plan['fixed_sleep_seconds'] / workers
+
+    # En kötü durum: medya kontrol edilen her üründe ekleme + silme + sıralama yapılır
+    media_products = plan['media_products']
+    worst_media_calls = media_products * 4  # ekleme, silme, durum yoklaması, sıralama
+    worst_media_cost = media_products * (10 * 3 + 2 + plan['media_images'] / max(1, media_products))
+    worst_api_seconds = max(
+        (graphql_calls + worst_media_calls) * per_request,
+        max(0, plan['graphql_cost'] + worst_media_cost - throttle_model['graphql_bucket_size']) / throttle_model['graphql_restore_rate']
+    )
+    worst_sleep_seconds = plan['fixed_sleep_seconds'] / workers + (MEDIA_READY_SECONDS if media_products else 0)
+
+    prefetch_seconds = plan['prefetch'].get('seconds', 0)
+
+    return {
+        'graphql_calls': graphql_calls,
+        'rest_calls': plan['prefetch'].get('shopify_rest_pages', 0),
+        'sentos_calls': sentos_calls + plan['prefetch'].get('sentos_pages', 0),
+        'graphql_cost': int(round(plan['graphql_cost'])),
+        'seconds_per_request': round(per_request, 3),
+        'projected_seconds': round(prefetch_seconds + api_seconds + sleep_seconds, 1),
+        'projected_seconds_worst_case': round(prefetch_seconds + worst_api_seconds + worst_sleep_seconds, 1),
+        'prefetch_seconds': round(prefetch_seconds, 1),
+    }
+
+
+def record_prefetch(plan, shopify_product_count, sentos_product_count, seconds, throttle_model, sentos_page_size=100):
+    """Plan çıkarılırken yapılan okuma çağrılarını (önbellek ve Sentos sayfaları) plana işler."""
+    plan['prefetch'] = {
+        'shopify_rest_pages': max(1, math.ceil(shopify_product_count / throttle_model['cache_page_size'])),
+        'sentos_pages': max(1, math.ceil(sentos_product_count / sentos_page_size)),
+        'seconds': seconds,
+    }
+    return plan
@@ -136,6 +136,21 @@ def display_progress(title, results_key, log_key):
     st.session_state.sync_missing_running = False
     st.rerun()
 
+def display_plan(plan):
+    estimate = plan.get('estimate', {})
+    st.info("🧪 Bu bir kuru çalıştırmaydı: Shopify'a hiçbir değişiklik gönderilmedi.")
+    cols = st.columns(4)
+    cols[0].metric("GraphQL Çağrısı", estimate.get('graphql_calls', 0))
+    cols[1].metric("Tahmini Maliyet Puanı", estimate.get('graphql_cost', 0))
+    cols[2].metric("REST Çağrısı", estimate.get('rest_calls', 0))
+    cols[3].metric("Sentos Çağrısı", estimate.get('sentos_calls', 0))
+    cols = st.columns(2)
+    cols[0].metric("Tahmini Süre", str(timedelta(seconds=int(estimate.get('projected_seconds', 0)))))
+    cols[1].metric("En Kötü Durum (Tüm Medyalar Değişirse)", str(timedelta(seconds=int(estimate.get('projected_seconds_worst_case', 0)))))
+    operations = {op: count for op, count in plan.get('operations', {}).items() if count}
+    if operations:
+        st.dataframe(pd.DataFrame(list(operations.items()), columns=['İşlem', 'Adet']), use_container_width=True, hide_index=True)
+
 def display_results(title, results):
     st.subheader(title)
     stats = results.get('stats', {})
@@ -150,6 +165,20 @@ def display_results(title, results):
     cols[3].metric("❌ Hatalı", stats.get('failed', 0))
     cols[4].metric("⏭️ Atlandı", stats.get('skipped', 0))
 
+    if plan := results.get('plan'):
+        display_plan(plan)
+
+    if timings := results.get('timings'):
+        with st.expander("⏱️ Aşama Süreleri ve Beklemeler"):
+            spans = timings.get('spans', {})
+            if spans:
+                st.dataframe(pd.DataFrame([{'Aşama / İşlem': name, 'Adet': e['count'], 'Toplam (sn)': e['seconds'], 'En Uzun (sn)': e['max_seconds']} for name, e in spans.items()]), use_container_width=True, hide_index=True)
+            sleeps = timings.get('sleeps', {})
+            if sleeps:
+                st.dataframe(pd.DataFrame([{'Bekleme Nedeni': reason, 'Adet': e['count'], 'Toplam (sn)': e['seconds']} for reason, e in sleeps.items()]), use_container_width=True, hide_index=True)
+            if counters := timings.get('counters'):
+                st.write({name: count for name, count in counters.items()})
+
     with st.expander("Detaylı Raporu Görüntüle"):
         details = results.get('details', [])
         if details:
@@ -192,6 +221,7 @@ else:
     )
     col1, col2 = st.columns(2)
     test_mode = col1.checkbox("Test Modu (İlk 20 ürünü senkronize et)", value=True, help="Tam bir senkronizasyon çalıştırmadan bağlantıyı ve mantığı test etmek için yalnızca Sentos'taki ilk 20 ürünü işler.")
+    dry_run = col1.checkbox("🧪 Kuru Çalıştırma (Sadece Plan ve Süre Tahmini)", value=False, help="Hiçbir değişiklik göndermeden işlem sayılarını, GraphQL maliyetini ve tahmini süreyi hesaplar.")
     max_workers = col2.number_input("Eş Zamanlı Çalışan Sayısı", 1, 50, 10, help="Aynı anda işlenecek ürün sayısı. API limitlerine takılmamak için dikkatli artırın.")
 
     if st.button("🚀 Genel Senkronizasyonu Başlat", type="primary", use_container_width=True, disabled=not sync_ready):
@@ -209,6 +239,7 @@ else:
             'test_mode': test_mode, 
             'max_workers': max_workers, 
             'sync_mode': sync_mode,
+            'dry_run': dry_run,
             'progress_callback': st.session_state.progress_queue.put,
             'stop_event': st.session_state.stop_sync_event
         }
@@ -2,7 +2,6 @@
 
 import streamlit as st
 import pandas as pd
-import math
 import numpy as np
 import json
 from io import StringIO
@@ -21,41 +20,16 @@ logging.basicConfig(
 )
 
 # gsheets_manager.py'den gerekli fonksiyonları içe aktar
-from operations.price_sync import update_prices_for_single_product
+from operations.price_sync import send_prices_to_shopify
+from operations.price_journal import PriceJournal
+from operations.price_history import PriceHistory, diff_snapshots, incremental_prices
+from operations.pricing_engine import calculate_prices, profit_and_margin, scenario_grid, evaluate_scenarios
 from gsheets_manager import load_pricing_data_from_gsheets, save_pricing_data_to_gsheets
 from connectors.shopify_api import ShopifyAPI
 from connectors.sentos_api import SentosAPI
 from data_manager import load_user_data
 from config_manager import load_all_user_keys
 
-class RateLimiter:
-    def __init__(self, requests_per_second: float):
-        self.min_interval = 1.0 / requests_per_second
-        self.lock = threading.Lock()
-        self.last_request_time = 0
-        self.last_request_time = 0
-        self.success_count = 0
-        self.adaptive_factor = 1.0
-
-    def wait(self):
-        with self.lock:
-            current_interval = self.min_interval * self.adaptive_factor
-            elapsed = time.time() - self.last_request_time
-            if elapsed < current_interval:
-                time.sleep(current_interval - elapsed)
-            self.last_request_time = time.time()
-
-    def on_success(self):
-        """Başarılı istek sonrası hızlan"""
-        self.success_count += 1
-        if self.success_count > 10:  # 10 başarılı istekten sonra
-            self.adaptive_factor = max(0.5, self.adaptive_factor * 0.95)
-            
-    def on_throttle(self):
-        """Throttle durumunda yavaşla"""
-        self.adaptive_factor = min(3.0, self.adaptive_factor * 1.3)
-        self.success_count = 0        
-
 # Threading ayarlarını güvenli hale getirin
 def get_safe_thread_settings():
     """Rate limit güvenli thread ayarları"""
@@ -176,17 +150,6 @@ def process_sentos_data(product_list):
 
     return df_variants, df_main_products
 
-def apply_rounding(price, method):
-    if method == "Yukarı Yuvarla":
-        if price % 10 != 9.99 and price % 10 != 9: 
-            return math.floor(price / 10) * 10 + 9.99
-        elif price % 1 == 0: 
-            return price - 0.01
-        return price
-    elif method == "Aşağı Yuvarla":
-        return math.floor(price / 10) * 10 - 0.01 if price > 10 else 9.99
-    return price
-
 # --- Session State Başlatma ---
 st.session_state.setdefault('calculated_df', None)
 st.session_state.setdefault('df_for_display', None)
@@ -199,65 +162,22 @@ st.session_state.setdefault('sync_results', None)
 st.session_state.setdefault('last_failed_skus', [])
 st.session_state.setdefault('last_update_results', {})
 
-def _process_one_product_for_price_sync(shopify_api, product_base_sku, all_variants_df, price_data_df, price_col, compare_col, rate_limiter):
-    """
-    Tek bir ürünü baştan sona işleyen worker fonksiyonu. REST API ile güncelleme yapar.
-    """
-    try:
-        variant_map = shopify_api.get_variant_ids_by_skus([product_base_sku], search_by_product_sku=True)
-        if not variant_map:
-            return {"status": "failed", "reason": f"Ürün Shopify'da bulunamadı: {product_base_sku}"}
-
-        product_id = next(iter(variant_map.values()))['product_id']
-        
-        # Ana ürünün hesaplanmış fiyatını bul
-        price_row = price_data_df.loc[price_data_df['MODEL KODU'] == product_base_sku]
-        if price_row.empty:
-            return {"status": "skipped", "reason": f"Hesaplanmış fiyat listesinde ürün bulunamadı: {product_base_sku}"}
-        
-        price_to_set = price_row.iloc[0][price_col]
-        compare_price_to_set = price_row.iloc[0].get(compare_col)
-
-        # O ürüne ait tüm varyantlar için güncelleme verisini hazırla
-        updates = []
-        for variant_sku, ids in variant_map.items():
-            payload = {"id": ids['variant_gid'], "price": f"{price_to_set:.2f}"}
-            if compare_price_to_set is not None and pd.notna(compare_price_to_set):
-                payload["compareAtPrice"] = f"{compare_price_to_set:.2f}"
-            updates.append(payload)
-
-        if not updates:
-            return {"status": "skipped", "reason": "Eşleşen varyant bulunamadı."}
-
-        # REST tabanlı güncelleme fonksiyonunu çağır
-        return update_prices_for_single_product(shopify_api, product_id, updates, rate_limiter)
-
-    except Exception as e:
-        return {"status": "failed", "reason": str(e)}
-
-
 def _run_price_sync(
     shopify_store, shopify_token, 
     calculated_df, retail_df, variants_df, 
-    update_choice, worker_count, queue, **kwargs
+    update_choice, worker_count, queue, retry_count=3, continue_from_last=False, only_changed=False, **kwargs
 ):
     """
-    DÜZELTME: Ana sync fonksiyonu - rate limit korumalı
+    Ana sync fonksiyonu - fiyatlar ürün bazında productVariantsBulkUpdate ile gönderilir.
+    Her gönderim fiyat günlüğüne yazılır; continue_from_last ile yalnızca başarısız, hiç denenmemiş
+    veya hedef fiyatı değişmiş varyantlar gönderilir (günlük oturum kapansa da diskte kalır).
+    Gönderilen fiyat tablosu fiyat geçmişine kaydedilir; only_changed ile yalnızca son gönderimin
+    anlık görüntüsüne göre eklenen veya fiyatı değişen SKU'lar gönderilir.
     """
+    journal = None
     try:
-        # Güvenli ayarları al
-        safe_settings = get_safe_thread_settings()
-        
-        # Parametre güvenlik kontrolü
-        actual_worker_count = min(worker_count, safe_settings['worker_count'])
-        actual_rate = safe_settings['requests_per_second']
-        
-        logging.info(f"Optimize edilmiş sync: {actual_worker_count} worker, {actual_rate} req/sec")
-        
-        # Düzeltilmiş import - pandas'ı import edelim
-        import pandas as pd
-        
         shopify_api = ShopifyAPI(shopify_store, shopify_token)
+        journal = PriceJournal()
         
         price_data_df = retail_df if update_choice == "İndirimli Fiyatlar" else calculated_df
         price_col = 'İNDİRİMLİ SATIŞ FİYATI' if update_choice == "İndirimli Fiyatlar" else 'NIHAI_SATIS_FIYATI'
@@ -265,88 +185,55 @@ def _run_price_sync(
 
         if variants_df is None or price_data_df is None:
             raise ValueError("Güncelleme için veri bulunamadı.")
-        
-        # DÜZELTME: base_sku'ya göre unique ürünleri al
-        products_to_update_df = variants_df[['base_sku']].drop_duplicates()
-        
-        total_products = len(products_to_update_df)
-        if total_products == 0:
+        if variants_df[['base_sku']].drop_duplicates().empty:
             raise ValueError("Güncellenecek ürün bulunamadı.")
-            
-        queue.put({'progress': 5, 'message': f'{total_products} ürün için görevler başlatılıyor...'})
-        
-        processed_products, success_count, failed_count = 0, 0, 0
-        failed_details = []  # Başarısız ürünlerin detaylarını sakla
-        
-        # Güvenli rate limiter
-        rate_limiter = RateLimiter(requests_per_second=actual_rate)
-        
-        with ThreadPoolExecutor(max_workers=actual_worker_count) as executor:
-            # DÜZELTME: Updated function import - doğru parametrelerle çağır
-            from operations.price_sync import _process_one_product_for_price_sync
-            
-            futures = {
-                executor.submit(_process_one_product_for_price_sync, shopify_api, row['base_sku'], variants_df, price_data_df, price_col, compare_col, rate_limiter): row['base_sku'] 
-                for index, row in products_to_update_df.iterrows()
-            }
-            
-            for future in as_completed(futures):
-                processed_products += 1
-                base_sku = futures[future]
-                
-                try:
-                    result = future.result()
-                    if result.get('status') == 'success':
-                        success_count += 1
-                        rate_limiter.on_success()  # Bu satırı ekleyin
-                        queue.put({
-                            'log_detail': f"✅ {base_sku}: Başarıyla güncellendi ({result.get('updated_count', 0)} varyant)"
-                        })
-                    else:
-                        failed_count += 1
-                        if "throttled" in result.get('reason', '').lower():  # Bu satırı ekleyin
-                            rate_limiter.on_throttle()                      # Bu satırı ekleyin
-                        failed_details.append({
-                            "sku": base_sku,
-                            "status": "failed",
-                            "reason": result.get('reason', 'Bilinmeyen hata')
-                        })
-                        queue.put({
-                            'log_detail': f"❌ {base_sku}: {result.get('reason', 'Bilinmeyen hata')}"
-                        })
-                except Exception as e:
-                    failed_count += 1
-                    if "throttled" in result.get('reason', '').lower():
-                        rate_limiter.on_throttle()
-                    failed_details.append({
-                        "sku": base_sku,
-                        "status": "failed", 
-                        "reason": f"İşlem hatası: {str(e)}"
-                    })
-                    queue.put({
-                        'log_detail': f"❌ {base_sku}: İşlem hatası - {str(e)}"
-                    })
-                
-                # İlerleme güncelleme
-                progress_percent = 10 + int((processed_products / total_products) * 85)
-                queue.put({
-                    'progress': progress_percent,
-                    'message': f'İşleniyor: {processed_products}/{total_products} (✅{success_count} ❌{failed_count})'
-                })
 
-        # Final sonuçları gönder
-        queue.put({
-            "status": "done", 
-            "results": {
-                "success": success_count, 
-                "failed": failed_count, 
-                "details": failed_details
-            }
-        })
+        # GraphQL maliyet kovası paylaşıldığı için birkaç worker yeterli
+        actual_worker_count = min(worker_count, 4)
+        logging.info(f"GraphQL toplu fiyat güncellemesi: {actual_worker_count} worker")
+        
+        history = PriceHistory()
+        history_kind = 'push_discount' if update_choice == "İndirimli Fiyatlar" else 'push_main'
+        price_table = price_data_df[['MODEL KODU', price_col] + ([compare_col] if compare_col else [])]
+        prices_to_send = price_table
+        baseline_id = history.latest(history_kind) if only_changed else None
+        if baseline_id:
+            changes = diff_snapshots(history.load(baseline_id), price_table, price_table.columns[1:].tolist())
+            prices_to_send = incremental_prices(changes, price_col, compare_col)
+            queue.put({'log_detail': f"🧮 Son gönderimden ({baseline_id}) bu yana {len(prices_to_send)} / {len(price_table)} SKU'nun fiyatı değişmiş."})
+
+        results = send_prices_to_shopify(
+            shopify_api, prices_to_send, variants_df, price_col, compare_col,
+            progress_callback=queue.put, worker_count=actual_worker_count, max_retries=retry_count,
+            journal=journal, resume=continue_from_last
+        )
+        # Anlık görüntü bir sonraki artımlı gönderimin referansıdır: yalnızca Shopify'da hedef fiyatta olduğu
+        # doğrulanan ana ürünler (ve son gönderimden beri fiyatı değişmediği için gönderilmeyenler) alınır;
+        # başarısız veya eşleşmeyen varyantı olan ana ürünler bir sonraki artımlı gönderimde yeniden gönderilir
+        if (results.get('errors') and not results.get('details')) or 'completed_skus' not in results:
+            queue.put({'log_detail': "⚠️ Gönderim tamamlanmadığı için fiyat geçmişine anlık görüntü kaydedilmedi."})
+        else:
+            variant_bases = variants_df.assign(sku=variants_df['MODEL KODU'].astype(str))
+            failed_skus = {str(d.get('sku')) for d in results.get('details', []) if d.get('status') != 'success'}
+            bad_skus = failed_skus | {str(sku) for sku in results.get('unmatched_skus', [])}
+            completed_bases = set(variant_bases.loc[variant_bases['sku'].isin({str(s) for s in results['completed_skus']}), 'base_sku'])
+            bad_bases = set(variant_bases.loc[variant_bases['sku'].isin(bad_skus), 'base_sku'])
+            confirmed = completed_bases - bad_bases
+            if baseline_id:
+                confirmed |= set(history.load(baseline_id)['MODEL KODU']) - set(prices_to_send['MODEL KODU'])
+            history.save_push(price_table[price_table['MODEL KODU'].isin(confirmed)], results, history_kind)
+        for detail in results.get('details', []):
+            if detail.get('status') == 'failed':
+                queue.put({'log_detail': f"❌ {detail.get('sku')}: {detail.get('reason', 'Bilinmeyen hata')}"})
+
+        queue.put({"status": "done", "results": results})
 
     except Exception as e:
         logging.error(f"Ana senkronizasyon hatası: {traceback.format_exc()}")
         queue.put({"status": "error", "message": str(e)})
+    finally:
+        if journal is not None:
+            journal.close()
 
 # --- ARAYÜZ ---
 st.markdown("""
@@ -435,15 +322,10 @@ if st.session_state.df_for_display is not None and not st.session_state.update_i
         vat_rate = c2.number_input("KDV Oranı (%)", 0, 100, 10, disabled=not add_vat, key="vat_rate")
         rounding_method_text = c3.radio("Fiyat Yuvarlama", ["Yok", "Yukarı (X9.99)", "Aşağı (X9.99)"], index=1, key="rounding")
         if c4.button("💰 Fiyatları Hesapla", type="primary", use_container_width=True):
-            df = st.session_state.df_for_display.copy()
-            df['SATIS_FIYATI_KDVSIZ'] = df['ALIŞ FİYATI'] * (1 + markup_value / 100) if markup_type == "Yüzde Ekle (%)" else df['ALIŞ FİYATI'] * markup_value
-            df['SATIS_FIYATI_KDVLI'] = df['SATIS_FIYATI_KDVSIZ'] * (1 + vat_rate / 100) if add_vat else df['SATIS_FIYATI_KDVSIZ']
             rounding_method_arg = rounding_method_text.replace(" (X9.99)", "").replace("Aşağı", "Aşağı Yuvarla").replace("Yukarı", "Yukarı Yuvarla")
-            df['NIHAI_SATIS_FIYATI'] = df['SATIS_FIYATI_KDVLI'].apply(lambda p: apply_rounding(p, rounding_method_arg))
-            revenue = df['NIHAI_SATIS_FIYATI'] / (1 + vat_rate / 100) if add_vat else df['NIHAI_SATIS_FIYATI']
-            df['KÂR'] = revenue - df['ALIŞ FİYATI']
-            df['KÂR ORANI (%)'] = np.divide(df['KÂR'], df['ALIŞ FİYATI'], out=np.zeros_like(df['KÂR']), where=df['ALIŞ FİYATI']!=0) * 100
-            st.session_state.calculated_df = df
+            st.session_state.calculated_df = calculate_prices(
+                st.session_state.df_for_display, markup_type, markup_value, add_vat, vat_rate, rounding_method_arg
+            )
             st.toast("Fiyatlar hesaplandı.")
             st.rerun()
 
@@ -465,9 +347,9 @@ if st.session_state.calculated_df is not None:
         retail_df = df.copy()
         retail_df['İNDİRİM ORANI (%)'] = retail_discount
         retail_df['İNDİRİMLİ SATIŞ FİYATI'] = retail_df['NIHAI_SATIS_FIYATI'] * (1 - retail_discount / 100)
-        revenue_after_discount = retail_df['İNDİRİMLİ SATIŞ FİYATI'] / (1 + vat_rate / 100)
-        retail_df['İNDİRİM SONRASI KÂR'] = revenue_after_discount - retail_df['ALIŞ FİYATI']
-        retail_df['İNDİRİM SONRASI KÂR ORANI (%)'] = np.divide(retail_df['İNDİRİM SONRASI KÂR'], retail_df['ALIŞ FİYATI'], out=np.zeros_like(retail_df['İNDİRİM SONRASI KÂR']), where=retail_df['ALIŞ FİYATI']!=0) * 100
+        discount_profit, discount_margin = profit_and_margin(retail_df['İNDİRİMLİ SATIŞ FİYATI'], retail_df['ALIŞ FİYATI'], vat_rate)
+        retail_df['İNDİRİM SONRASI KÂR'] = discount_profit
+        retail_df['İNDİRİM SONRASI KÂR ORANI (%)'] = discount_margin
         st.session_state.retail_df = retail_df
         discount_df_display = retail_df[['MODEL KODU', 'ÜRÜN ADI', 'NIHAI_SATIS_FIYATI', 'İNDİRİM ORANI (%)', 'İNDİRİMLİ SATIŞ FİYATI', 'İNDİRİM SONRASI KÂR', 'İNDİRİM SONRASI KÂR ORANI (%)']]
         st.dataframe(discount_df_display.style.format({
@@ -491,6 +373,55 @@ if st.session_state.calculated_df is not None:
             'NIHAI_SATIS_FIYATI': '{:,.2f} ₺', "TOPTAN FİYAT (KDV'siz)": '{:,.2f} ₺', "TOPTAN FİYAT (KDV'li)": '{:,.2f} ₺', 'TOPTAN KÂR': '{:,.2f} ₺'
         }), use_container_width=True)
 
+    with st.expander("Tablo 4: Senaryo Karşılaştırması", expanded=False):
+        st.caption("Birden fazla kâr marjı, indirim ve toptan çarpanı tek seferde hesaplanır; KDV ve yuvarlama Adım 2'deki seçimlerdir.")
+        sc1, sc2, sc3, sc4 = st.columns(4)
+        scenario_markups = sc1.text_input("Kâr Marjı Değerleri", value="80, 100, 120", key="scenario_markups",
+                                          help=f"Virgülle ayrılmış; tip: {st.session_state.get('markup_type', 'Yüzde Ekle (%)')}")
+        scenario_discounts = sc2.multiselect("İndirim Oranları (%)", list(range(0, 55, 5)), default=[0, 10, 20], key="scenario_discounts")
+        scenario_multipliers = sc3.text_input("Toptan Çarpanları", value="1.6, 1.8", key="scenario_multipliers")
+        margin_threshold = sc4.number_input("Kâr Oranı Eşiği (%)", value=20.0, step=5.0, key="scenario_threshold")
+        try:
+            markup_values = [float(v) for v in scenario_markups.replace(';', ',').split(',') if v.strip()]
+            multipliers = [float(v) for v in scenario_multipliers.replace(';', ',').split(',') if v.strip()]
+        except ValueError:
+            st.error("Değerler sayı olmalı (ör. 80, 100, 120).")
+            markup_values, multipliers = [], []
+        if markup_values and multipliers and scenario_discounts:
+            rounding_text = st.session_state.get('rounding', 'Yukarı (X9.99)')
+            grid = scenario_grid(
+                markup_types=[st.session_state.get('markup_type', 'Yüzde Ekle (%)')], markup_values=markup_values,
+                vat_rates=[vat_rate if st.session_state.get('add_vat', True) else 0],
+                rounding_methods=[rounding_text.replace(" (X9.99)", "").replace("Aşağı", "Aşağı Yuvarla").replace("Yukarı", "Yukarı Yuvarla")],
+                discounts=scenario_discounts, wholesale_multipliers=multipliers,
+            )
+            _, scenario_summary = evaluate_scenarios(df['ALIŞ FİYATI'], grid, margin_threshold=margin_threshold, tidy=False)
+            st.dataframe(scenario_summary.drop(columns=['KÂR MARJI TİPİ', 'KDV ORANI (%)', 'YUVARLAMA']).style.format({
+                'ORTALAMA KÂR ORANI (%)': '{:.2f}%', 'P10 KÂR ORANI (%)': '{:.2f}%', 'MEDYAN KÂR ORANI (%)': '{:.2f}%',
+                'P90 KÂR ORANI (%)': '{:.2f}%', 'EN DÜŞÜK KÂR ORANI (%)': '{:.2f}%', 'TOPLAM KÂR': '{:,.2f} ₺',
+                'İNDİRİM SONRASI ORTALAMA KÂR ORANI (%)': '{:.2f}%', 'TOPTAN ORTALAMA KÂR ORANI (%)': '{:.2f}%',
+            }), use_container_width=True, hide_index=True)
+
+    with st.expander("Tablo 5: Fiyat Geçmişi", expanded=False):
+        st.caption("Her E-Tablo kaydı ve Shopify gönderimi fiyat geçmişine anlık görüntü olarak eklenir.")
+        price_history = PriceHistory()
+        snapshots = price_history.list()
+        snapshots = snapshots[~snapshots['kind'].str.endswith('_result')]
+        if snapshots.empty:
+            st.info("Henüz kayıtlı fiyat anlık görüntüsü yok.")
+        else:
+            h1, h2 = st.columns(2)
+            snapshot_ids = snapshots['snapshot_id'].tolist()
+            new_id = h1.selectbox("Yeni", snapshot_ids, index=0, key="history_new")
+            old_id = h2.selectbox("Eski", snapshot_ids, index=min(1, len(snapshot_ids) - 1), key="history_old")
+            changes = price_history.diff(old_id, new_id)
+            counts = changes['DEGISIKLIK'].value_counts()
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Eklenen", int(counts.get('eklendi', 0)))
+            m2.metric("Silinen", int(counts.get('silindi', 0)))
+            m3.metric("Değişen", int(counts.get('degisti', 0)))
+            st.dataframe(changes, use_container_width=True, hide_index=True)
+
     st.markdown("---")
     st.subheader("Adım 4: Kaydet ve Shopify'a Gönder")
     
@@ -530,6 +461,8 @@ if st.session_state.calculated_df is not None:
                         wholesale_df, 
                         st.session_state.df_variants
                     )
+                    if success:
+                        PriceHistory().save_pricing(main_df_to_save, discount_df, wholesale_df)
                     
                 if success: 
                     variant_info = ""
@@ -590,20 +523,30 @@ if st.session_state.calculated_df is not None:
     
         continue_from_last = st.checkbox(
             "⏯️ Kaldığı yerden devam et",
+            value=st.session_state.get('continue_from_last', False),
+            help="Fiyat günlüğüne göre yalnızca başarısız, hiç gönderilmemiş veya hedef fiyatı değişmiş varyantları gönder"
+        )
+        
+        only_changed = st.checkbox(
+            "🧮 Yalnızca son gönderimden beri değişenleri gönder",
             value=False,
-            help="Önceki güncelleme yarıda kaldıysa, başarısız olanları tekrar dene"
+            help="Fiyat geçmişindeki son gönderim anlık görüntüsüyle karşılaştırır; yalnızca yeni veya fiyatı değişen SKU'lar gönderilir"
         )
         
         update_choice = st.selectbox("Hangi Fiyat Listesini Göndermek İstersiniz?", ["Ana Fiyatlar", "İndirimli Fiyatlar"])
         
-        if continue_from_last and 'last_update_results' in st.session_state and not st.session_state.update_in_progress:
-            last_results = st.session_state.last_update_results
-            if last_results and isinstance(last_results, dict):
+        if continue_from_last and not st.session_state.update_in_progress:
+            # Oturum sıfırlansa da son çalışmanın özeti fiyat günlüğünden okunur
+            price_journal = PriceJournal()
+            last_run = price_journal.last_run()
+            price_journal.close()
+            if last_run:
                 st.info(f"""
-                📊 Önceki güncelleme sonucu:
-                - ✅ Başarılı: {last_results.get('success', 0)}
-                - ❌ Başarısız: {last_results.get('failed', 0)}
-                - 🔄 Tekrar denenecek: {last_results.get('failed', 0)} varyant
+                📊 Önceki güncelleme sonucu ({last_run['started_at'][:16].replace('T', ' ')}{'' if last_run.get('finished_at') else ', yarıda kaldı'}):
+                - ✅ Başarılı: {last_run.get('success', 0)}
+                - ⏸️ Zaten güncel: {last_run.get('unchanged', 0)}
+                - ❌ Başarısız: {last_run.get('failed', 0)}
+                - 🔄 Başarısızlar, gönderilemeyenler ve fiyatı değişenler tekrar gönderilecek
                 """)
         
         if st.button(f"🚀 {update_choice} Shopify'a Gönder", use_container_width=True, type="primary", disabled=st.session_state.update_in_progress):
@@ -624,6 +567,7 @@ if st.session_state.calculated_df is not None:
                     "variants_df": st.session_state.get('df_variants'),
                     "update_choice": update_choice,
                     "continue_from_last": continue_from_last,
+                    "only_changed": only_changed,
                     "last_failed_skus": st.session_state.get('last_failed_skus', []),
                     "worker_count": worker_count,
                     "batch_size": batch_size,
@@ -717,6 +661,17 @@ if st.session_state.sync_results:
     with summary_col4:
         success_rate = (all_results.get('success', 0) / total_variants * 100) if total_variants > 0 else 0
         st.metric("Başarı Oranı", f"{success_rate:.1f}%")
+
+    if 'unchanged' in all_results:
+        diff_col1, diff_col2, diff_col3 = st.columns(3)
+        with diff_col1:
+            st.metric("🔁 Fiyatı Değişen", all_results.get('changed', 0))
+        with diff_col2:
+            st.metric("⏸️ Zaten Güncel (Gönderilmedi)", all_results.get('unchanged', 0))
+        with diff_col3:
+            st.metric("❓ Shopify'da Eşleşmeyen", all_results.get('unmatched', 0))
+        if all_results.get('resumed'):
+            st.caption(f"⏯️ {all_results['resumed']} varyant önceki çalışmalarda tamamlandığı için tekrar gönderilmedi.")
     
     if all_results.get('failed', 0) > 0:
         st.error(f"❌ {all_results.get('failed', 0)} varyant güncellenemedi.")
@@ -740,7 +695,10 @@ if st.session_state.sync_results:
                     use_container_width=True
                 )
     else:
-        st.success(f"🎉 Tüm {all_results.get('success', 0)} varyant başarıyla güncellendi!")
+        if all_results.get('success', 0) == 0 and all_results.get('unchanged', 0) > 0:
+            st.success(f"✅ Gönderilecek fark yok: {all_results.get('unchanged', 0)} varyantın fiyatı zaten güncel.")
+        else:
+            st.success(f"🎉 Tüm {all_results.get('success', 0)} varyant başarıyla güncellendi!")
     
     with st.expander("📋 Detaylı Rapor", expanded=False):
         if all_results.get('details'):
@@ -7,6 +7,9 @@ import logging
 import time
 from datetime import datetime
 
+# Bu sayıdan fazla ürün başarısız olursa senkronizasyon durdurulur (her iki modda)
+MAX_FAILURES = 5
+
 # Logging ayarla
 logging.basicConfig(
     level=logging.INFO,
@@ -31,11 +34,19 @@ def main():
     # Güvenlik ayarları
     sync_mode = os.getenv('SYNC_MODE', 'test')
     force_update = os.getenv('FORCE_UPDATE', 'false').lower() == 'true'
-    max_products = int(os.getenv('MAX_PRODUCTS', '5'))
+    # MAX_PRODUCTS=ALL (veya -1) tüm kataloğu işler; 0 hiçbir ürünü işlemez
+    max_products_env = os.getenv('MAX_PRODUCTS', '5').strip()
+    max_products = None if max_products_env.upper() in ('ALL', '-1') else int(max_products_env)
+    # BULK_MEDIA=true: tüm katalog tek toplu sorguyla okunur, yalnızca değişen ürünlere yazılır
+    bulk_media = os.getenv('BULK_MEDIA', 'false').lower() == 'true'
+    media_workers = int(os.getenv('MEDIA_WORKERS', '4'))
+    # IMAGE_REVALIDATION=true: aynı URL'de içeriği değişen görseller (ETag / Last-Modified) yeniden yüklenir
+    image_revalidation = os.getenv('IMAGE_REVALIDATION', 'true').lower() == 'true'
     
     logging.info(f"=== GÜVENLİ MEDYA SYNC BAŞLADI ===")
     logging.info(f"Mod: {sync_mode}")
-    logging.info(f"Max ürün: {max_products}")
+    logging.info(f"Max ürün: {'sınırsız' if max_products is None else max_products}")
+    logging.info(f"Toplu mod: {'Evet' if bulk_media else 'Hayır'}")
     logging.info(f"Force update: {force_update}")
     logging.info(f"Cookie mevcut: {'Evet' if os.getenv('SENTOS_COOKIE') else 'Hayır'}")
     
@@ -44,6 +55,10 @@ def main():
         from connectors.shopify_api import ShopifyAPI
         from connectors.sentos_api import SentosAPI
         from operations.media_sync import sync_media
+        from operations.media_map import MediaMap
+        from operations.image_cache import ImageCache
+        import sync_metrics
+        sync_metrics.metrics.reset()
         
         shopify_api = ShopifyAPI(os.getenv('SHOPIFY_STORE'), os.getenv('SHOPIFY_TOKEN'))
         sentos_api = SentosAPI(
@@ -59,14 +74,15 @@ def main():
         def progress_callback(update):
             logging.info(f"İlerleme: {update.get('message', 'İşleniyor...')}")
         
-        all_products = sentos_api.get_all_products(progress_callback=progress_callback)
+        with sync_metrics.span('phase.sentos_fetch'):
+            all_products = sentos_api.get_all_products(progress_callback=progress_callback)
         
         if not all_products:
             logging.error("Sentos'tan ürün alınamadı")
             sys.exit(1)
         
         # Ürün sayısını sınırla
-        products_to_sync = all_products[:max_products]
+        products_to_sync = all_products if max_products is None else all_products[:max_products]
         logging.info(f"İşlenecek ürün sayısı: {len(products_to_sync)}")
         
         # Stats
@@ -75,60 +91,82 @@ def main():
             'processed': 0,
             'success': 0,
             'failed': 0,
-            'skipped': 0
+            'skipped': 0,
+            'unchanged': 0
         }
         
         start_time = time.time()
+        # FORCE_UPDATE=true ise eşleme yok sayılır ve her ürün Shopify'dan yeniden okunur
+        media_map = MediaMap()
+        logging.info(f"Medya eşlemesinde {len(media_map)} ürün kayıtlı")
+        image_cache = ImageCache() if image_revalidation else None
         
-        # Her ürün için medya sync
-        for i, sentos_product in enumerate(products_to_sync, 1):
-            product_sku = sentos_product.get('sku', 'N/A')
-            product_name = sentos_product.get('name', 'İsimsiz')
+        if bulk_media:
+            from operations.bulk_media_sync import run_bulk_media_sync
+            stats, _ = run_bulk_media_sync(
+                shopify_api, sentos_api, products_to_sync, media_map=media_map, force_update=force_update,
+                set_alt_text=True, max_workers=media_workers, progress_callback=progress_callback, image_cache=image_cache,
+                max_failures=MAX_FAILURES)
+        else:
+            # Her ürün için medya sync
+            for i, sentos_product in enumerate(products_to_sync, 1):
+                product_sku = sentos_product.get('sku', 'N/A')
+                product_name = sentos_product.get('name', 'İsimsiz')
             
-            logging.info(f"[{i}/{len(products_to_sync)}] İşleniyor: {product_sku} - {product_name}")
+                logging.info(f"[{i}/{len(products_to_sync)}] İşleniyor: {product_sku} - {product_name}")
             
-            try:
-                # Shopify'da ürünü bul
-                shopify_products = shopify_api.get_variant_ids_by_skus([product_sku], search_by_product_sku=True)
+                try:
+                    # Shopify'da ürünü bul
+                    with sync_metrics.span('op.product_lookup'):
+                        shopify_products = shopify_api.get_variant_ids_by_skus([product_sku], search_by_product_sku=True)
                 
-                if not shopify_products:
-                    logging.warning(f"Ürün Shopify'da bulunamadı: {product_sku}")
-                    stats['skipped'] += 1
-                    continue
+                    if not shopify_products:
+                        logging.warning(f"Ürün Shopify'da bulunamadı: {product_sku}")
+                        stats['skipped'] += 1
+                        continue
                 
-                # İlk eşleşen ürünün product_id'sini al
-                product_gid = list(shopify_products.values())[0]['product_id']
+                    # İlk eşleşen ürünün product_id'sini al
+                    product_gid = list(shopify_products.values())[0]['product_id']
                 
-                # Medya senkronizasyonu yap - GÜVENLİ MODDA
-                changes = sync_media(
-                    shopify_api=shopify_api,
-                    sentos_api=sentos_api, 
-                    product_gid=product_gid,
-                    sentos_product=sentos_product,
-                    set_alt_text=True,  # SEO için alt text ekle
-                    force_update=force_update
-                )
+                    # Medya senkronizasyonu yap - GÜVENLİ MODDA
+                    with sync_metrics.span('op.media'):
+                        changes = sync_media(
+                            shopify_api=shopify_api,
+                            sentos_api=sentos_api, 
+                            product_gid=product_gid,
+                            sentos_product=sentos_product,
+                            set_alt_text=True,  # SEO için alt text ekle
+                            force_update=force_update,
+                            media_map=media_map,
+                            image_cache=image_cache
+                        )
                 
-                if changes:
-                    logging.info(f"✅ {product_sku}: {', '.join(changes)}")
-                    stats['success'] += 1
-                else:
-                    logging.info(f"⭕ {product_sku}: Değişiklik gerekmedi")
-                    stats['skipped'] += 1
+                    if changes and any(str(c).startswith('Hata') for c in changes):
+                        logging.error(f"❌ {product_sku}: {', '.join(changes)}")
+                        stats['failed'] += 1
+                    elif changes:
+                        logging.info(f"✅ {product_sku}: {', '.join(changes)}")
+                        stats['success'] += 1
+                    else:
+                        logging.info(f"⭕ {product_sku}: Değişiklik gerekmedi")
+                        stats['unchanged'] += 1
                 
-                stats['processed'] += 1
+                    stats['processed'] += 1
+                    if stats['failed'] > MAX_FAILURES:
+                        logging.error("Çok fazla hata oluştu, işlem durduruluyor")
+                        break
                 
-                # Rate limit koruması
-                time.sleep(2)
+                    # Rate limit koruması
+                    sync_metrics.sleep(2, 'media_product_delay')
                 
-            except Exception as e:
-                logging.error(f"❌ {product_sku} işlenirken hata: {e}")
-                stats['failed'] += 1
+                except Exception as e:
+                    logging.error(f"❌ {product_sku} işlenirken hata: {e}")
+                    stats['failed'] += 1
                 
-                # Çok fazla hata varsa dur
-                if stats['failed'] > 5:
-                    logging.error("Çok fazla hata oluştu, işlem durduruluyor")
-                    break
+                    # Çok fazla hata varsa dur
+                    if stats['failed'] > MAX_FAILURES:
+                        logging.error("Çok fazla hata oluştu, işlem durduruluyor")
+                        break
         
         # Sonuç raporu
         duration = time.time() - start_time
@@ -138,7 +176,12 @@ def main():
         logging.info(f"İşlenen: {stats['processed']}")
         logging.info(f"Başarılı: {stats['success']}")
         logging.info(f"Başarısız: {stats['failed']}")
+        logging.info(f"Değişmeyen: {stats['unchanged']}")
         logging.info(f"Atlanan: {stats['skipped']}")
+        media_map.save()
+        if image_cache:
+            image_cache.save()
+        sync_metrics.metrics.export("media_sync_run", extra={'sync_mode': sync_mode, 'bulk_media': bulk_media, 'stats': stats})
         
         # Başarı oranı kontrolü
         if stats['failed'] > stats['success']:
@@ -3,27 +3,113 @@ import logging
 import sys
 import threading
 import re
+import argparse
+import subprocess
+from datetime import datetime
 
 # Proje yolunu Python path'ine ekle
 project_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_path)
 
 # YENİ: Ana senkronizasyon fonksiyonunu yeni runner dosyasından içe aktarıyoruz.
-from sync_runner import sync_products_from_sentos_api
+from sync_runner import sync_products_from_sentos_api, parse_shard_spec
+from log_manager import save_log, save_shard_result, merge_shard_results
 
 # Temel loglama ayarları
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def main():
+def _report_dry_run(run_outcome, max_run_minutes):
+    """Kuru çalıştırma planını loglar ve CI zaman penceresine sığıp sığmadığını kontrol eder."""
+    if run_outcome.get('status') != 'done':
+        logging.error(f"Kuru çalıştırma planı oluşturulamadı: {run_outcome.get('message', 'Bilinmeyen hata')}")
+        sys.exit(1)
+
+    plan = run_outcome['results']['plan']
+    estimate = plan['estimate']
+    logging.info("=== KURU ÇALIŞTIRMA PLANI ===")
+    logging.info(f"Ürünler: {plan['products']}")
+    for op, count in plan['operations'].items():
+        if count:
+            logging.info(f"  {op}: {count}")
+    logging.info(f"GraphQL çağrısı: {estimate['graphql_calls']} | Maliyet puanı: ~{estimate['graphql_cost']} | REST çağrısı: {estimate['rest_calls']} | Sentos çağrısı: {estimate['sentos_calls']}")
+    projected_minutes = estimate['projected_seconds'] / 60
+    worst_minutes = estimate['projected_seconds_worst_case'] / 60
+    logging.info(f"Tahmini süre: {projected_minutes:.1f} dk (en kötü durum: {worst_minutes:.1f} dk)")
+
+    if max_run_minutes and projected_minutes > max_run_minutes:
+        logging.error(f"Tahmini süre ({projected_minutes:.1f} dk) izin verilen CI süresini ({max_run_minutes:.0f} dk) aşıyor.")
+        sys.exit(1)
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Zamanlanmış Sentos → Shopify senkronizasyonu")
+    parser.add_argument("--shard", help="Kataloğun yalnızca bu parçasını işle (i/N, örn: 1/4). SKU üzerinden kararlı hash kullanılır.")
+    parser.add_argument("--result-file", help="Shard sonucunun yazılacağı JSON dosyası (koordinatör birleştirir).")
+    parser.add_argument("--budget-file", help="Aynı makinedeki shard'ların ortak Shopify bütçesi için kilit dosyası.")
+    parser.add_argument("--spawn", type=int, metavar="N", help="N adet yerel shard süreci başlat, bitince sonuçları birleştir.")
+    parser.add_argument("--merge", nargs="+", metavar="DOSYA", help="Shard sonuç dosyalarını tek bir sync_history.json kaydında birleştir.")
+    return parser.parse_args(argv)
+
+def _merge_results(result_files):
+    """Koordinatör: shard sonuçlarını birleştirip senkronizasyon geçmişine tek kayıt olarak yazar."""
+    merged = merge_shard_results(result_files)
+    save_log(merged)
+    stats = merged['stats']
+    logging.info(f"{len(result_files)} shard sonucu birleştirildi: {stats} | En uzun shard süresi: {merged['duration']}")
+    failed_shards = [s for s in merged['shards'] if s.get('status') != 'done']
+    if failed_shards:
+        logging.error(f"Başarısız veya eksik shard'lar: {failed_shards}")
+        sys.exit(1)
+
+def _spawn_local_shards(shard_count):
+    """N adet yerel shard süreci başlatır; hepsi tek bir bütçe dosyasını paylaşır."""
+    run_dir = os.path.join(project_path, "shard_runs", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(run_dir, exist_ok=True)
+    budget_file = os.path.join(run_dir, "shopify_budget.lock")
+
+    processes, result_files = [], []
+    for index in range(1, shard_count + 1):
+        result_file = os.path.join(run_dir, f"shard_{index}_of_{shard_count}.json")
+        result_files.append(result_file)
+        command = [sys.executable, os.path.abspath(__file__), "--shard", f"{index}/{shard_count}",
+                   "--result-file", result_file, "--budget-file", budget_file]
+        logging.info(f"Shard {index}/{shard_count} başlatılıyor...")
+        processes.append(subprocess.Popen(command))
+
+    exit_codes = [process.wait() for process in processes]
+    logging.info(f"Tüm shard'lar tamamlandı. Çıkış kodları: {exit_codes}")
+    _merge_results(result_files)
+    if any(exit_codes):
+        sys.exit(1)
+
+def main(argv=None):
     """
     Ortam değişkenlerinden (GitHub Secrets) ayarları okur ve
     zamanlanmış senkronizasyon görevini başlatır.
     """
+    args = _parse_args(argv)
+    if args.merge:
+        _merge_results(args.merge)
+        return
+    if args.spawn:
+        _spawn_local_shards(args.spawn)
+        return
+    if args.shard:
+        # Hatalı tanımı Sentos/Shopify'a bağlanmadan önce yakala
+        try:
+            parse_shard_spec(args.shard)
+        except ValueError as e:
+            logging.error(str(e))
+            sys.exit(2)
     
     # Hangi modda çalışacağını ortam değişkeninden oku.
     sync_mode_to_run = os.getenv("SYNC_MODE", "Sadece Stok ve Varyantlar")
+    # DRY_RUN=true ise hiçbir değişiklik gönderilmez, sadece plan ve süre tahmini raporlanır.
+    dry_run = os.getenv("DRY_RUN", "false").lower() == "true"
+    # Kuru çalıştırmada tahmini süre bu sınırı aşarsa görev hata koduyla biter.
+    max_run_minutes = float(os.getenv("MAX_RUN_MINUTES", "0") or 0)
 
-    logging.info(f"GitHub Actions tarafından tetiklenen senkronizasyon başlıyor... Mod: {sync_mode_to_run}")
+    shard_info = f" | Shard: {args.shard}" if args.shard else ""
+    logging.info(f"GitHub Actions tarafından tetiklenen senkronizasyon başlıyor... Mod: {sync_mode_to_run}{shard_info}")
 
     # Gerekli ayarları GitHub Secrets'tan oku
     config = {
@@ -41,9 +127,13 @@ def main():
         logging.error(f"Eksik ayarlar (GitHub Secrets): {', '.join(missing_keys)}")
         sys.exit(1)
 
+    run_outcome = {}
+
     try:
         # 1. Callback fonksiyonunu tanımla (loglama için)
         def cron_progress_callback(update):
+            if update.get('status') in ['done', 'error']:
+                run_outcome.update(update)
             if 'message' in update:
                 logging.info(update['message'])
             if 'log_detail' in update:
@@ -66,9 +156,27 @@ def main():
             progress_callback=cron_progress_callback,
             stop_event=stop_event,
             sync_mode=sync_mode_to_run,
-            max_workers=10 # Zamanlanmış görev için worker sayısını ayarlayabilirsiniz
+            max_workers=10, # Zamanlanmış görev için worker sayısını ayarlayabilirsiniz
+            dry_run=dry_run,
+            shard=args.shard,
+            budget_file=args.budget_file
         )
+
+        if args.result_file:
+            results = run_outcome.get('results') or {'status': 'error', 'message': run_outcome.get('message', 'Sonuç alınamadı')}
+            if run_outcome.get('status') == 'done':
+                results = {**results, 'status': 'done'}
+            save_shard_result(args.result_file, args.shard, sync_mode_to_run, results)
+            logging.info(f"Shard sonucu kaydedildi: {args.result_file}")
+
+        if dry_run:
+            _report_dry_run(run_outcome, max_run_minutes)
+            return
         
+        if run_outcome.get('status') == 'error':
+            logging.error(f"Senkronizasyon hata ile bitti: {run_outcome.get('message')}")
+            sys.exit(1)
+
         logging.info(f"Zamanlanmış senkronizasyon (Mod: {sync_mode_to_run}) başarıyla tamamlandı.")
     except Exception as e:
         logging.critical(f"Senkronizasyon sırasında ölümcül bir hata oluştu: {e}", exc_info=True)
@@ -0,0 +1,37 @@
+# standin/__main__.py - Sahte sunucuları elle deneme için ayakta tutar
+#
+#   python -m standin --products 500 --latency-ms 80
+#
+# Uygulama ayarlarında Shopify mağaza adresi ve Sentos API adresi olarak yazdırılan URL'ler kullanılabilir.
+
+import argparse
+import logging
+import threading
+
+from standin.servers import start_standin_servers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Yerel Shopify/Sentos sahte sunucuları")
+    parser.add_argument("--products", type=int, default=200, help="Sentos kataloğundaki ürün sayısı")
+    parser.add_argument("--variants", type=int, default=4, help="Ürün başına varyant sayısı")
+    parser.add_argument("--images", type=int, default=3, help="Ürün başına görsel sayısı")
+    parser.add_argument("--latency-ms", type=int, default=50, help="Her isteğe eklenen yapay gecikme")
+    parser.add_argument("--shopify-port", type=int, default=8701)
+    parser.add_argument("--sentos-port", type=int, default=8702)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    servers = start_standin_servers(product_count=args.products, latency_ms=args.latency_ms,
+                                    shopify_port=args.shopify_port, sentos_port=args.sentos_port,
+                                    variants_per_product=args.variants, images_per_product=args.images)
+    logging.info(f"Shopify mağaza URL: {servers.shopify_store_url} | Sentos API URL: {servers.sentos_api_url} | Sentos Cookie: {servers.sentos_cookie}")
+    logging.info("Durdurmak için Ctrl+C.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servers.stop()
+
+
+if __name__ == "__main__":
+    main()
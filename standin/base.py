@@ -0,0 +1,109 @@
+# standin/base.py (Sahte sunucuların ortak HTTP altyapısı)
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandinStats:
+    """Uç nokta bazında istek sayılarını ve throttle yanıtlarını thread-safe tutar."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = {}
+            self.throttled = {}
+
+    def record(self, name, throttled=False):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if throttled:
+                self.throttled[name] = self.throttled.get(name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': dict(sorted(self.calls.items())),
+                'throttled': dict(sorted(self.throttled.items())),
+                'total_calls': sum(self.calls.values()),
+                'total_throttled': sum(self.throttled.values()),
+            }
+
+
+class StandinHTTPServer(ThreadingHTTPServer):
+    """Katalog, istatistik ve yapay gecikmeyi handler'lara taşıyan HTTP sunucusu."""
+    daemon_threads = True
+
+    def __init__(self, address, handler_class, catalog, latency_ms=0):
+        super().__init__(address, handler_class)
+        self.catalog = catalog
+        self.latency = max(0, latency_ms) / 1000.0
+        self.stats = StandinStats()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """JSON yanıt yardımcıları ve yapay ağ gecikmesi olan temel handler."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Benchmark çıktısını istek loglarıyla kirletme
+        pass
+
+    def simulate_latency(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def read_json(self):
+        body = self.read_body()
+        try:
+            return json.loads(body or b'{}')
+        except json.JSONDecodeError:
+            return {}
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_bytes(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD' and body:
+            self.wfile.write(body)
+
+    def send_not_found(self):
+        self.send_json({'errors': 'Not Found'}, status=404)
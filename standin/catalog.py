@@ -0,0 +1,142 @@
+# standin/catalog.py (Yerel sahte sunucular için sentetik katalog)
+
+import os
+import random
+import threading
+from urllib.parse import urlparse
+
+
+class StandinCatalog:
+    """
+    Sentos ve Shopify sahte sunucularının paylaştığı bellek içi katalog.
+    Sentos tarafı "gerçek" veriyi, Shopify tarafı ise mağazanın mevcut durumunu temsil eder;
+    aradaki farklar (eksik ürün, eksik varyant, farklı görsel) senkronizasyona iş çıkarır.
+    """
+    def __init__(self, image_base_url=""):
+        self.lock = threading.RLock()
+        self.image_base_url = image_base_url.rstrip('/')
+        self.sentos_products = []
+        self.shopify_products = {}      # numeric product id -> ürün
+        self.variant_index = {}         # numeric variant id -> (product id, varyant)
+        self.media_index = {}           # numeric media id -> product id
+        self.collections = []
+        self.location_id = "gid://shopify/Location/1"
+        self._next_id = 1000
+
+    def next_id(self):
+        with self.lock:
+            self._next_id += 1
+            return self._next_id
+
+    def image_url(self, product_id, index):
+        # SentosAPI.get_ordered_image_urls '/o_' ile başlayan dosya adlarını arar
+        return f"{self.image_base_url}/images/o_{product_id}_{index}.jpg"
+
+    def sentos_product(self, product_id):
+        return next((p for p in self.sentos_products if str(p['id']) == str(product_id)), None)
+
+    def add_shopify_product(self, title, variants, media_urls=(), product_type=""):
+        with self.lock:
+            product_id = self.next_id()
+            product = {
+                'id': product_id, 'title': title, 'handle': f"urun-{product_id}",
+                'productType': product_type, 'descriptionHtml': '',
+                'variants': [], 'media': [], 'collection_ids': [],
+            }
+            self.shopify_products[product_id] = product
+            for variant in variants:
+                self.add_shopify_variant(product_id, **variant)
+            for url in media_urls:
+                self.add_shopify_media(product_id, url, alt=url)
+            return product
+
+    def add_shopify_variant(self, product_id, sku, price="0.00", quantity=0, options=(), compare_at_price=None, cost="0.00"):
+        with self.lock:
+            variant = {
+                'id': self.next_id(), 'inventory_item_id': self.next_id(), 'sku': sku,
+                'price': price, 'compare_at_price': compare_at_price, 'quantity': quantity,
+                'options': list(options), 'cost': cost,
+            }
+            self.shopify_products[product_id]['variants'].append(variant)
+            self.variant_index[variant['id']] = (product_id, variant)
+            return variant
+
+    def cdn_url(self, url, media_id):
+        # Shopify orijinal kaynağı kendi CDN adresine taşır; yalnızca dosya adı korunur
+        return f"https://cdn.shopify.com/s/files/1/0000/0001/files/{os.path.basename(urlparse(url).path)}?v={media_id}"
+
+    def add_shopify_media(self, product_id, url, alt=None, status="READY"):
+        with self.lock:
+            media_id = self.next_id()
+            media = {'id': media_id, 'src': self.cdn_url(url, media_id), 'alt': alt, 'status': status}
+            self.shopify_products[product_id]['media'].append(media)
+            self.media_index[media['id']] = product_id
+            return media
+
+    def find_variant_by_inventory_item(self, inventory_item_id):
+        with self.lock:
+            for product in self.shopify_products.values():
+                for variant in product['variants']:
+                    if variant['inventory_item_id'] == inventory_item_id:
+                        return variant
+        return None
+
+
+def build_catalog(product_count=200, variants_per_product=4, images_per_product=3,
+                  shopify_coverage=0.9, missing_variant_ratio=0.1, media_drift_ratio=0.2,
+                  collection_count=10, image_base_url="", seed=42):
+    """
+    Tekrarlanabilir (seed'li) bir Sentos kataloğu ve onun Shopify'daki karşılığını üretir.
+
+    - shopify_coverage: Sentos ürünlerinin Shopify'da zaten bulunan oranı
+    - missing_variant_ratio: Shopify'daki ürünlerde eksik bırakılan varyant oranı
+    - media_drift_ratio: Görselleri Sentos'tan farklı olan (eklenecek/silinecek) ürün oranı
+    """
+    rng = random.Random(seed)
+    catalog = StandinCatalog(image_base_url=image_base_url)
+    colors = ["Siyah", "Beyaz", "Kırmızı", "Lacivert", "Bej"]
+    sizes = ["S", "M", "L", "XL", "XXL"]
+
+    for c in range(collection_count):
+        catalog.collections.append({'id': catalog.next_id(), 'title': f"Koleksiyon {c + 1}"})
+
+    for index in range(product_count):
+        product_id = 10000 + index
+        base_sku = f"STD{product_id}"
+        purchase_price = round(rng.uniform(50, 900), 2)
+        variants = []
+        for v in range(variants_per_product):
+            color = colors[v % len(colors)]
+            size = sizes[(v // len(colors)) % len(sizes)] if variants_per_product > len(colors) else sizes[v % len(sizes)]
+            variants.append({
+                'sku': f"{base_sku}-{v + 1}",
+                'barcode': f"869{product_id:06d}{v:03d}",
+                'color': color,
+                'model': {'value': size},
+                'purchase_price': purchase_price,
+                'stocks': [{'stock': rng.randint(0, 40)}],
+            })
+        images = [catalog.image_url(product_id, i + 1) for i in range(images_per_product)]
+        catalog.sentos_products.append({
+            'id': product_id, 'sku': base_sku, 'name': f"Standin Ürün {product_id}",
+            'description': f"<p>{base_sku} açıklaması</p>", 'category': f"Kategori {index % 7}",
+            'purchase_price': purchase_price, 'variants': variants, 'images': images,
+        })
+
+        if rng.random() >= shopify_coverage:
+            continue
+        present = [v for v in variants if rng.random() >= missing_variant_ratio] or variants[:1]
+        media_urls = list(images)
+        if rng.random() < media_drift_ratio and media_urls:
+            # Bir görsel eksik, bir görsel artık Sentos'ta yok
+            media_urls = media_urls[1:] + [catalog.image_url(product_id, 99)]
+        product = catalog.add_shopify_product(
+            f"Standin Ürün {product_id}",
+            [{'sku': v['sku'], 'price': f"{purchase_price * 2:.2f}", 'quantity': v['stocks'][0]['stock'],
+              'options': [v['color'], v['model']['value']], 'cost': f"{purchase_price:.2f}"} for v in present],
+            media_urls=media_urls,
+        )
+        if catalog.collections:
+            product['collection_ids'].append(catalog.collections[index % len(catalog.collections)]['id'])
+
+    return catalog
@@ -0,0 +1,98 @@
+# standin/sentos_server.py (Sentos REST API ve görsel AJAX uç noktası için yerel sahte sunucu)
+
+import hashlib
+import json
+from email.utils import formatdate
+from urllib.parse import parse_qs, urlparse
+
+from standin.base import StandinHandler, StandinHTTPServer
+
+IMAGE_AJAX_PATH = "/urun_sayfalari/include/ajax/fetch_urunresimler.php"
+
+
+class SentosStandinServer(StandinHTTPServer):
+    """Sentos ürün listesini, cookie ile korunan görsel sırası uç noktasını ve görsel dosyalarını sunar."""
+    def __init__(self, address, catalog, latency_ms=0, cookie="PHPSESSID=standin", image_bytes=2048):
+        super().__init__(address, SentosStandinHandler, catalog, latency_ms)
+        self.cookie = cookie
+        self.image_bytes = image_bytes
+        # Görsellerin 'değiştirilme' zamanı sabittir; koşullu isteklerde 304 döner
+        self.image_last_modified = formatdate(usegmt=True)
+        # touch_image ile içeriği (aynı URL'de) değiştirilen görseller: yol -> (revizyon, Last-Modified)
+        self.image_revisions = {}
+
+    def touch_image(self, url):
+        """Görselin URL'sini koruyup içeriğini değiştirir (Sentos panelinde görselin yeniden yüklenmesi gibi)."""
+        path = urlparse(url).path
+        revision = self.image_revisions.get(path, (0, None))[0] + 1
+        self.image_revisions[path] = (revision, formatdate(usegmt=True))
+
+
+class SentosStandinHandler(StandinHandler):
+
+    def do_GET(self):
+        self.simulate_latency()
+        parsed = urlparse(self.path)
+        if parsed.path.endswith('/products'):
+            self.server.stats.record('sentos:GET products')
+            return self._products(parse_qs(parsed.query))
+        if parsed.path.startswith('/images/'):
+            self.server.stats.record('sentos:GET image')
+            return self._image(parsed.path)
+        if parsed.path == "/_standin/stats":
+            return self.send_json(self.server.stats.snapshot())
+        self.send_not_found()
+
+    def do_HEAD(self):
+        self.simulate_latency()
+        parsed = urlparse(self.path)
+        if parsed.path.startswith('/images/'):
+            self.server.stats.record('sentos:HEAD image')
+            return self._image(parsed.path)
+        self.send_not_found()
+
+    def do_POST(self):
+        self.simulate_latency()
+        if urlparse(self.path).path == IMAGE_AJAX_PATH:
+            self.server.stats.record('sentos:POST image_order')
+            return self._image_order(parse_qs(self.read_body().decode('utf-8')))
+        self.send_not_found()
+
+    def _products(self, params):
+        catalog = self.server.catalog
+        if 'sku' in params:
+            sku = params['sku'][0].strip()
+            return self.send_json({'data': [p for p in catalog.sentos_products if p['sku'] == sku]})
+        page = max(1, int(params.get('page', ['1'])[0]))
+        size = max(1, int(params.get('size', ['100'])[0]))
+        products = catalog.sentos_products
+        # Gerçek API görselleri listede döndürmez; sıralı görseller AJAX uç noktasından gelir
+        page_items = [{k: v for k, v in p.items() if k != 'images'} for p in products[(page - 1) * size:page * size]]
+        self.send_json({'data': page_items, 'total_elements': len(products)})
+
+    def _image_order(self, form):
+        if self.server.cookie and self.server.cookie not in (self.headers.get('Cookie') or ''):
+            # Oturum düşmüş Sentos paneli JSON yerine giriş sayfası döndürür
+            return self.send_bytes(b"<html><body>Oturum sonlandi</body></html>", 'text/html; charset=utf-8')
+        product = self.server.catalog.sentos_product((form.get('urun') or [''])[0])
+        rows = []
+        for index, url in enumerate(product['images'] if product else []):
+            rows.append([str(index + 1), f'<img src="{url}" width="60">', f'<a href="{url}" target="_blank">Görüntüle</a>'])
+        self.send_json({'draw': 1, 'recordsTotal': len(rows), 'recordsFiltered': len(rows), 'data': rows})
+
+    def _image(self, path):
+        revision, last_modified = self.server.image_revisions.get(path, (0, self.server.image_last_modified))
+        seed = f"{path}#{revision}".encode('utf-8')
+        body = (hashlib.sha256(seed).hexdigest() * (self.server.image_bytes // 64 + 1)).encode('ascii')[:self.server.image_bytes]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        headers = {'ETag': etag, 'Last-Modified': last_modified, 'Cache-Control': 'max-age=3600'}
+        # If-None-Match varsa If-Modified-Since yok sayılır (RFC 9110)
+        if_none_match = self.headers.get('If-None-Match')
+        if (if_none_match == etag) if if_none_match else self.headers.get('If-Modified-Since') == last_modified:
+            self.send_response(304)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_bytes(body, 'image/jpeg', headers=headers)
@@ -0,0 +1,64 @@
+# standin/servers.py (Sahte Shopify ve Sentos sunucularını birlikte başlatma)
+
+import logging
+
+from standin.catalog import build_catalog
+from standin.sentos_server import SentosStandinServer
+from standin.shopify_server import ShopifyStandinServer
+
+
+class StandinServers:
+    """Aynı kataloğu paylaşan Shopify ve Sentos sahte sunucu çifti."""
+    def __init__(self, catalog, shopify_server, sentos_server):
+        self.catalog = catalog
+        self.shopify = shopify_server
+        self.sentos = sentos_server
+
+    @property
+    def shopify_store_url(self):
+        return self.shopify.base_url
+
+    @property
+    def sentos_api_url(self):
+        return f"{self.sentos.base_url}/api"
+
+    @property
+    def sentos_cookie(self):
+        return self.sentos.cookie
+
+    def stats(self):
+        return {'shopify': self.shopify.stats.snapshot(), 'sentos': self.sentos.stats.snapshot()}
+
+    def reset_stats(self):
+        self.shopify.stats.reset()
+        self.sentos.stats.reset()
+
+    def stop(self):
+        self.shopify.stop()
+        self.sentos.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def start_standin_servers(product_count=200, latency_ms=50, host="127.0.0.1", shopify_port=0, sentos_port=0,
+                          media_processing_seconds=2.0, graphql_bucket_size=1000, graphql_restore_rate=50,
+                          **catalog_options):
+    """
+    Sentetik kataloğu üretir ve iki sunucuyu arka plan thread'lerinde başlatır.
+    Port 0 verilirse işletim sistemi boş bir port seçer.
+    """
+    sentos_server = SentosStandinServer((host, sentos_port), None, latency_ms=latency_ms)
+    catalog = build_catalog(product_count=product_count, image_base_url=sentos_server.base_url, **catalog_options)
+    sentos_server.catalog = catalog
+    shopify_server = ShopifyStandinServer((host, shopify_port), catalog, latency_ms=latency_ms,
+                                          graphql_bucket_size=graphql_bucket_size, graphql_restore_rate=graphql_restore_rate,
+                                          media_processing_seconds=media_processing_seconds)
+    sentos_server.start()
+    shopify_server.start()
+    logging.info(f"Sahte sunucular hazır: Shopify {shopify_server.base_url} | Sentos {sentos_server.base_url} "
+                 f"| {len(catalog.sentos_products)} Sentos ürünü, {len(catalog.shopify_products)} Shopify ürünü, gecikme {latency_ms}ms")
+    return StandinServers(catalog, shopify_server, sentos_server)
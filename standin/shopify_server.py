@@ -0,0 +1,595 @@
+# standin/shopify_server.py (Shopify Admin API 2024-04 için yerel sahte sunucu)
+
+import json
+import re
+import threading
+import time
+from email.parser import BytesParser
+from urllib.parse import parse_qs, urlparse
+
+from standin.base import StandinHandler, StandinHTTPServer
+
+API_PREFIX = "/admin/api/2024-04"
+
+
+class CostBucket:
+    """
+    Shopify GraphQL maliyet kovası: 'size' puan kapasite, saniyede 'restore_rate' puan dolum.
+    REST için aynı sınıf istek sayısı kovası (40 istek, saniyede 2) olarak kullanılır.
+    """
+    def __init__(self, size, restore_rate):
+        self.size = size
+        self.restore_rate = restore_rate
+        self.available = float(size)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.size, self.available + (now - self.updated_at) * self.restore_rate)
+        self.updated_at = now
+
+    def try_consume(self, cost):
+        """Maliyet karşılanabiliyorsa düşer; (başarılı_mı, kalan_puan) döner."""
+        with self._lock:
+            self._refill()
+            if cost > self.available:
+                return False, self.available
+            self.available -= cost
+            return True, self.available
+
+    def refund(self, points):
+        """Shopify, talep edilen ile gerçekleşen maliyet arasındaki farkı kovaya iade eder."""
+        with self._lock:
+            self.available = min(self.size, self.available + max(0, points))
+
+
+def _gid(kind, numeric_id):
+    return f"gid://shopify/{kind}/{numeric_id}"
+
+
+def _numeric_id(gid):
+    try:
+        return int(str(gid).rsplit('/', 1)[-1])
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Minimal GraphQL okuyucu -------------------------------------------------
+# Projedeki sorguların yalnızca kök alanları (alias, ad, argümanlar) çözülür;
+# her kök alan için istemcilerin okuduğu tüm alanları içeren geniş bir nesne döndürülür.
+
+_IDENT = re.compile(r'\s*([A-Za-z_]\w*)\s*(?::\s*([A-Za-z_]\w*))?')
+_ARG = re.compile(r'(\w+)\s*:\s*(\$\w+|"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|true|false|null|[A-Z][A-Z_]*)')
+
+
+def _matching(text, start, open_char, close_char):
+    """text[start] açılış karakteri iken eşleşen kapanışın indeksini döndürür (string'leri atlar)."""
+    depth, i, in_string = 0, start, False
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if ch == '\\':
+                i += 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == open_char:
+            depth += 1
+        elif ch == close_char:
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(text) - 1
+
+
+def parse_root_fields(query):
+    """Sorgunun kök seçimlerini [(alias, ad, argüman_metni, seçim_metni)] olarak döndürür."""
+    start = query.find('{')
+    if start < 0:
+        return []
+    end = _matching(query, start, '{', '}')
+    i, fields = start + 1, []
+    while i < end:
+        while i < end and query[i] in ' \t\r\n,':
+            i += 1
+        if i >= end:
+            break
+        match = _IDENT.match(query, i)
+        if not match or not match.group(1):
+            i += 1
+            continue
+        alias, name = (match.group(1), match.group(2)) if match.group(2) else (match.group(1), match.group(1))
+        i = match.end()
+        while i < end and query[i].isspace():
+            i += 1
+        args = selection = ''
+        if i < end and query[i] == '(':
+            close = _matching(query, i, '(', ')')
+            args, i = query[i + 1:close], close + 1
+        while i < end and query[i].isspace():
+            i += 1
+        if i < end and query[i] == '{':
+            close = _matching(query, i, '{', '}')
+            selection, i = query[i + 1:close], close + 1
+        fields.append((alias, name, args, selection))
+    return fields
+
+
+def parse_arguments(args_text, variables):
+    args = {}
+    for key, raw in _ARG.findall(args_text or ''):
+        if raw.startswith('$'):
+            args[key] = variables.get(raw[1:])
+        elif raw.isupper():
+            args[key] = raw  # enum değeri (ör. type: MUTATION)
+        else:
+            args[key] = json.loads(raw)
+    return args
+
+
+def _count_objects(value):
+    if isinstance(value, dict):
+        return (1 if 'id' in value else 0) + sum(_count_objects(v) for v in value.values())
+    if isinstance(value, list):
+        return sum(_count_objects(v) for v in value)
+    return 0
+
+
+def estimate_query_cost(query, root_fields, variables, is_mutation):
+    """
+    Shopify'ın maliyet hesabına yaklaşık bir model: mutasyon başına 10 puan,
+    okumada bağlantı başına 'first' kadar nesne; nodes(ids:) için id başına 1 puan artı
+    seçimdeki bağlantıların maliyeti (her id için ayrı).
+    Tek sorgu kova kapasitesini aşamaz.
+    """
+    if is_mutation:
+        return 10 * max(1, len(root_fields))
+    cost = 1 + _first_total(query, variables)
+    for _, name, args, selection in root_fields:
+        if name == 'nodes':
+            per_node = _first_total(selection, variables)
+            cost += len(parse_arguments(args, variables).get('ids') or []) * (1 + per_node) - per_node
+    return cost
+
+
+def _first_total(text, variables):
+    total = 0
+    for value in re.findall(r'first\s*:\s*(\$?\w+)', text):
+        if value.startswith('$'):
+            value = variables.get(value[1:]) or 0
+        try:
+            total += int(value)
+        except (TypeError, ValueError):
+            continue
+    return total
+
+
+class ShopifyStandinServer(StandinHTTPServer):
+    """GraphQL maliyet kovası, REST istek kovası ve medya işleme gecikmesini tutar."""
+    def __init__(self, address, catalog, latency_ms=0, graphql_bucket_size=1000, graphql_restore_rate=50,
+                 rest_bucket_size=40, rest_leak_rate=2, media_processing_seconds=2.0, page_size_cap=250):
+        super().__init__(address, ShopifyStandinHandler, catalog, latency_ms)
+        self.graphql_bucket = CostBucket(graphql_bucket_size, graphql_restore_rate)
+        self.rest_bucket = CostBucket(rest_bucket_size, rest_leak_rate)
+        self.media_processing_seconds = media_processing_seconds
+        self.page_size_cap = page_size_cap
+        # Toplu işlemler: id -> {'type', 'status', 'ready_at', 'lines'}; her türden aynı anda tek işlem
+        self.bulk_operations = {}
+        # stagedUploadsCreate ile açılıp POST ile doldurulan dosyalar: key -> bytes
+        self.staged_uploads = {}
+        self.bulk_seconds_per_thousand = 0.5
+
+
+class ShopifyStandinHandler(StandinHandler):
+
+    # --- Yönlendirme ---
+    def do_POST(self):
+        self.simulate_latency()
+        path = urlparse(self.path).path
+        if path == f"{API_PREFIX}/graphql.json":
+            return self._handle_graphql(self.read_json())
+        if path == "/_standin/staged-uploads":
+            return self._receive_staged_upload()
+        self.send_not_found()
+
+    def do_GET(self):
+        self.simulate_latency()
+        parsed = urlparse(self.path)
+        if parsed.path == f"{API_PREFIX}/products.json":
+            return self._rest(lambda: self._rest_products(parse_qs(parsed.query)), 'rest:GET products')
+        if parsed.path == "/_standin/stats":
+            return self.send_json(self.server.stats.snapshot())
+        if match := re.fullmatch(r"/_standin/bulk/(\d+)\.jsonl", parsed.path):
+            return self._bulk_result(int(match.group(1)))
+        self.send_not_found()
+
+    def do_PUT(self):
+        self.simulate_latency()
+        match = re.fullmatch(rf"{API_PREFIX}/variants/(\d+)\.json", urlparse(self.path).path)
+        if match:
+            payload = self.read_json()
+            return self._rest(lambda: self._rest_update_variant(int(match.group(1)), payload), 'rest:PUT variants')
+        self.send_not_found()
+
+    # --- REST ---
+    def _rest(self, handler, stat_name):
+        allowed, available = self.server.rest_bucket.try_consume(1)
+        used = int(round(self.server.rest_bucket.size - available))
+        limit_header = {'X-Shopify-Shop-Api-Call-Limit': f"{used}/{self.server.rest_bucket.size}"}
+        self.server.stats.record(stat_name, throttled=not allowed)
+        if not allowed:
+            return self.send_json({'errors': 'Exceeded 2 calls per second for api client. Reduce request rates to resume uninterrupted service.'},
+                                  status=429, headers={**limit_header, 'Retry-After': '2.0'})
+        payload, status, headers = handler()
+        self.send_json(payload, status=status, headers={**limit_header, **(headers or {})})
+
+    def _rest_products(self, params):
+        catalog = self.server.catalog
+        limit = min(int(params.get('limit', ['50'])[0]), self.server.page_size_cap)
+        offset = int(params.get('page_info', ['0'])[0] or 0)
+        with catalog.lock:
+            products = list(catalog.shopify_products.values())
+            page = [{
+                'id': p['id'], 'title': p['title'], 'handle': p['handle'],
+                'variants': [{'id': v['id'], 'sku': v['sku'], 'price': v['price']} for v in p['variants']],
+            } for p in products[offset:offset + limit]]
+        headers = {}
+        if offset + limit < len(products):
+            next_url = f"http://{self.headers.get('Host')}{API_PREFIX}/products.json?limit={limit}&page_info={offset + limit}"
+            headers['Link'] = f'<{next_url}>; rel="next"'
+        return {'products': page}, 200, headers
+
+    def _rest_update_variant(self, variant_id, payload):
+        catalog = self.server.catalog
+        data = payload.get('variant', {})
+        with catalog.lock:
+            entry = catalog.variant_index.get(variant_id)
+            if not entry:
+                return {'errors': 'Not Found'}, 404, None
+            _, variant = entry
+            if 'price' in data:
+                variant['price'] = str(data['price'])
+            if 'compare_at_price' in data:
+                variant['compare_at_price'] = data['compare_at_price']
+            return {'variant': {'id': variant['id'], 'sku': variant['sku'], 'price': variant['price'],
+                                'compare_at_price': variant['compare_at_price']}}, 200, None
+
+    # --- GraphQL ---
+    def _handle_graphql(self, payload):
+        query = payload.get('query', '')
+        variables = payload.get('variables') or {}
+        is_mutation = query.lstrip().startswith('mutation')
+        root_fields = parse_root_fields(query)
+        bucket = self.server.graphql_bucket
+        requested = min(bucket.size, estimate_query_cost(query, root_fields, variables, is_mutation))
+        allowed, available = bucket.try_consume(requested)
+        stat_names = ",".join(name for _, name, _, _ in root_fields) or 'unknown'
+        self.server.stats.record(f"graphql:{stat_names}", throttled=not allowed)
+        if not allowed:
+            return self.send_json({'errors': [{'message': 'Throttled', 'extensions': {'code': 'THROTTLED',
+                                   'documentation': 'https://shopify.dev/api/usage/rate-limits'}}],
+                                   'extensions': self._cost_extensions(requested, None, available)})
+
+        data, errors = {}, []
+        for alias, name, args_text, _ in root_fields:
+            resolver = getattr(self, f"_resolve_{name}", None)
+            if resolver is None:
+                errors.append({'message': f"Field '{name}' doesn't exist on type '{'Mutation' if is_mutation else 'QueryRoot'}'"})
+                continue
+            data[alias] = resolver(parse_arguments(args_text, variables))
+
+        # Gerçekleşen maliyet dönen nesne sayısına göre hesaplanır, fark iade edilir
+        actual = requested if is_mutation else min(requested, 1 + _count_objects(data))
+        bucket.refund(requested - actual)
+        response = {'data': data, 'extensions': self._cost_extensions(requested, actual, available + requested - actual)}
+        if errors:
+            response['errors'] = errors
+        self.send_json(response)
+
+    def _cost_extensions(self, requested, actual, available):
+        bucket = self.server.graphql_bucket
+        return {'cost': {
+            'requestedQueryCost': requested,
+            'actualQueryCost': actual,
+            'throttleStatus': {'maximumAvailable': float(bucket.size), 'currentlyAvailable': int(min(bucket.size, available)),
+                               'restoreRate': float(bucket.restore_rate)},
+        }}
+
+    # --- Nesne gösterimleri ---
+    def _media_node(self, media):
+        ready = media['status'] == 'READY' or time.time() >= media.get('ready_at', 0)
+        if ready:
+            media['status'] = 'READY'
+        image = {'originalSrc': media['src'], 'url': media['src']} if ready else None
+        return {'id': _gid('MediaImage', media['id']), 'alt': media['alt'], 'status': media['status'],
+                'mediaContentType': 'IMAGE', 'image': image, 'preview': {'image': image, 'status': media['status']}}
+
+    def _variant_node(self, product, variant):
+        return {
+            'id': _gid('ProductVariant', variant['id']), 'sku': variant['sku'],
+            'price': variant['price'], 'compareAtPrice': variant['compare_at_price'],
+            'displayName': f"{product['title']} - {' / '.join(variant['options'])}",
+            'inventoryQuantity': variant['quantity'],
+            'selectedOptions': [{'name': n, 'value': v} for n, v in zip(['Renk', 'Beden'], variant['options'])],
+            'inventoryItem': {'id': _gid('InventoryItem', variant['inventory_item_id']), 'sku': variant['sku'],
+                              'unitCost': {'amount': variant['cost']}},
+            'product': {'id': _gid('Product', product['id'])},
+        }
+
+    def _product_node(self, product):
+        catalog = self.server.catalog
+        collections = [c for c in catalog.collections if c['id'] in product['collection_ids']]
+        media_nodes = [self._media_node(m) for m in product['media']]
+        featured = next((n['image'] for n in media_nodes if n['image']), None)
+        return {
+            'id': _gid('Product', product['id']), 'title': product['title'], 'handle': product['handle'],
+            'productType': product['productType'], 'descriptionHtml': product['descriptionHtml'],
+            'featuredImage': {'url': featured['url']} if featured else None,
+            'collections': {'edges': [{'node': {'id': _gid('Collection', c['id']), 'title': c['title']}} for c in collections]},
+            'variants': {'edges': [{'node': self._variant_node(product, v)} for v in product['variants']]},
+            'media': {'edges': [{'node': n} for n in media_nodes]},
+        }
+
+    def _connection(self, items, args, to_node):
+        first = min(int(args.get('first') or 50), self.server.page_size_cap)
+        offset = int(args.get('after') or 0)
+        page = items[offset:offset + first]
+        has_next = offset + first < len(items)
+        return {
+            'pageInfo': {'hasNextPage': has_next, 'endCursor': str(offset + first) if has_next else None},
+            'edges': [{'cursor': str(offset + i + 1), 'node': to_node(item)} for i, item in enumerate(page)],
+        }
+
+    def _product_from_gid(self, gid):
+        return self.server.catalog.shopify_products.get(_numeric_id(gid))
+
+    # --- Sorgu çözücüleri ---
+    def _resolve_products(self, args):
+        catalog = self.server.catalog
+        with catalog.lock:
+            products = list(catalog.shopify_products.values())
+            if search := args.get('query'):
+                # Ürün araması: sku:X tam eşleşme veya ürün SKU'su ile başlayan varyant SKU'ları
+                skus = [a or b for a, b in re.findall(r'sku:(?:"((?:[^"\\]|\\.)*)"|(\S+))', search)]
+                products = [p for p in products if any(
+                    v['sku'] == sku or v['sku'].startswith(f"{sku}-") for sku in skus for v in p['variants'])]
+            return self._connection(products, args, self._product_node)
+
+    def _resolve_product(self, args):
+        with self.server.catalog.lock:
+            product = self._product_from_gid(args.get('id'))
+            return self._product_node(product) if product else None
+
+    def _resolve_collections(self, args):
+        catalog = self.server.catalog
+        with catalog.lock:
+            return self._connection(catalog.collections, args,
+                                    lambda c: {'id': _gid('Collection', c['id']), 'title': c['title']})
+
+    def _resolve_locations(self, args):
+        return {'edges': [{'node': {'id': self.server.catalog.location_id, 'name': 'Standin Depo'}}]}
+
+    def _resolve_nodes(self, args):
+        catalog = self.server.catalog
+        nodes = []
+        with catalog.lock:
+            for gid in args.get('ids') or []:
+                kind, numeric = str(gid).split('/')[-2], _numeric_id(gid)
+                if kind == 'Product' and (product := catalog.shopify_products.get(numeric)):
+                    nodes.append(self._product_node(product))
+                elif kind == 'ProductVariant' and (entry := catalog.variant_index.get(numeric)):
+                    nodes.append(self._variant_node(catalog.shopify_products[entry[0]], entry[1]))
+                elif kind == 'MediaImage' and (product_id := catalog.media_index.get(numeric)):
+                    media = next((m for m in catalog.shopify_products[product_id]['media'] if m['id'] == numeric), None)
+                    nodes.append(self._media_node(media) if media else None)
+                else:
+                    nodes.append(None)
+        return nodes
+
+    # --- Toplu sorgular (bulkOperationRunQuery) ---
+    def _bulk_lines(self, inner_query):
+        """Toplu sorgu sonucunu Shopify gibi düz JSONL satırlarına (alt kayıtlar __parentId ile) çevirir."""
+        catalog = self.server.catalog
+        with_media, with_variants = 'media' in inner_query, 'variants' in inner_query
+        with_collections = 'collections' in inner_query
+        lines = []
+        with catalog.lock:
+            for product in catalog.shopify_products.values():
+                node = self._product_node(product)
+                product_gid = node['id']
+                lines.append({k: v for k, v in node.items() if k not in ('variants', 'media', 'collections')})
+                if with_variants:
+                    for edge in node['variants']['edges']:
+                        lines.append({**{k: v for k, v in edge['node'].items() if k != 'product'}, '__parentId': product_gid})
+                if with_media:
+                    for edge in node['media']['edges']:
+                        lines.append({**edge['node'], '__parentId': product_gid})
+                if with_collections:
+                    for edge in node['collections']['edges']:
+                        lines.append({**edge['node'], '__parentId': product_gid})
+        return [json.dumps(line, ensure_ascii=False) for line in lines]
+
+    def _bulk_operation_node(self, operation_id):
+        operation = self.server.bulk_operations[operation_id]
+        if operation['status'] == 'RUNNING' and time.time() >= operation['ready_at']:
+            operation['status'] = 'COMPLETED'
+        completed = operation['status'] == 'COMPLETED'
+        url = f"http://{self.headers.get('Host')}/_standin/bulk/{operation_id}.jsonl" if completed and operation['lines'] else None
+        return {'id': _gid('BulkOperation', operation_id), 'status': operation['status'], 'errorCode': None,
+                'objectCount': str(len(operation['lines']) if completed else 0), 'url': url, 'partialDataUrl': None}
+
+    def _bulk_result(self, operation_id):
+        operation = self.server.bulk_operations.get(operation_id)
+        if not operation or operation['status'] != 'COMPLETED':
+            return self.send_not_found()
+        self.send_bytes("\n".join(operation['lines']).encode('utf-8') + b"\n", content_type='application/jsonl')
+
+    def _start_bulk_operation(self, operation_type, lines):
+        server = self.server
+        operation_id = server.catalog.next_id()
+        server.bulk_operations[operation_id] = {
+            'type': operation_type, 'status': 'RUNNING', 'lines': lines,
+            'ready_at': time.time() + max(0.2, len(lines) / 1000 * server.bulk_seconds_per_thousand),
+        }
+        return {'bulkOperation': {'id': _gid('BulkOperation', operation_id), 'status': 'CREATED'}, 'userErrors': []}
+
+    def _bulk_in_progress(self, operation_type):
+        return any(op['type'] == operation_type and op['status'] == 'RUNNING' and time.time() < op['ready_at']
+                   for op in self.server.bulk_operations.values())
+
+    def _resolve_bulkOperationRunQuery(self, args):
+        if self._bulk_in_progress('QUERY'):
+            return {'bulkOperation': None, 'userErrors': [{'field': ['query'], 'message': 'A bulk query operation for this app and shop is already in progress.'}]}
+        return self._start_bulk_operation('QUERY', self._bulk_lines(args.get('query') or ''))
+
+    def _resolve_bulkOperationRunMutation(self, args):
+        if self._bulk_in_progress('MUTATION'):
+            return {'bulkOperation': None, 'userErrors': [{'field': ['mutation'], 'message': 'A bulk mutation operation for this app and shop is already in progress.'}]}
+        upload = self.server.staged_uploads.get(args.get('stagedUploadPath'))
+        if upload is None:
+            return {'bulkOperation': None, 'userErrors': [{'field': ['stagedUploadPath'], 'message': 'The staged upload path is invalid.'}]}
+        root_fields = parse_root_fields(args.get('mutation') or '')
+        if len(root_fields) != 1:
+            return {'bulkOperation': None, 'userErrors': [{'field': ['mutation'], 'message': 'Bulk mutations must have exactly one root field.'}]}
+        alias, name, args_text, _ = root_fields[0]
+        resolver = getattr(self, f"_resolve_{name}", None)
+        if resolver is None:
+            return {'bulkOperation': None, 'userErrors': [{'field': ['mutation'], 'message': f"Mutation '{name}' is not supported."}]}
+        # Satırlar işlem oluşturulurken uygulanır; sonuç dosyası işlem tamamlanınca sunulur
+        lines = []
+        for number, raw in enumerate(upload.decode('utf-8').splitlines()):
+            if raw.strip():
+                result = resolver(parse_arguments(args_text, json.loads(raw)))
+                lines.append(json.dumps({'data': {alias: result}, '__lineNumber': number}, ensure_ascii=False))
+        return self._start_bulk_operation('MUTATION', lines)
+
+    def _resolve_node(self, args):
+        gid = str(args.get('id') or '')
+        if gid.split('/')[-2:-1] == ['BulkOperation']:
+            operation_id = _numeric_id(gid)
+            return self._bulk_operation_node(operation_id) if operation_id in self.server.bulk_operations else None
+        nodes = self._resolve_nodes({'ids': [gid]})
+        return nodes[0] if nodes else None
+
+    def _resolve_currentBulkOperation(self, args):
+        operation_type = args.get('type') or 'QUERY'
+        ids = [i for i, op in self.server.bulk_operations.items() if op['type'] == operation_type]
+        return self._bulk_operation_node(max(ids)) if ids else None
+
+    def _resolve_stagedUploadsCreate(self, args):
+        targets = []
+        for item in args.get('input') or []:
+            key = f"tmp/standin/{self.server.catalog.next_id()}/{item.get('filename', 'upload.jsonl')}"
+            targets.append({'url': f"http://{self.headers.get('Host')}/_standin/staged-uploads", 'resourceUrl': None,
+                            'parameters': [{'name': 'key', 'value': key}, {'name': 'Content-Type', 'value': item.get('mimeType', '')}]})
+        return {'stagedTargets': targets, 'userErrors': []}
+
+    def _receive_staged_upload(self):
+        # multipart/form-data gövdesini e-posta ayrıştırıcısıyla çözer (cgi modülü kullanımdan kalktı)
+        message = BytesParser().parsebytes(f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode('utf-8') + self.read_body())
+        fields = {part.get_param('name', header='content-disposition'): part.get_payload(decode=True) for part in message.get_payload()}
+        key = (fields.get('key') or b'').decode('utf-8')
+        if not key or fields.get('file') is None:
+            return self.send_json({'errors': 'key ve file alanları gerekli'}, status=400)
+        self.server.staged_uploads[key] = fields['file']
+        self.send_bytes(b"", 'text/plain', status=204)
+
+    # --- Mutasyon çözücüleri ---
+    def _resolve_productUpdate(self, args):
+        data = args.get('input') or {}
+        with self.server.catalog.lock:
+            product = self._product_from_gid(data.get('id'))
+            if not product:
+                return {'product': None, 'userErrors': [{'field': ['id'], 'message': 'Product does not exist'}]}
+            for key in ('title', 'descriptionHtml', 'productType', 'handle'):
+                if key in data:
+                    product[key] = data[key]
+            return {'product': {'id': _gid('Product', product['id'])}, 'userErrors': []}
+
+    def _resolve_productCreateMedia(self, args):
+        catalog = self.server.catalog
+        with catalog.lock:
+            product = self._product_from_gid(args.get('productId'))
+            if not product:
+                return {'media': None, 'mediaUserErrors': [{'field': ['productId'], 'message': 'Product does not exist'}]}
+            created = []
+            for item in args.get('media') or []:
+                media = catalog.add_shopify_media(product['id'], item.get('originalSource'), alt=item.get('alt'), status='UPLOADED')
+                media['ready_at'] = time.time() + self.server.media_processing_seconds
+                created.append(self._media_node(media))
+            return {'media': created, 'mediaUserErrors': []}
+
+    def _resolve_productDeleteMedia(self, args):
+        catalog = self.server.catalog
+        media_ids = {_numeric_id(gid) for gid in args.get('mediaIds') or []}
+        with catalog.lock:
+            product = self._product_from_gid(args.get('productId'))
+            if not product:
+                return {'deletedMediaIds': None, 'mediaUserErrors': [{'field': ['productId'], 'message': 'Product does not exist'}]}
+            deleted = [m for m in product['media'] if m['id'] in media_ids]
+            product['media'] = [m for m in product['media'] if m['id'] not in media_ids]
+            for media in deleted:
+                catalog.media_index.pop(media['id'], None)
+            return {'deletedMediaIds': [_gid('MediaImage', m['id']) for m in deleted], 'mediaUserErrors': []}
+
+    def _resolve_productReorderMedia(self, args):
+        with self.server.catalog.lock:
+            product = self._product_from_gid(args.get('id'))
+            if not product:
+                return {'job': None, 'mediaUserErrors': [{'field': ['id'], 'message': 'Product does not exist'}]}
+            media = product['media']
+            for move in args.get('moves') or []:
+                current = next((m for m in media if m['id'] == _numeric_id(move.get('id'))), None)
+                if current:
+                    media.remove(current)
+                    media.insert(min(int(move.get('newPosition', 0)), len(media)), current)
+            return {'job': {'id': f"gid://shopify/Job/{self.server.catalog.next_id()}", 'done': True}, 'mediaUserErrors': []}
+
+    def _resolve_productVariantsBulkCreate(self, args):
+        catalog = self.server.catalog
+        with catalog.lock:
+            product = self._product_from_gid(args.get('productId'))
+            if not product:
+                return {'productVariants': None, 'userErrors': [{'field': ['productId'], 'message': 'Product does not exist'}]}
+            created = []
+            for item in args.get('variants') or []:
+                variant = catalog.add_shopify_variant(
+                    product['id'], sku=(item.get('inventoryItem') or {}).get('sku', ''),
+                    price=item.get('price', '0.00'), options=item.get('options') or [])
+                created.append(self._variant_node(product, variant))
+            return {'productVariants': created, 'userErrors': []}
+
+    def _resolve_productVariantsBulkUpdate(self, args):
+        catalog = self.server.catalog
+        with catalog.lock:
+            product = self._product_from_gid(args.get('productId'))
+            if not product:
+                return {'productVariants': None, 'userErrors': [{'field': ['productId'], 'message': 'Product does not exist'}]}
+            updated, errors = [], []
+            for index, item in enumerate(args.get('variants') or []):
+                variant = next((v for v in product['variants'] if v['id'] == _numeric_id(item.get('id'))), None)
+                if not variant:
+                    errors.append({'field': ['variants', str(index), 'id'], 'message': 'Variant does not exist'})
+                    continue
+                if 'price' in item:
+                    variant['price'] = str(item['price'])
+                if 'compareAtPrice' in item:
+                    variant['compare_at_price'] = item['compareAtPrice']
+                updated.append(self._variant_node(product, variant))
+            return {'productVariants': updated, 'userErrors': errors}
+
+    def _resolve_inventorySetOnHandQuantities(self, args):
+        catalog = self.server.catalog
+        data = args.get('input') or {}
+        errors = []
+        with catalog.lock:
+            for index, item in enumerate(data.get('setQuantities') or []):
+                variant = catalog.find_variant_by_inventory_item(_numeric_id(item.get('inventoryItemId')))
+                if variant is None:
+                    errors.append({'field': ['input', 'setQuantities', str(index)], 'message': 'Inventory item not found', 'code': 'INVALID_INVENTORY_ITEM'})
+                else:
+                    variant['quantity'] = int(item.get('quantity', 0))
+        return {'inventoryAdjustmentGroup': {'reason': data.get('reason')}, 'userErrors': errors}
@@ -0,0 +1,186 @@
+# sync_metrics.py (Aşama bazlı süre ölçümü ve metrik dışa aktarımı)
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_DIR = os.getenv("SYNC_METRICS_DIR", "metrics")
+METRIC_PREFIX = "sentos_sync"
+
+
+class SyncMetrics:
+    """
+    Bir senkronizasyon çalışması boyunca aşama/işlem sürelerini, throttle ve tekrar deneme
+    sayılarını ve bekleme (sleep) sürelerini thread-safe biçimde toplar.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._start_monotonic = time.monotonic()
+            self.spans = {}
+            self.counters = {}
+            self.sleeps = {}
+
+    @contextmanager
+    def span(self, name):
+        """Bloğun süresini verilen aşama/işlem adı altında kaydeder."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(name, time.perf_counter() - start)
+
+    def record_span(self, name, seconds):
+        with self._lock:
+            entry = self.spans.setdefault(name, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def sleep(self, seconds, reason):
+        """time.sleep yerine kullanılır; bekleme süresini nedeniyle birlikte kaydeder."""
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        with self._lock:
+            entry = self.sleeps.setdefault(reason, {'count': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += seconds
+
+    def summary(self):
+        with self._lock:
+            return {
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(),
+                'elapsed_seconds': round(time.monotonic() - self._start_monotonic, 3),
+                'spans': {name: {**entry, 'seconds': round(entry['seconds'], 3), 'max_seconds': round(entry['max_seconds'], 3)}
+                          for name, entry in sorted(self.spans.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'sleeps': {reason: {**entry, 'seconds': round(entry['seconds'], 3)} for reason, entry in sorted(self.sleeps.items())},
+                'total_sleep_seconds': round(sum(e['seconds'] for e in self.sleeps.values()), 3),
+            }
+
+    def to_prometheus(self, run_name, summary=None):
+        """Özeti node_exporter textfile collector biçiminde metne çevirir."""
+        summary = summary or self.summary()
+        run = _escape_label(run_name)
+        lines = [
+            f"# HELP {METRIC_PREFIX}_span_seconds_total Aşama/işlem başına toplam süre.",
+            f"# TYPE {METRIC_PREFIX}_span_seconds_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_span_seconds_total{{run="{run}",span="{_escape_label(name)}"}} {e["seconds"]}' for name, e in summary['spans'].items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_span_calls_total Aşama/işlem başına çağrı sayısı.",
+            f"# TYPE {METRIC_PREFIX}_span_calls_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_span_calls_total{{run="{run}",span="{_escape_label(name)}"}} {e["count"]}' for name, e in summary['spans'].items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_events_total Throttle, tekrar deneme vb. olay sayıları.",
+            f"# TYPE {METRIC_PREFIX}_events_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_events_total{{run="{run}",event="{_escape_label(name)}"}} {count}' for name, count in summary['counters'].items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_sleep_seconds_total Nedenine göre toplam bekleme süresi.",
+            f"# TYPE {METRIC_PREFIX}_sleep_seconds_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_sleep_seconds_total{{run="{run}",reason="{_escape_label(reason)}"}} {e["seconds"]}' for reason, e in summary['sleeps'].items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_run_duration_seconds Son çalışmanın toplam süresi.",
+            f"# TYPE {METRIC_PREFIX}_run_duration_seconds gauge",
+            f'{METRIC_PREFIX}_run_duration_seconds{{run="{run}"}} {summary["elapsed_seconds"]}',
+            f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds Son çalışmanın bitiş zamanı.",
+            f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+            f'{METRIC_PREFIX}_last_run_timestamp_seconds{{run="{run}"}} {int(time.time())}',
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export(self, run_name, directory=None, extra=None):
+        """Çalışma sonunda JSON özeti ve Prometheus textfile dosyasını yazar."""
+        directory = directory or METRICS_DIR
+        summary = self.summary()
+        if extra:
+            summary.update(extra)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            _atomic_write(os.path.join(directory, f"{run_name}_summary.json"), json.dumps(summary, indent=2, ensure_ascii=False))
+            _atomic_write(os.path.join(directory, f"{run_name}.prom"), self.to_prometheus(run_name, summary))
+            logging.info(f"Çalışma metrikleri '{directory}' klasörüne yazıldı. Toplam bekleme: {summary['total_sleep_seconds']}s")
+        except OSError as e:
+            logging.error(f"Metrik dosyaları yazılamadı: {e}")
+        return summary
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _atomic_write(path, content):
+    # Prometheus textfile collector yarım yazılmış dosyayı okumasın diye önce geçici dosyaya yazılır
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+# Etkin çalışma yoksa kullanılan, süreç genelinde paylaşılan metrik toplayıcı
+metrics = SyncMetrics()
+_current = contextvars.ContextVar('sync_metrics_current', default=None)
+
+
+def current():
+    """Bu thread'de etkin çalışmanın toplayıcısı (bkz. use) veya süreç geneli 'metrics'."""
+    return _current.get() or metrics
+
+
+@contextmanager
+def use(collector):
+    """
+    Blok boyunca span/increment/sleep kayıtlarını verilen toplayıcıya yönlendirir.
+    Aynı süreçte eşzamanlı çalışmalar (ör. Streamlit oturumları) böylece birbirinin metriklerini silmez
+    veya karıştırmaz. Bloğun açtığı thread'ler bu ayarı devralmaz; hedefleri bind ile sarılmalıdır.
+    """
+    token = _current.set(collector)
+    try:
+        yield collector
+    finally:
+        _current.reset(token)
+
+
+def bind(func):
+    """func'u, çağrıldığı andaki toplayıcıyla çalışacak şekilde sarar (ThreadPoolExecutor / Thread hedefleri için)."""
+    collector = current()
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        with use(collector):
+            return func(*args, **kwargs)
+    return run
+
+
+def span(name):
+    return current().span(name)
+
+
+def record_span(name, seconds):
+    current().record_span(name, seconds)
+
+
+def increment(name, amount=1):
+    current().increment(name, amount)
+
+
+def sleep(seconds, reason):
+    current().sleep(seconds, reason)
@@ -3,6 +3,7 @@
 import logging
 import threading
 import time
+import hashlib
 from datetime import timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import traceback
@@ -10,8 +11,13 @@ import traceback
 # Proje içindeki modülleri import et
 from connectors.shopify_api import ShopifyAPI
 from connectors.sentos_api import SentosAPI
-from operations import core_sync, media_sync, stock_sync
+from connectors.shared_budget import SharedRequestBudget
+from operations import core_sync, media_sync, stock_sync, sync_plan
+from operations.image_cache import ImageCache
+from operations.media_map import MediaMap
+from operations.media_readiness import MediaReadinessPoller
 from utils import get_apparel_sort_key # utils.py dosyasından import ediliyor
+import sync_metrics
 
 # --- Loglama Konfigürasyonu ---
 logging.basicConfig(
@@ -23,6 +29,45 @@ logging.basicConfig(
 
 # --- İÇ MANTIK FONKSİYONLARI ---
 
+def parse_shard_spec(shard):
+    """'i/N' biçimindeki shard tanımını (i, N) demetine çevirir. i 1'den başlar."""
+    if not shard:
+        return None
+    if isinstance(shard, (tuple, list)):
+        index, count = int(shard[0]), int(shard[1])
+    else:
+        try:
+            index_str, count_str = str(shard).split('/')
+            index, count = int(index_str), int(count_str)
+        except ValueError:
+            raise ValueError(f"Geçersiz shard tanımı: '{shard}'. Beklenen biçim: i/N (örn: 1/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Geçersiz shard tanımı: {index}/{count}. i, 1 ile N arasında olmalıdır.")
+    return index, count
+
+def _product_shard_index(sentos_product, shard_count):
+    """Ürünü SKU üzerinden kararlı bir hash ile bir shard'a atar (Python hash() süreçler arası değişir)."""
+    key = str(sentos_product.get('sku') or sentos_product.get('name') or sentos_product.get('id') or '').strip()
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+    return int(digest, 16) % shard_count + 1
+
+def _filter_products_for_shard(sentos_products, shard):
+    index, count = shard
+    selected = [p for p in sentos_products if _product_shard_index(p, count) == index]
+    logging.info(f"Shard {index}/{count}: {len(sentos_products)} üründen {len(selected)} tanesi bu işçiye düştü.")
+    return selected
+
+def _attach_shared_budget(shopify_api, shopify_config, shard):
+    """Shard'ların toplamda mağaza limitini aşmaması için ortak bütçe ayarlar."""
+    if budget_file := shopify_config.get('budget_file'):
+        shopify_api.shared_budget = SharedRequestBudget(budget_file, shopify_api.max_requests_per_minute, shopify_api.min_request_interval,
+                                                        shopify_api.GRAPHQL_BUCKET_SIZE, shopify_api.GRAPHQL_RESTORE_RATE)
+        logging.info(f"Ortak Shopify istek bütçesi kullanılıyor: {budget_file}")
+    elif shard and shard[1] > 1:
+        # Ortak dosya yoksa (örn. ayrı CI makineleri) limit shard sayısına bölünür
+        shopify_api.max_requests_per_minute = max(1, shopify_api.max_requests_per_minute // shard[1])
+        logging.info(f"Ortak bütçe dosyası yok, dakikalık limit shard başına {shopify_api.max_requests_per_minute} olarak ayarlandı.")
+
 def _find_shopify_product(shopify_api, sentos_product):
     """Sentos ürününü Shopify'da SKU veya başlığa göre arar."""
     if sku := sentos_product.get('sku', '').strip():
@@ -31,23 +76,28 @@ def _find_shopify_product(shopify_api, sentos_product):
         if product := shopify_api.product_cache.get(f"title:{name}"): return product
     return None
 
-def _update_product(shopify_api, sentos_api, sentos_product, existing_product, sync_mode):
+def _update_product(shopify_api, sentos_api, sentos_product, existing_product, sync_mode, media_poller=None, media_map=None, image_cache=None, media_prefetch=None):
     """Mevcut bir ürünü belirtilen moda göre günceller."""
     product_name = sentos_product.get('name', 'Bilinmeyen Ürün') 
     shopify_gid = existing_product['gid']
     logging.info(f"Mevcut ürün güncelleniyor: '{product_name}' (GID: {shopify_gid}) | Mod: {sync_mode}")
     all_changes = []
+    steps = sync_plan.get_update_steps(sync_mode)
     
-    if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Açıklamalar"]:
-         all_changes.extend(core_sync.sync_details(shopify_api, shopify_gid, sentos_product))
-         all_changes.extend(core_sync.sync_product_type(shopify_api, shopify_gid, sentos_product))
+    if 'details' in steps:
+        with sync_metrics.span('op.details'):
+            all_changes.extend(core_sync.sync_details(shopify_api, shopify_gid, sentos_product))
+            all_changes.extend(core_sync.sync_product_type(shopify_api, shopify_gid, sentos_product))
 
-    if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Stok ve Varyantlar"]:
-        all_changes.extend(stock_sync.sync_stock_and_variants(shopify_api, shopify_gid, sentos_product))
+    if 'stock' in steps:
+        with sync_metrics.span('op.stock'):
+            all_changes.extend(stock_sync.sync_stock_and_variants(shopify_api, shopify_gid, sentos_product))
 
-    if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Resimler", "SEO Alt Metinli Resimler"]:
+    if 'media' in steps:
         set_alt = sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "SEO Alt Metinli Resimler"]
-        all_changes.extend(media_sync.sync_media(shopify_api, sentos_api, shopify_gid, sentos_product, set_alt_text=set_alt))
+        with sync_metrics.span('op.media'):
+            all_changes.extend(media_sync.sync_media(shopify_api, sentos_api, shopify_gid, sentos_product, set_alt_text=set_alt, readiness_poller=media_poller, media_map=media_map, image_cache=image_cache,
+                                                     shopify_media=(media_prefetch or {}).get(shopify_gid)))
         
     logging.info(f"✅ Ürün '{product_name}' başarıyla güncellendi.")
     return all_changes
@@ -57,10 +107,10 @@ def _create_product(shopify_api, sentos_api, sentos_product):
     # Orijinal dosyanızdaki create_new_product mantığının tam hali buraya eklenmelidir.
     logging.info(f"Yeni ürün oluşturuluyor: {sentos_product.get('name')}")
     # ... productCreate, productVariantsBulkCreate vb. GraphQL çağrıları ...
-    time.sleep(1) # Örnek bekleme
+    sync_metrics.sleep(1, 'product_create_placeholder') # Örnek bekleme
     return ["Yeni ürün oluşturuldu (Detaylı mantık orijinal dosyadan eklenmeli)."]
 
-def _process_single_product(shopify_api, sentos_api, sentos_product, sync_mode, progress_callback, stats, details, lock):
+def _process_single_product(shopify_api, sentos_api, sentos_product, sync_mode, progress_callback, stats, details, lock, media_poller=None, media_map=None, image_cache=None, media_prefetch=None):
     """Tek bir ürün için senkronizasyon işlemini yürüten işçi fonksiyonu."""
     name = sentos_product.get('name', 'Bilinmeyen Ürün')
     sku = sentos_product.get('sku', 'SKU Yok')
@@ -75,7 +125,7 @@ def _process_single_product(shopify_api, sentos_api, sentos_product, sync_mode,
 
         if existing_product:
             if "Sadece Eksik" not in sync_mode: # Eksik modunda güncelleme yapma
-                changes_made = _update_product(shopify_api, sentos_api, sentos_product, existing_product, sync_mode)
+                changes_made = _update_product(shopify_api, sentos_api, sentos_product, existing_product, sync_mode, media_poller, media_map, image_cache, media_prefetch)
                 status, status_icon = 'updated', "🔄"
                 with lock: stats['updated'] += 1
             else:
@@ -112,60 +162,147 @@ def _process_single_product(shopify_api, sentos_api, sentos_product, sync_mode,
     finally:
         with lock: stats['processed'] += 1
 
-def _run_core_sync_logic(shopify_config, sentos_config, sync_mode, max_workers, test_mode, progress_callback, stop_event, find_missing_only=False):
+def _prefetch_media(shopify_api, products, sync_mode, media_map):
+    """Medya eşlemesinde olmayan mevcut ürünlerin medyasını nodes(ids:) ile toplu okur: {product_gid: [medya]}."""
+    if "Sadece Eksik" in sync_mode:
+        return {}
+    gids = [existing['gid'] for p in products if (existing := _find_shopify_product(shopify_api, p))]
+    gids = [gid for gid in dict.fromkeys(gids) if not media_map.has_product(gid)]
+    if not gids:
+        return {}
+    with sync_metrics.span('phase.media_prefetch'):
+        try:
+            return shopify_api.get_products_media_details(gids)
+        except Exception as e:
+            logging.warning(f"Toplu medya okuması başarısız, ürün bazında okunacak: {e}")
+            return {}
+
+def _run_dry_plan(shopify_api, products_to_process, sync_mode, max_workers, prefetch_seconds, sentos_product_count, stats):
+    """Mutasyon göndermeden değişiklik planını ve süre/maliyet tahminini hazırlar."""
+    throttle_model = shopify_api.get_throttle_model()
+    plan = sync_plan.build_sync_plan(shopify_api, products_to_process, sync_mode, _find_shopify_product)
+    cached_product_count = len({p['id'] for p in shopify_api.product_cache.values()})
+    sync_plan.record_prefetch(plan, cached_product_count, sentos_product_count, prefetch_seconds, throttle_model)
+    estimate = sync_plan.estimate_plan_duration(plan, throttle_model, max_workers)
+
+    stats['created'] = plan['products']['create']
+    stats['updated'] = plan['products']['update']
+    stats['skipped'] = plan['products']['skip']
+    stats['processed'] = stats['total']
+
+    logging.info(
+        f"Kuru çalıştırma tahmini: {estimate['graphql_calls']} GraphQL çağrısı, ~{estimate['graphql_cost']} maliyet puanı, "
+        f"{estimate['rest_calls']} REST çağrısı, tahmini süre {timedelta(seconds=estimate['projected_seconds'])} "
+        f"(en kötü durum {timedelta(seconds=estimate['projected_seconds_worst_case'])})"
+    )
+    return {'operations': plan['operations'], 'products': plan['products'], 'new_variants': plan['new_variants'],
+            'media_products': plan['media_products'], 'estimate': estimate, 'throttle_model': throttle_model}
+
+def _export_run_metrics(shard, sync_mode, stats, dry_run=False, status='success', error=None):
+    """
+    Çalışmanın aşama sürelerini JSON özeti ve Prometheus textfile olarak yazar.
+    status özete eklenir ('success', 'stopped' veya 'error'); hata durumunda error mesajı da yazılır.
+    """
+    run_name = "sync_run" if not shard else f"sync_run_shard_{shard[0]}_of_{shard[1]}"
+    if dry_run:
+        run_name += "_dry_run"
+    extra = {'sync_mode': sync_mode, 'stats': dict(stats), 'status': status}
+    if error is not None:
+        extra['error'] = error
+    return sync_metrics.current().export(run_name, extra=extra)
+
+def _run_core_sync_logic(shopify_config, sentos_config, sync_mode, max_workers, test_mode, progress_callback, stop_event, find_missing_only=False, dry_run=False, shard=None):
     """Tüm senkronizasyon türleri için ortak olan ana mantık."""
     start_time = time.monotonic()
     stats = {'total': 0, 'created': 0, 'updated': 0, 'failed': 0, 'skipped': 0, 'processed': 0}
     details = []
     lock = threading.Lock()
-
-    try:
-        shopify_api = ShopifyAPI(shopify_config['store_url'], shopify_config['access_token'])
-        sentos_api = SentosAPI(sentos_config['api_url'], sentos_config['api_key'], sentos_config['api_secret'], sentos_config.get('cookie'))
+    # Her çalışma kendi toplayıcısını kullanır; aynı süreçteki diğer çalışmaların metrikleri karışmaz
+    with sync_metrics.use(sync_metrics.SyncMetrics()):
+        try:
+            shopify_api = ShopifyAPI(shopify_config['store_url'], shopify_config['access_token'])
+            sentos_api = SentosAPI(sentos_config['api_url'], sentos_config['api_key'], sentos_config['api_secret'], sentos_config.get('cookie'))
+            shard = parse_shard_spec(shard)
+            _attach_shared_budget(shopify_api, shopify_config, shard)
         
-        shopify_api.load_all_products_for_cache(progress_callback)
-        sentos_products = sentos_api.get_all_products(progress_callback)
+            with sync_metrics.span('phase.shopify_cache_load'):
+                shopify_api.load_all_products_for_cache(progress_callback)
+            with sync_metrics.span('phase.sentos_fetch'):
+                sentos_products = sentos_api.get_all_products(progress_callback)
         
-        if test_mode: sentos_products = sentos_products[:20]
+            if shard: sentos_products = _filter_products_for_shard(sentos_products, shard)
+            if test_mode: sentos_products = sentos_products[:20]
 
-        products_to_process = sentos_products
-        if find_missing_only:
-            products_to_process = [p for p in sentos_products if not _find_shopify_product(shopify_api, p)]
-            logging.info(f"{len(products_to_process)} adet eksik ürün bulundu.")
+            products_to_process = sentos_products
+            if find_missing_only:
+                products_to_process = [p for p in sentos_products if not _find_shopify_product(shopify_api, p)]
+                logging.info(f"{len(products_to_process)} adet eksik ürün bulundu.")
         
-        stats['total'] = len(products_to_process)
-
-        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="SyncWorker") as executor:
-            futures = [executor.submit(_process_single_product, shopify_api, sentos_api, p, sync_mode, progress_callback, stats, details, lock) for p in products_to_process]
-            for future in as_completed(futures):
-                if stop_event.is_set(): 
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    break
-                processed, total = stats['processed'], stats['total']
-                progress = 55 + int((processed / total) * 45) if total > 0 else 100
-                progress_callback({'progress': progress, 'message': f"İşlenen: {processed}/{total}", 'stats': stats.copy()})
-
-        duration = time.monotonic() - start_time
-        results = {'stats': stats, 'details': details, 'duration': str(timedelta(seconds=duration))}
-        progress_callback({'status': 'done', 'results': results})
+            stats['total'] = len(products_to_process)
 
-    except Exception as e:
-        logging.critical(f"Senkronizasyon görevi kritik bir hata oluştu: {e}\n{traceback.format_exc()}")
-        progress_callback({'status': 'error', 'message': str(e)})
+            if dry_run:
+                with sync_metrics.span('phase.dry_run_plan'):
+                    plan = _run_dry_plan(shopify_api, products_to_process, sync_mode, max_workers, time.monotonic() - start_time, len(sentos_products), stats)
+                duration = time.monotonic() - start_time
+                results = {'stats': stats, 'details': details, 'duration': str(timedelta(seconds=duration)), 'dry_run': True, 'plan': plan}
+                if shard: results['shard'] = f"{shard[0]}/{shard[1]}"
+                results['timings'] = _export_run_metrics(shard, sync_mode, stats, dry_run=True)
+                progress_callback({'progress': 100, 'message': "Kuru çalıştırma planı hazır.", 'stats': stats.copy()})
+                progress_callback({'status': 'done', 'results': results})
+                return
+
+            # Medya ekleyen işçiler medyanın işlenmesini beklemez; sıralama arka planda, medya hazır olunca yapılır
+            media_poller = MediaReadinessPoller(shopify_api) if 'media' in sync_plan.get_update_steps(sync_mode) else None
+            # Sentos URL -> Shopify medya ID eşlemesi; bilinen ürünlerde medya okuması yapılmaz
+            media_map = MediaMap() if media_poller else None
+            # Aynı URL'de içeriği değişen görseller koşullu isteklerle (ETag / Last-Modified) tespit edilir
+            image_cache = ImageCache() if media_poller else None
+            media_prefetch = _prefetch_media(shopify_api, products_to_process, sync_mode, media_map) if media_poller else None
+            try:
+                with sync_metrics.span('phase.process_products'), ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="SyncWorker") as executor:
+                    futures = [executor.submit(sync_metrics.bind(_process_single_product), shopify_api, sentos_api, p, sync_mode, progress_callback, stats, details, lock, media_poller, media_map, image_cache, media_prefetch) for p in products_to_process]
+                    for future in as_completed(futures):
+                        if stop_event.is_set(): 
+                            executor.shutdown(wait=False, cancel_futures=True)
+                            break
+                        processed, total = stats['processed'], stats['total']
+                        progress = 55 + int((processed / total) * 45) if total > 0 else 100
+                        progress_callback({'progress': progress, 'message': f"İşlenen: {processed}/{total}", 'stats': stats.copy()})
+            finally:
+                if media_poller:
+                    if pending := media_poller.pending():
+                        progress_callback({'message': f"{pending} ürünün görsel sıralaması için medyanın hazır olması bekleniyor..."})
+                    with sync_metrics.span('phase.media_reorder_drain'):
+                        media_poller.close()
+                    media_map.save()
+                    image_cache.save()
+
+            duration = time.monotonic() - start_time
+            results = {'stats': stats, 'details': details, 'duration': str(timedelta(seconds=duration))}
+            if shard: results['shard'] = f"{shard[0]}/{shard[1]}"
+            results['timings'] = _export_run_metrics(shard, sync_mode, stats, status='stopped' if stop_event.is_set() else 'success')
+            progress_callback({'status': 'done', 'results': results})
+
+        except Exception as e:
+            logging.critical(f"Senkronizasyon görevi kritik bir hata oluştu: {e}\n{traceback.format_exc()}")
+            # Başarısız çalışmanın o ana kadarki süreleri de yazılır; shard henüz çözümlenmediyse genel ad kullanılır
+            _export_run_metrics(shard if isinstance(shard, tuple) else None, sync_mode, stats, dry_run=dry_run,
+                                status='error', error=str(e))
+            progress_callback({'status': 'error', 'message': str(e)})
 
 # --- ARAYÜZ (UI) İÇİN DIŞARIYA AÇIK FONKSİYONLAR ---
 
-def sync_products_from_sentos_api(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, test_mode, progress_callback, stop_event, max_workers=2, sync_mode="Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)"):
-    """3_sync.py'nin çağırdığı ana senkronizasyon fonksiyonu."""
-    shopify_config = {'store_url': store_url, 'access_token': access_token}
+def sync_products_from_sentos_api(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, test_mode, progress_callback, stop_event, max_workers=2, sync_mode="Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", dry_run=False, shard=None, budget_file=None):
+    """3_sync.py'nin ve zamanlanmış görevin çağırdığı ana senkronizasyon fonksiyonu."""
+    shopify_config = {'store_url': store_url, 'access_token': access_token, 'budget_file': budget_file}
     sentos_config = {'api_url': sentos_api_url, 'api_key': sentos_api_key, 'api_secret': sentos_api_secret, 'cookie': sentos_cookie}
-    _run_core_sync_logic(shopify_config, sentos_config, sync_mode, max_workers, test_mode, progress_callback, stop_event)
+    _run_core_sync_logic(shopify_config, sentos_config, sync_mode, max_workers, test_mode, progress_callback, stop_event, dry_run=dry_run, shard=shard)
 
-def sync_missing_products_only(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, test_mode, progress_callback, stop_event, max_workers=2):
+def sync_missing_products_only(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, test_mode, progress_callback, stop_event, max_workers=2, dry_run=False):
     """3_sync.py'nin çağırdığı 'sadece eksikleri oluştur' fonksiyonu."""
     shopify_config = {'store_url': store_url, 'access_token': access_token}
     sentos_config = {'api_url': sentos_api_url, 'api_key': sentos_api_key, 'api_secret': sentos_api_secret, 'cookie': sentos_cookie}
-    _run_core_sync_logic(shopify_config, sentos_config, "Sadece Eksikleri Oluştur", max_workers, test_mode, progress_callback, stop_event, find_missing_only=True)
+    _run_core_sync_logic(shopify_config, sentos_config, "Sadece Eksikleri Oluştur", max_workers, test_mode, progress_callback, stop_event, find_missing_only=True, dry_run=dry_run)
 
 def sync_single_product_by_sku(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, sku):
     """3_sync.py'nin çağırdığı 'tekil SKU güncelleme' fonksiyonu."""